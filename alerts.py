@@ -0,0 +1,387 @@
+"""Alert engine: budget, spending, balance, goal and bill checks off the request path
+
+Routes call enqueue() after committing their own write. Jobs go through a broker
+to a pool of worker threads, each running one rule on its own pooled connection.
+LocalBroker is an in-process stand-in for an external queue and drops a job when
+an identical one is already waiting. Set ALERT_WORKERS=0 to run jobs inline.
+
+Jobs are not serialized per user: two workers may run rules for the same user
+at once. Deduplication relies only on the database. Each alert carries a dedup
+key (rule:subject_id:period), notifications has a UNIQUE (user_id, dedup_key)
+index, and notify() treats ER_DUP_ENTRY as "already sent". When two jobs race,
+InnoDB makes the second INSERT wait for the first to commit and then fail, so
+the alert is sent once.
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date
+
+from db import get_db_connection
+from ledger import get_balance, get_category_spend, normalize_category
+from notifications import make_dedup_key, notify, publish_notifications
+
+log = logging.getLogger(__name__)
+
+ALERT_WORKERS = int(os.environ.get('ALERT_WORKERS', 2))
+ALERT_QUEUE_SIZE = int(os.environ.get('ALERT_QUEUE_SIZE', 1000))
+
+LOW_BALANCE = 1000
+
+RULES = {}
+
+
+def rule(name):
+    """Register a check as `name`; it runs as fn(cursor, user_id, **params) and returns how many alerts it emitted"""
+    def register(fn):
+        RULES[name] = fn
+        return fn
+    return register
+
+
+@dataclass(frozen=True)
+class AlertJob:
+    rule: str
+    user_id: int
+    params: tuple = ()  # Sorted (name, value) pairs, so equal jobs compare equal
+
+
+class LocalBroker:
+    """Bounded in-process job queue that skips jobs already waiting"""
+
+    def __init__(self, maxsize=ALERT_QUEUE_SIZE):
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def publish(self, job):
+        """Queue `job`; False if an identical job is already waiting or the queue is full"""
+        with self._lock:
+            if job in self._pending:
+                return False
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                return False
+            self._pending.add(job)
+            return True
+
+    def consume(self, timeout=None):
+        try:
+            job = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        with self._lock:
+            self._pending.discard(job)
+        return job
+
+    def qsize(self):
+        return self._queue.qsize()
+
+
+class RuleStats:
+    def __init__(self):
+        self.runs = 0
+        self.errors = 0
+        self.emitted = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, elapsed_ms, emitted=0, error=False):
+        self.runs += 1
+        self.emitted += emitted
+        self.errors += int(error)
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+
+    def to_dict(self):
+        return {
+            'runs': self.runs,
+            'errors': self.errors,
+            'emitted': self.emitted,
+            'avg_ms': round(self.total_ms / self.runs, 2) if self.runs else 0.0,
+            'max_ms': round(self.max_ms, 2)
+        }
+
+
+class AlertEngine:
+    def __init__(self, broker=None, workers=ALERT_WORKERS):
+        self.broker = broker or LocalBroker()
+        self.workers = workers
+        self._threads = []
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+        self.enqueued = 0
+        self.skipped = 0
+
+    def enqueue(self, rule_name, user_id, **params):
+        job = AlertJob(rule_name, user_id, tuple(sorted(params.items())))
+        if self.workers <= 0:
+            self.run_job(job)
+            return True
+
+        self._ensure_workers()
+        queued = self.broker.publish(job)
+        with self._stats_lock:
+            if queued:
+                self.enqueued += 1
+            else:
+                self.skipped += 1
+        return queued
+
+    def _ensure_workers(self):
+        # Threads don't survive a fork, so gunicorn workers each start their own
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._threads = [
+                threading.Thread(target=self._work, name=f"alert-worker-{i}", daemon=True)
+                for i in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def _work(self):
+        while True:
+            job = self.broker.consume()
+            if job is not None:
+                self.run_job(job)
+
+    def run_job(self, job):
+        """Run one rule in its own transaction and return how many alerts it emitted"""
+        check = RULES.get(job.rule)
+        if check is None:
+            log.error("Unknown alert rule: %s", job.rule)
+            return 0
+
+        start = time.perf_counter()
+        emitted = 0
+        error = False
+        conn = get_db_connection()
+        if conn is None:
+            log.warning("Alert rule %s skipped: no database connection", job.rule)
+            self._record(job.rule, (time.perf_counter() - start) * 1000, 0, True)
+            return 0
+        cursor = None
+        try:
+            cursor = conn.cursor(dictionary=True)
+            emitted = check(cursor, job.user_id, **dict(job.params)) or 0
+            conn.commit()
+        except Exception:
+            error = True
+            emitted = 0
+            log.exception("Error in alert rule %s", job.rule)
+            try:
+                conn.rollback()
+            except Exception:
+                pass  # Connection is broken; the pool checks it before handing it out again
+        finally:
+            if cursor is not None:
+                cursor.close()
+            conn.close()
+
+        if emitted:
+            publish_notifications(job.user_id)
+        self._record(job.rule, (time.perf_counter() - start) * 1000, emitted, error)
+        return emitted
+
+    def _record(self, rule_name, elapsed_ms, emitted, error):
+        with self._stats_lock:
+            self._stats.setdefault(rule_name, RuleStats()).record(elapsed_ms, emitted, error)
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                'workers': self.workers,
+                'queued': self.broker.qsize(),
+                'enqueued': self.enqueued,
+                'skipped': self.skipped,
+                'rules': {name: s.to_dict() for name, s in self._stats.items()}
+            }
+
+
+engine = AlertEngine()
+
+
+def enqueue(rule_name, user_id, **params):
+    return engine.enqueue(rule_name, user_id, **params)
+
+
+def alert_stats():
+    return engine.stats()
+
+
+# --- Emission ---
+
+def emit(cursor, user_id, message, notif_type, rule_name, subject_id='', period=None):
+    """Notify once per (rule, subject, period) -- today by default; returns 1 if sent"""
+    key = make_dedup_key(rule_name, subject_id, period)
+    return notify(cursor, user_id, message, notif_type, dedup_key=key)
+
+
+# --- Rules ---
+
+@rule('balance_status')
+def check_balance_status(cursor, user_id):
+    """Warn when the balance is negative or below LOW_BALANCE"""
+    current_balance = get_balance(cursor, user_id)
+
+    if current_balance < 0:
+        msg = f"🚨 Alert! Your balance is negative: ₹{current_balance:,.2f}. Please add income or review expenses."
+        return emit(cursor, user_id, msg, 'danger', 'balance_negative')
+    if current_balance < LOW_BALANCE:
+        msg = f"⚠️ Low balance alert: Only ₹{current_balance:,.2f} remaining. Consider reducing expenses."
+        return emit(cursor, user_id, msg, 'warning', 'balance_low')
+    return 0
+
+
+@rule('budget_threshold')
+def check_budget_thresholds(cursor, user_id, category, month):
+    """Warn at 80% and 100% of the category's budget for `month`"""
+    cursor.execute(
+        "SELECT id, limit_amount, category FROM budgets WHERE user_id = %s AND LOWER(category) = LOWER(%s) AND month = %s",
+        (user_id, category, month)
+    )
+    budget = cursor.fetchone()
+    if not budget:
+        return 0
+
+    limit = float(budget['limit_amount'])
+    category = budget['category']
+    spent = get_category_spend(cursor, user_id, month, category)
+    percent = (spent / limit * 100) if limit > 0 else 0
+
+    if percent >= 100:
+        msg = f"🚨 Budget exceeded! You've spent ₹{spent:.0f} of ₹{limit:.0f} ({percent:.0f}%) on {category}"
+        notif_type = 'danger'
+    elif percent >= 80:
+        msg = f"⚠️ Budget warning! You've used {percent:.0f}% of your {category} budget (₹{spent:.0f}/₹{limit:.0f})"
+        notif_type = 'warning'
+    else:
+        return 0
+
+    return emit(cursor, user_id, msg, notif_type, f"budget_{notif_type}", budget['id'])
+
+
+@rule('unusual_spending')
+def check_unusual_spending(cursor, user_id, category, amount, transaction_id):
+    """Flag an expense far above the category's 3-month average, or a day far above the daily average"""
+    cursor.execute("""
+        SELECT AVG(amount) as avg_amount, COUNT(*) as count, MAX(amount) as max_amount
+        FROM transactions
+        WHERE user_id = %s AND type = 'expense' AND category_norm = %s
+        AND date >= DATE_SUB(CURDATE(), INTERVAL 3 MONTH)
+    """, (user_id, normalize_category(category)))
+    result = cursor.fetchone()
+
+    if result and result['count'] and result['count'] >= 3:
+        avg_amount = float(result['avg_amount']) if result['avg_amount'] else 0
+        max_amount = float(result['max_amount']) if result['max_amount'] else 0
+
+        # Alert if transaction is more than 2.5x the average or exceeds previous max by 50%
+        if avg_amount > 0:
+            if amount >= avg_amount * 2.5:
+                msg = f"⚠️ Unusual spending detected! ₹{amount:.0f} on {category} is {(amount/avg_amount):.1f}x your average (₹{avg_amount:.0f})"
+                return emit(cursor, user_id, msg, 'warning', 'unusual_spending', transaction_id, period='')
+            if max_amount > 0 and amount >= max_amount * 1.5:
+                msg = f"📊 Large expense alert: ₹{amount:.0f} on {category} exceeds your usual spending pattern"
+                return emit(cursor, user_id, msg, 'info', 'unusual_spending', transaction_id, period='')
+
+    # Also check for overall daily spending being unusual
+    cursor.execute("""
+        SELECT AVG(daily_total) as avg_daily FROM (
+            SELECT date as tx_date, SUM(amount) as daily_total
+            FROM transactions
+            WHERE user_id = %s AND type = 'expense'
+            AND date >= DATE_SUB(CURDATE(), INTERVAL 1 MONTH)
+            GROUP BY date
+        ) daily_totals
+    """, (user_id,))
+    daily_result = cursor.fetchone()
+    if not daily_result or not daily_result['avg_daily']:
+        return 0
+
+    avg_daily = float(daily_result['avg_daily'])
+    cursor.execute("""
+        SELECT SUM(amount) as today_total FROM transactions
+        WHERE user_id = %s AND type = 'expense' AND date = CURDATE()
+    """, (user_id,))
+    today_result = cursor.fetchone()
+    today_total = float(today_result['today_total']) if today_result and today_result['today_total'] else 0
+
+    if today_total >= avg_daily * 2:
+        msg = f"💰 High daily spending: You've spent ₹{today_total:.0f} today, which is {(today_total/avg_daily):.1f}x your daily average"
+        return emit(cursor, user_id, msg, 'warning', 'daily_spending')
+    return 0
+
+
+@rule('goal_deadlines')
+def check_goal_deadlines(cursor, user_id):
+    """Remind about unfinished goals due within 7 days"""
+    cursor.execute("""
+        SELECT * FROM goals
+        WHERE user_id = %s AND deadline IS NOT NULL
+        AND deadline BETWEEN CURDATE() AND DATE_ADD(CURDATE(), INTERVAL 7 DAY)
+        AND current_amount < target_amount
+    """, (user_id,))
+    goals = cursor.fetchall()
+
+    emitted = 0
+    for goal in goals:
+        days_left = (goal['deadline'] - date.today()).days
+        remaining = float(goal['target_amount']) - float(goal['current_amount'])
+
+        if days_left <= 1:
+            msg = f"🎯 Goal '{goal['name']}' deadline is tomorrow! ₹{remaining:.0f} still needed."
+            notif_type = 'danger'
+        elif days_left <= 3:
+            msg = f"⏰ Goal '{goal['name']}' deadline in {days_left} days. ₹{remaining:.0f} remaining."
+            notif_type = 'warning'
+        else:
+            msg = f"📅 Goal '{goal['name']}' deadline approaching in {days_left} days."
+            notif_type = 'info'
+
+        emitted += emit(cursor, user_id, msg, notif_type, 'goal_deadline', goal['id'])
+    return emitted
+
+
+@rule('bill_reminders')
+def check_bill_reminders(cursor, user_id):
+    """Remind about unpaid bills that are overdue or due within 3 days"""
+    today = date.today()
+    cursor.execute("SELECT * FROM bills WHERE user_id = %s AND is_paid = FALSE", (user_id,))
+    bills = cursor.fetchall()
+
+    emitted = 0
+    for bill in bills:
+        days_until = (bill['due_date'] - today).days
+        amount = float(bill['amount'])
+
+        if days_until < 0:
+            msg = f"🚨 OVERDUE: {bill['name']} (₹{amount:.0f}) was due {-days_until} days ago!"
+            notif_type = 'danger'
+        elif days_until == 0:
+            msg = f"⏰ DUE TODAY: {bill['name']} (₹{amount:.0f}) is due today!"
+            notif_type = 'warning'
+        elif days_until <= 3:
+            msg = f"📅 REMINDER: {bill['name']} (₹{amount:.0f}) is due in {days_until} days"
+            notif_type = 'info'
+        else:
+            continue
+
+        emitted += emit(cursor, user_id, msg, notif_type, 'bill_reminder', bill['id'])
+    return emitted
+
+
+def enqueue_transaction_alerts(user_id, transaction_id, tx_type, category, amount, tx_date):
+    """Checks to run after a transaction is added"""
+    if tx_type == 'expense':
+        enqueue('budget_threshold', user_id, category=category, month=str(tx_date)[:7])
+        enqueue('unusual_spending', user_id, category=category, amount=float(amount), transaction_id=transaction_id)
+    enqueue('balance_status', user_id)
@@ -0,0 +1,204 @@
+"""Async (ASGI) serving mode for the polled JSON endpoints
+
+    hypercorn async_api:app --bind 0.0.0.0:8001 --workers 2
+
+Serves /api/dashboard_data, /api/notifications, /api/ping_session and
+/api/set_theme with Quart and aiomysql, so a slow query only suspends
+one coroutine instead of holding a gunicorn thread while dozens of tabs poll.
+A reverse proxy routes those four paths here and everything else to the
+Flask app (see DEPLOY.md, Async API). The responses are the same as the
+Flask routes' responses. Quart signs the session cookie the same way Flask
+does, so with the same SECRET_KEY it reads the login made by the Flask app.
+
+On a dashboard cache miss, the six dashboard sub-queries run concurrently,
+each on its own pooled connection, via asyncio.gather. The payload is then
+shaped by the same build_dashboard_data() and cached under the same key
+(dashboard.cache_key), so both tiers share cache entries when CACHE_URL is set.
+The aiomysql pool is opened in each worker process when it starts serving.
+Cache lookups and writes go through the same (synchronous) cache objects as
+the Flask tier, run with asyncio.to_thread so a slow Redis round trip does
+not stall the event loop.
+
+Notification summaries are cached under the user id alone and are dropped by
+the Flask app when a notification changes. That only reaches this process
+through a shared cache, so the tier refuses to start with an in-process
+notification cache. Without one, new notifications would be served late for
+up to NOTIFICATION_CACHE_TTL, under a stale ETag. NOTIFICATION_CACHE_SIZE=0
+turns the cache off and is also accepted, e.g. for benchmarks.
+"""
+import asyncio
+import logging
+import os
+import re
+from datetime import date, datetime, timezone
+
+import aiomysql
+from quart import Quart, jsonify, request, session
+from werkzeug.http import http_date, quote_etag
+
+from dashboard import (AGGREGATE_PARTS, ROW_PARTS, build_dashboard_data, cache_data, cache_key, cached_data,
+                       make_payload)
+from db import DB_CONFIG, DB_NAME, POOL_CONFIG
+from ledger import DATA_STAMP_QUERY
+from notifications import (LATEST_QUERY, NOTIFICATION_LIMIT, UNREAD_COUNT_QUERY, cache_summary, cached_summary,
+                           copy_summary, notifications_payload, payload_etag)
+from notifications import cache_stats as notification_cache_stats
+
+log = logging.getLogger(__name__)
+
+ASYNC_DB_POOL_SIZE = int(os.environ.get('ASYNC_DB_POOL_SIZE', 20))
+
+# Routes served here; the proxy sends the rest of the site to the Flask app
+ASYNC_ROUTES = ('/api/dashboard_data', '/api/notifications', '/api/ping_session', '/api/set_theme')
+
+app = Quart(__name__)
+app.secret_key = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
+
+_pool = None
+
+
+@app.before_serving
+async def require_shared_notification_cache():
+    stats = notification_cache_stats()
+    if stats['backend'] == 'memory' and stats['maxsize'] > 0:
+        raise RuntimeError(
+            "The async API needs CACHE_URL (with the redis package installed) so the Flask app's notification "
+            "invalidations reach it; set NOTIFICATION_CACHE_SIZE=0 to run it without a notification cache"
+        )
+
+
+@app.before_serving
+async def open_pool():
+    global _pool
+    _pool = await aiomysql.create_pool(
+        host=DB_CONFIG['host'],
+        port=DB_CONFIG.get('port', 3306),
+        user=DB_CONFIG['user'],
+        password=DB_CONFIG['password'],
+        db=DB_NAME,
+        minsize=1,
+        maxsize=ASYNC_DB_POOL_SIZE,
+        pool_recycle=POOL_CONFIG['recycle'],
+        autocommit=True
+    )
+    log.info("Async API pool open (up to %d connections)", ASYNC_DB_POOL_SIZE)
+
+
+@app.after_serving
+async def close_pool():
+    if _pool is not None:
+        _pool.close()
+        await _pool.wait_closed()
+
+
+_PERCENT_RE = re.compile(r'%(?!s)')
+
+
+def pyformat(sql):
+    """Escape literal % (e.g. DATE_FORMAT's '%Y-%m') for PyMySQL, which %-formats the whole statement"""
+    return _PERCENT_RE.sub('%%', sql)
+
+
+async def fetch_all(sql, args):
+    async with _pool.acquire() as conn:
+        async with conn.cursor(aiomysql.DictCursor) as cursor:
+            await cursor.execute(pyformat(sql), args)
+            return await cursor.fetchall()
+
+
+async def fetch_one(sql, args):
+    rows = await fetch_all(sql, args)
+    return rows[0] if rows else None
+
+
+def conditional_response(data, etag, last_modified=None):
+    """JSON response, or an empty 304 if the client's If-None-Match/If-Modified-Since still holds"""
+    headers = {'ETag': quote_etag(etag), 'Cache-Control': 'private, no-cache'}
+    if last_modified is not None:
+        headers['Last-Modified'] = http_date(last_modified.replace(tzinfo=timezone.utc))
+
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains_weak(etag)
+    elif last_modified is not None and request.if_modified_since:
+        not_modified = last_modified.replace(microsecond=0, tzinfo=timezone.utc) <= request.if_modified_since
+    else:
+        not_modified = False
+    if not_modified:
+        return '', 304, headers
+
+    response = jsonify(data)
+    response.headers.update(headers)
+    return response
+
+
+def unauthorized():
+    return jsonify({'error': 'Unauthorized'}), 401
+
+
+async def load_dashboard_data(user_id, today):
+    """All dashboard sub-queries at once, shaped as in dashboard.fetch_dashboard_data()"""
+    parts = AGGREGATE_PARTS + ROW_PARTS
+    results = await asyncio.gather(*(fetch_all(sql, (user_id,) * count) for sql, count in parts))
+    aggregates = [row for rows in results[:len(AGGREGATE_PARTS)] for row in rows]
+    recent_transactions, bills, goals = (list(rows) for rows in results[len(AGGREGATE_PARTS):])
+    return build_dashboard_data(aggregates, recent_transactions, bills, goals, today)
+
+
+@app.route('/api/dashboard_data')
+async def dashboard_data():
+    if 'user_id' not in session:
+        return unauthorized()
+
+    user_id = session['user_id']
+    today = date.today()
+    row = await fetch_one(DATA_STAMP_QUERY, (user_id,))
+    stamp = (row['data_version'], row['data_updated_at']) if row else None
+    key, last_modified = cache_key(user_id, stamp, today)
+
+    data = await asyncio.to_thread(cached_data, key)
+    if data is None:
+        data = (await load_dashboard_data(user_id, today)).to_dict()
+        await asyncio.to_thread(cache_data, key, data)
+    payload = make_payload(key, data, last_modified)
+    return conditional_response(payload.data, payload.etag, payload.last_modified)
+
+
+@app.route('/api/notifications')
+async def get_notifications():
+    if 'user_id' not in session:
+        return unauthorized()
+
+    user_id = session['user_id']
+    summary = await asyncio.to_thread(cached_summary, user_id)
+    if summary is None:
+        notifs, unread = await asyncio.gather(
+            fetch_all(LATEST_QUERY, (user_id, NOTIFICATION_LIMIT)),
+            fetch_one(UNREAD_COUNT_QUERY, (user_id,))
+        )
+        summary = (list(notifs), unread['count'] if unread else 0)
+        await asyncio.to_thread(cache_summary, user_id, summary)
+
+    payload = notifications_payload(*copy_summary(summary))
+    return conditional_response(payload, payload_etag(payload))
+
+
+@app.route('/api/set_theme', methods=['POST'])
+async def set_theme():
+    """Set user's theme preference"""
+    if 'user_id' not in session:
+        return unauthorized()
+
+    data = await request.get_json()
+    theme = data.get('theme', 'dark')
+    session['theme'] = theme
+    return jsonify({'status': 'ok', 'theme': theme})
+
+
+@app.route('/api/ping_session', methods=['POST'])
+async def ping_session():
+    """Keep session alive when user is active"""
+    if 'user_id' not in session:
+        return unauthorized()
+
+    session['last_activity'] = datetime.now().isoformat()
+    return jsonify({'status': 'ok'})
@@ -0,0 +1,107 @@
+"""Load test the polled JSON endpoints: sync (gunicorn) vs async (hypercorn) tier
+
+    python -m benchmarks.api_load --sync http://127.0.0.1:8000 --async http://127.0.0.1:8001 \\
+        [--size 100000] [--concurrency 50] [--duration 20] [--revalidate]
+
+Start both servers against the same local MySQL first, e.g.
+    gunicorn app:app --bind 127.0.0.1:8000
+    hypercorn async_api:app --bind 127.0.0.1:8001 --workers 2
+Give both the same SECRET_KEY. To measure the database path rather than
+cache hits, also start them with DASHBOARD_CACHE_SIZE=0 and
+NOTIFICATION_CACHE_SIZE=0.
+
+Signs a session cookie for the seeded benchmark user with the app's
+SECRET_KEY. --concurrency client threads then poll /api/dashboard_data and
+/api/notifications on keep-alive connections for --duration seconds per
+target. Prints requests/s and p50/p95/p99 latency. With --revalidate, clients
+send If-None-Match like a polling browser, so unchanged responses are 304s.
+"""
+import argparse
+import http.client
+import threading
+import time
+from urllib.parse import urlsplit
+
+from benchmarks.common import get_bench_user, percentile
+
+PATHS = ('/api/dashboard_data', '/api/notifications')
+
+
+def session_cookie(user_id):
+    """Cookie header value for a signed-in session, as the Flask app would set it"""
+    from app import app
+    value = app.session_interface.get_signing_serializer(app).dumps({'user_id': user_id, 'username': 'Bench'})
+    return f"{app.config['SESSION_COOKIE_NAME']}={value}"
+
+
+def client(base_url, cookie, deadline, revalidate, latencies, errors, lock):
+    parts = urlsplit(base_url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+    etags = {}
+    samples = []
+    failed = 0
+    i = 0
+    while time.monotonic() < deadline:
+        path = PATHS[i % len(PATHS)]
+        i += 1
+        headers = {'Cookie': cookie, 'Accept': 'application/json'}
+        if revalidate and path in etags:
+            headers['If-None-Match'] = etags[path]
+        started = time.perf_counter()
+        try:
+            conn.request('GET', path, headers=headers)
+            response = conn.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            failed += 1
+            conn.close()
+            conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+            continue
+        samples.append((time.perf_counter() - started) * 1000)
+        if response.status not in (200, 304):
+            failed += 1
+        elif response.getheader('ETag'):
+            etags[path] = response.getheader('ETag')
+    conn.close()
+    with lock:
+        latencies.extend(samples)
+        errors[0] += failed
+
+
+def run(label, base_url, cookie, concurrency, duration, revalidate):
+    latencies, errors, lock = [], [0], threading.Lock()
+    deadline = time.monotonic() + duration
+    threads = [threading.Thread(target=client, args=(base_url, cookie, deadline, revalidate, latencies, errors, lock))
+               for _ in range(concurrency)]
+    started = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - started
+    if not latencies:
+        print(f"{label:<6} no successful requests ({errors[0]} errors)")
+        return
+    print(f"{label:<6} {len(latencies) / elapsed:8.1f} req/s  p50={percentile(latencies, 50):7.1f} ms  "
+          f"p95={percentile(latencies, 95):7.1f} ms  p99={percentile(latencies, 99):7.1f} ms  "
+          f"n={len(latencies)}  errors={errors[0]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sync', dest='sync_url', default='http://127.0.0.1:8000')
+    parser.add_argument('--async', dest='async_url', default='http://127.0.0.1:8001')
+    parser.add_argument('--size', type=int, default=100_000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--revalidate', action='store_true')
+    args = parser.parse_args()
+
+    cookie = session_cookie(get_bench_user(args.size))
+    print(f"{args.concurrency} clients, {args.duration:g}s per target, paths: {', '.join(PATHS)}")
+    for label, url in (('sync', args.sync_url), ('async', args.async_url)):
+        run(label, url, cookie, args.concurrency, args.duration, args.revalidate)
+
+
+if __name__ == '__main__':
+    main()
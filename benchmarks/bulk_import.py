@@ -0,0 +1,121 @@
+"""Bulk import throughput: chunked executemany vs one commit per row
+
+    python -m benchmarks.bulk_import [--rows 100000] [--batch-sizes 500 1000 5000] [--per-row 2000]
+
+Writes a CSV statement of --rows random transactions, imports it into an
+empty benchmark user once per batch size, and compares the rows/s with the
+add_transaction path (INSERT + record_transaction + commit per row) on the
+first --per-row rows.
+"""
+import argparse
+import csv
+import random
+import time
+from datetime import date, timedelta
+
+from benchmarks.common import random_transaction
+from db import get_db_connection
+from importer import ImportResult, import_file, iter_csv_rows, iter_valid_rows
+from ledger import rebuild_balance, rebuild_category_spend, record_transaction
+from reports import make_temp_path, remove_file
+
+BENCH_EMAIL = 'bench-import@example.com'
+
+
+def get_import_user():
+    """An existing-or-new benchmark user with no transactions"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT id FROM users WHERE email = %s", (BENCH_EMAIL,))
+    row = cursor.fetchone()
+    if row:
+        user_id = row[0]
+    else:
+        cursor.execute("INSERT INTO users (username, email, password_hash, initial_balance) VALUES (%s, %s, %s, %s)",
+                       ("Bench import", BENCH_EMAIL, 'x' * 64, 10000))
+        user_id = cursor.lastrowid
+    conn.commit()
+    cursor.close()
+    conn.close()
+    reset_user(user_id)
+    return user_id
+
+
+def reset_user(user_id):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM transactions WHERE user_id = %s", (user_id,))
+    rebuild_balance(cursor, user_id)
+    rebuild_category_spend(cursor, user_id)
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+
+def write_statement(path, rows, seed=42):
+    rng = random.Random(seed)
+    span_days = 365 * 3
+    start = date.today() - timedelta(days=span_days)
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['date', 'type', 'category', 'amount', 'description', 'payment_method'])
+        for _ in range(rows):
+            _, tx_type, category, amount, description, tx_date, payment_method = random_transaction(
+                0, rng, start, span_days)
+            writer.writerow([tx_date, tx_type, category, amount, description, payment_method])
+
+
+def per_row_import(user_id, path, limit):
+    """The add_transaction route's write path, once per row"""
+    with open(path, 'rb') as stream:
+        rows = iter_valid_rows(user_id, iter_csv_rows(stream), ImportResult())
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        started = time.perf_counter()
+        count = 0
+        for row in rows:
+            if count == limit:
+                break
+            cursor.execute(
+                "INSERT INTO transactions (user_id, type, category, amount, description, date, payment_method, "
+                "is_deleted) VALUES (%s, %s, %s, %s, %s, %s, %s, FALSE)",
+                row
+            )
+            record_transaction(cursor, user_id, row[1], row[2], row[3], row[5])
+            conn.commit()
+            count += 1
+        elapsed = time.perf_counter() - started
+        cursor.close()
+        conn.close()
+    return count, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[500, 1000, 5000])
+    parser.add_argument('--per-row', type=int, default=2000, help="Rows to time through the per-row path")
+    args = parser.parse_args()
+
+    user_id = get_import_user()
+    path = make_temp_path('.csv')
+    try:
+        write_statement(path, args.rows)
+        for batch_size in args.batch_sizes:
+            with open(path, 'rb') as stream:
+                result = import_file(user_id, stream, 'csv', batch_size=batch_size)
+            print(f"executemany, batch {batch_size:>5}: {result.imported:,} rows in {result.seconds:6.2f}s "
+                  f"({result.rows_per_second:10,.0f} rows/s)")
+            reset_user(user_id)
+
+        if args.per_row:
+            count, elapsed = per_row_import(user_id, path, args.per_row)
+            print(f"per-row commit:           {count:,} rows in {elapsed:6.2f}s "
+                  f"({count / elapsed:10,.0f} rows/s)")
+            reset_user(user_id)
+    finally:
+        remove_file(path)
+
+
+if __name__ == '__main__':
+    main()
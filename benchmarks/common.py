@@ -0,0 +1,101 @@
+"""Shared helpers for the benchmark scripts
+
+Run benchmarks from the repo root against a scratch database, e.g.
+    DB_NAME=finance_bench python -m benchmarks.dashboard
+"""
+import random
+import time
+from datetime import date, timedelta
+
+from db import get_db_connection
+from ledger import rebuild_balance, rebuild_category_spend
+
+CATEGORIES = ['Food', 'Transport', 'Shopping', 'Bills', 'Entertainment', 'Health', 'Salary', 'Rent']
+PAYMENT_METHODS = ['Cash', 'Card', 'UPI', 'Bank Transfer']
+DESCRIPTIONS = ['Groceries at market', 'Cab to office', 'Monthly rent', 'Movie night',
+                'Pharmacy', 'Electricity bill', 'Salary credit', 'Online order']
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def time_calls(fn, iterations, warmup=3):
+    """Call fn() repeatedly and return the latencies in milliseconds"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def print_latencies(label, samples):
+    print(f"{label:<40} p50={percentile(samples, 50):8.2f} ms  "
+          f"p95={percentile(samples, 95):8.2f} ms  n={len(samples)}")
+
+
+def random_transaction(user_id, rng, start, span_days):
+    tx_type = 'income' if rng.random() < 0.15 else 'expense'
+    return (
+        user_id,
+        tx_type,
+        'Salary' if tx_type == 'income' else rng.choice(CATEGORIES[:-2]),
+        round(rng.uniform(10, 5000), 2),
+        rng.choice(DESCRIPTIONS),
+        start + timedelta(days=rng.randrange(span_days)),
+        rng.choice(PAYMENT_METHODS)
+    )
+
+
+def seed_transactions(conn, user_id, count, batch_size=5000, years=3, seed=42):
+    rng = random.Random(seed)
+    span_days = 365 * years
+    start = date.today() - timedelta(days=span_days)
+    cursor = conn.cursor()
+    inserted = 0
+    while inserted < count:
+        rows = [random_transaction(user_id, rng, start, span_days)
+                for _ in range(min(batch_size, count - inserted))]
+        cursor.executemany(
+            "INSERT INTO transactions (user_id, type, category, amount, description, date, payment_method, is_deleted) "
+            "VALUES (%s, %s, %s, %s, %s, %s, %s, FALSE)",
+            rows
+        )
+        conn.commit()
+        inserted += len(rows)
+    cursor.close()
+
+
+def get_bench_user(n_transactions):
+    """Return the id of a benchmark user holding exactly n_transactions rows, seeding it if needed"""
+    email = f"bench-{n_transactions}@example.com"
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("SELECT id FROM users WHERE email = %s", (email,))
+    user = cursor.fetchone()
+    if user:
+        user_id = user['id']
+    else:
+        cursor.execute("INSERT INTO users (username, email, password_hash, initial_balance) VALUES (%s, %s, %s, %s)",
+                       (f"Bench {n_transactions}", email, 'x' * 64, 10000))
+        conn.commit()
+        user_id = cursor.lastrowid
+
+    cursor.execute("SELECT COUNT(*) AS count FROM transactions WHERE user_id = %s", (user_id,))
+    existing = cursor.fetchone()['count']
+    if existing != n_transactions:
+        print(f"Seeding {n_transactions} transactions for {email}...")
+        cursor.execute("DELETE FROM transactions WHERE user_id = %s", (user_id,))
+        conn.commit()
+        seed_transactions(conn, user_id, n_transactions)
+        rebuild_balance(cursor, user_id)
+        rebuild_category_spend(cursor, user_id)
+        conn.commit()
+    cursor.close()
+    conn.close()
+    return user_id
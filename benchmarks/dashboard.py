@@ -0,0 +1,56 @@
+"""Latency of /api/dashboard_data queries: aggregation layer vs the old sequential queries
+
+    python -m benchmarks.dashboard [--sizes 100 10000 1000000] [--iterations 50]
+"""
+import argparse
+
+from dashboard import fetch_dashboard_data
+from db import get_db_connection
+from benchmarks.common import get_bench_user, print_latencies, time_calls
+
+
+def legacy_dashboard_queries(conn, user_id):
+    """The eight round trips dashboard_data() used to issue"""
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("SELECT initial_balance FROM users WHERE id = %s", (user_id,))
+    cursor.fetchone()
+    cursor.execute("SELECT SUM(amount) as total FROM transactions WHERE user_id = %s AND type = 'income'", (user_id,))
+    cursor.fetchone()
+    cursor.execute("SELECT SUM(amount) as total FROM transactions WHERE user_id = %s AND type = 'expense'", (user_id,))
+    cursor.fetchone()
+    cursor.execute("SELECT * FROM transactions WHERE user_id = %s AND (is_deleted IS NULL OR is_deleted = FALSE) ORDER BY date DESC LIMIT 5", (user_id,))
+    cursor.fetchall()
+    cursor.execute("SELECT category, SUM(amount) as total FROM transactions WHERE user_id = %s AND type = 'expense' GROUP BY category", (user_id,))
+    cursor.fetchall()
+    cursor.execute("""
+        SELECT DATE_FORMAT(date, '%Y-%m') as month,
+               SUM(CASE WHEN type='income' THEN amount ELSE 0 END) as income,
+               SUM(CASE WHEN type='expense' THEN amount ELSE 0 END) as expense
+        FROM transactions WHERE user_id = %s GROUP BY month ORDER BY month DESC LIMIT 12
+    """, (user_id,))
+    cursor.fetchall()
+    cursor.execute("SELECT * FROM bills WHERE user_id = %s AND is_paid = FALSE ORDER BY due_date ASC", (user_id,))
+    cursor.fetchall()
+    cursor.execute("SELECT * FROM goals WHERE user_id = %s", (user_id,))
+    cursor.fetchall()
+    cursor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 10_000, 1_000_000])
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        user_id = get_bench_user(size)
+        conn = get_db_connection()
+        new = time_calls(lambda: fetch_dashboard_data(conn, user_id), args.iterations)
+        old = time_calls(lambda: legacy_dashboard_queries(conn, user_id), args.iterations)
+        conn.close()
+        print_latencies(f"aggregation layer, {size:>9,} tx", new)
+        print_latencies(f"sequential queries, {size:>9,} tx", old)
+
+
+if __name__ == '__main__':
+    main()
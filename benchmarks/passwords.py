@@ -0,0 +1,70 @@
+"""Password KDF cost: logins/s per core at each cost setting
+
+    python -m benchmarks.passwords [--methods scrypt:16384:8:1 pbkdf2:sha256:600000] [--iterations 20] [--threads 4]
+
+For each method, times verify_and_update() of a matching password on one
+thread (latency and logins/s per core), then on --threads pool workers to
+show how far hashing scales across cores. Needs no database. Pick the highest
+cost whose single-login latency is acceptable. Then size PASSWORD_WORKERS so
+workers x logins/s per core covers the expected peak of logins.
+"""
+import argparse
+import os
+import threading
+import time
+
+from benchmarks.common import percentile, print_latencies, time_calls
+from passwords import PASSWORD_METHOD, PasswordHasher
+
+METHODS = ['pbkdf2:sha256:600000', 'scrypt:16384:8:1', 'scrypt:32768:8:1', 'scrypt:65536:8:1']
+PASSWORD = 'correct horse battery staple'
+
+
+def scrypt_memory_mb(method):
+    """Memory one scrypt hash needs (128 * n * r bytes), or None for other methods"""
+    name, *params = method.split(':')
+    if name != 'scrypt':
+        return None
+    n, r = int(params[0]), int(params[1]) if len(params) > 1 else 8
+    return 128 * n * r / 2 ** 20
+
+
+def threaded_throughput(hasher, stored, threads, iterations):
+    """Logins/s with `threads` callers sharing the hasher's pool"""
+    def worker():
+        for _ in range(iterations):
+            hasher.verify_and_update(stored, PASSWORD)
+
+    callers = [threading.Thread(target=worker) for _ in range(threads)]
+    started = time.perf_counter()
+    for t in callers:
+        t.start()
+    for t in callers:
+        t.join()
+    return threads * iterations / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--methods', nargs='+', default=METHODS)
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--threads', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} cores; current PASSWORD_METHOD={PASSWORD_METHOD}")
+    for method in args.methods:
+        inline = PasswordHasher(method, workers=0)
+        stored = inline.hash(PASSWORD)
+        samples = time_calls(lambda: inline.verify_and_update(stored, PASSWORD), args.iterations, warmup=1)
+        memory = scrypt_memory_mb(method)
+        print_latencies(method, samples)
+        print(f"    {1000 / percentile(samples, 50):7.1f} logins/s per core"
+              + (f", {memory:.0f} MB per hash" if memory else ''))
+
+        pooled = PasswordHasher(method, workers=args.threads, max_pending=args.threads * 2)
+        rate = threaded_throughput(pooled, stored, args.threads, max(1, args.iterations // 2))
+        print(f"    {rate:7.1f} logins/s on {args.threads} workers")
+
+
+if __name__ == '__main__':
+    main()
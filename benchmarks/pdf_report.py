@@ -0,0 +1,73 @@
+"""PDF report generation time: batched renderer vs the old DataFrame/iterrows one
+
+    python -m benchmarks.pdf_report [--sizes 1000 100000] [--iterations 3]
+"""
+import argparse
+import os
+
+import pandas as pd
+from fpdf import FPDF
+
+from benchmarks.common import get_bench_user, print_latencies, time_calls
+from db import get_db_connection
+from report_writers import LOGO_PATH, write_pdf_report
+from reports import make_temp_path, remove_file
+
+
+class LegacyPDF(FPDF):
+    def header(self):
+        if os.path.exists(LOGO_PATH):
+            self.image(LOGO_PATH, 10, 10, 30)
+        self.set_font('Arial', 'B', 20)
+        self.cell(0, 10, 'Finance Report', 0, 1, 'C')
+        self.ln(15)
+
+    def table_row(self, data, widths, fill=False):
+        self.set_font('Arial', '', 9)
+        self.set_fill_color(248, 250, 252)
+        self.set_text_color(51, 65, 85)
+        for i, d in enumerate(data):
+            self.cell(widths[i], 9, str(d), 0, 0, 'L', fill)
+        self.ln()
+
+
+def legacy_pdf_report(user_id, path):
+    """The transactions part of the old download_report('pdf')"""
+    conn = get_db_connection()
+    query = "SELECT date, type, category, amount, description FROM transactions WHERE user_id = %s ORDER BY date DESC"
+    df = pd.read_sql(query, conn, params=(user_id,))
+    conn.close()
+
+    pdf = LegacyPDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+    widths = [25, 30, 75, 20, 40]
+    fill = False
+    for _, row in df.iterrows():
+        desc = str(row['description'] or '')
+        desc = (desc[:35] + '..') if len(desc) > 35 else desc
+        pdf.table_row([str(row['date']), row['category'], desc, row['type'].title(), f"Rs {row['amount']:,.2f}"], widths, fill)
+        fill = not fill
+    pdf.output(path, 'F')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100_000])
+    parser.add_argument('--iterations', type=int, default=3)
+    args = parser.parse_args()
+
+    path = make_temp_path('.pdf')
+    try:
+        for size in args.sizes:
+            user_id = get_bench_user(size)
+            new = time_calls(lambda: write_pdf_report(user_id, path), args.iterations, warmup=1)
+            old = time_calls(lambda: legacy_pdf_report(user_id, path), args.iterations, warmup=1)
+            print_latencies(f"batched renderer, {size:>7,} tx", new)
+            print_latencies(f"iterrows renderer, {size:>7,} tx", old)
+    finally:
+        remove_file(path)
+
+
+if __name__ == '__main__':
+    main()
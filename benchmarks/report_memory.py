@@ -0,0 +1,58 @@
+"""Memory ceiling for the streamed Excel export
+
+    python -m benchmarks.report_memory [--size 1000000] [--max-mb 64]
+
+Builds the workbook for a seeded user and reports the peak Python heap
+(tracemalloc) and the process's peak RSS. Exits 1 if the heap peak is above
+--max-mb, so it can gate a change to reports.py.
+"""
+import argparse
+import os
+import resource
+import sys
+import time
+import tracemalloc
+
+from benchmarks.common import get_bench_user
+from report_writers import write_excel_report
+from reports import make_temp_path, remove_file
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=1_000_000)
+    parser.add_argument('--max-mb', type=float, default=64)
+    args = parser.parse_args()
+
+    user_id = get_bench_user(args.size)
+    path = make_temp_path('.xlsx')
+    rss_before = peak_rss_mb()
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        write_excel_report(user_id, path)
+        elapsed = time.perf_counter() - started
+        _, heap_peak = tracemalloc.get_traced_memory()
+        size_mb = os.path.getsize(path) / 1024 / 1024
+    finally:
+        tracemalloc.stop()
+        remove_file(path)
+
+    heap_peak_mb = heap_peak / 1024 / 1024
+    print(f"{args.size:,} transactions -> {size_mb:.1f} MB workbook in {elapsed:.1f}s")
+    print(f"peak Python heap {heap_peak_mb:.1f} MB, peak RSS {peak_rss_mb():.1f} MB (was {rss_before:.1f} MB)")
+
+    if heap_peak_mb > args.max_mb:
+        print(f"FAIL: heap peak above {args.max_mb} MB")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""Transaction search latency: FULLTEXT index vs a LIKE scan
+
+    python -m benchmarks.search [--size 1000000] [--iterations 50] [--max-ms 50]
+
+Runs a few typical queries for a seeded user through search_transactions()
+and through the equivalent LIKE '%word%' query. Exits 1 if any full-text
+query's p95 is above --max-ms.
+"""
+import argparse
+import sys
+
+from benchmarks.common import get_bench_user, percentile, print_latencies, time_calls
+from db import get_db_connection
+from search import SEARCH_LIMIT, search_terms, search_transactions
+
+QUERIES = [
+    ('groceries', {}),
+    ('cab off', {}),
+    ('electr', {}),
+    ('movie', {'min_amount': '100', 'max_amount': '2000'}),
+    ('rent', {'sort': 'date'}),
+]
+
+
+def like_search(cursor, user_id, query):
+    clauses = ' AND '.join("(description LIKE %s OR category LIKE %s)" for _ in search_terms(query))
+    params = [p for term in search_terms(query) for p in (f"%{term}%", f"%{term}%")]
+    cursor.execute(
+        f"SELECT id, date, type, category, amount, description, payment_method FROM transactions "
+        f"WHERE user_id = %s AND is_deleted = FALSE AND {clauses} ORDER BY date DESC, id DESC LIMIT %s",
+        (user_id, *params, SEARCH_LIMIT)
+    )
+    return cursor.fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=1_000_000)
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--max-ms', type=float, default=50)
+    args = parser.parse_args()
+
+    user_id = get_bench_user(args.size)
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    failed = False
+    for query, filters in QUERIES:
+        fulltext = time_calls(lambda: search_transactions(cursor, user_id, query, **filters), args.iterations)
+        like = time_calls(lambda: like_search(cursor, user_id, query), max(3, args.iterations // 10), warmup=1)
+        print_latencies(f"fulltext {query!r} {filters or ''}", fulltext)
+        print_latencies(f"LIKE     {query!r}", like)
+        if percentile(fulltext, 95) > args.max_ms:
+            failed = True
+    cursor.close()
+    conn.close()
+
+    if failed:
+        print(f"FAIL: a full-text query's p95 is above {args.max_ms} ms")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == '__main__':
+    main()
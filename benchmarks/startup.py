@@ -0,0 +1,104 @@
+"""Worker startup: a cold import of the app vs a fork of a preloaded master
+
+    python -m benchmarks.startup [--runs 5] [--with-db]
+
+Cold: a fresh interpreter imports app (which calls create_app()) and serves
+its first request. That is what every worker pays without --preload. Preloaded:
+this process imports the app once, then forks a child per run that serves its
+first request. That is what gunicorn's --preload does. For each, prints the
+time to the first response and the worker's RSS, split into memory shared
+with other processes and memory private to the worker (Linux smaps_rollup).
+The schema check is skipped unless --with-db is given.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.common import percentile
+
+FIRST_URL = '/login'
+
+COLD_SNIPPET = """
+import json, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+response = app.app.test_client().get({url!r})
+done = time.perf_counter()
+from benchmarks.startup import memory_mb
+print(json.dumps(dict(memory_mb(), import_ms=(imported - started) * 1000, request_ms=(done - imported) * 1000,
+                      total_ms=(done - started) * 1000, status=response.status_code)))
+"""
+
+
+def memory_mb():
+    """{'rss': ..., 'shared': ..., 'private': ...} in MB for this process"""
+    values = {}
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                key, _, rest = line.partition(':')
+                if rest.strip().endswith('kB'):
+                    values[key] = int(rest.split()[0]) / 1024
+    except OSError:
+        return {'rss': 0.0, 'shared': 0.0, 'private': 0.0}
+    return {
+        'rss': values.get('Rss', 0.0),
+        'shared': values.get('Shared_Clean', 0.0) + values.get('Shared_Dirty', 0.0),
+        'private': values.get('Private_Clean', 0.0) + values.get('Private_Dirty', 0.0)
+    }
+
+
+def cold_start(env):
+    output = subprocess.run([sys.executable, '-c', COLD_SNIPPET.format(url=FIRST_URL)],
+                            capture_output=True, text=True, check=True, env=env).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def forked_start(application):
+    """First request in a child forked from this (preloaded) process"""
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        started = time.perf_counter()
+        response = application.test_client().get(FIRST_URL)
+        result = dict(memory_mb(), total_ms=(time.perf_counter() - started) * 1000, status=response.status_code)
+        os.write(write_fd, json.dumps(result).encode())
+        os._exit(0)
+    os.close(write_fd)
+    with os.fdopen(read_fd) as f:
+        result = json.loads(f.read())
+    os.waitpid(pid, 0)
+    return result
+
+
+def summarize(label, results):
+    totals = [r['total_ms'] for r in results]
+    last = results[-1]
+    print(f"{label:<12} first response p50={percentile(totals, 50):8.1f} ms  max={max(totals):8.1f} ms  "
+          f"rss={last['rss']:6.1f} MB  shared={last['shared']:6.1f} MB  private={last['private']:6.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--with-db', action='store_true', help="include the startup schema check")
+    args = parser.parse_args()
+    if not args.with_db:
+        os.environ['VERIFY_SCHEMA'] = '0'
+
+    cold = [cold_start(dict(os.environ)) for _ in range(args.runs)]
+    summarize('cold', cold)
+    print(f"{'':<12} of which import p50={percentile([r['import_ms'] for r in cold], 50):.1f} ms")
+
+    import app  # Preload, as gunicorn's master does
+    forked = [forked_start(app.app) for _ in range(args.runs)]
+    summarize('preloaded', forked)
+
+
+if __name__ == '__main__':
+    main()
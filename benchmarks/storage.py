@@ -0,0 +1,98 @@
+"""Repository latency on MySQL vs the embedded SQLite backend
+
+    python -m benchmarks.storage [--backends mysql sqlite] [--size 100000] [--iterations 200] \\
+        [--sqlite-path bench.sqlite3]
+
+Both backends get the same seeded history (benchmarks.common's generator).
+MySQL uses the usual benchmark user; SQLite is seeded into --sqlite-path on
+first run. Times the reads behind the transactions, budget and goals pages
+through the repositories, plus adding a transaction with its commit (on a
+throwaway user that is deleted afterwards).
+"""
+import argparse
+import os
+import random
+from datetime import date, timedelta
+
+from benchmarks.common import get_bench_user, print_latencies, random_transaction, time_calls
+from storage import open_storage
+
+SQLITE_BENCH_EMAIL = "bench-{size}@example.com"
+
+
+def sqlite_bench_user(storage, size, batch_size=5000, years=3, seed=42):
+    """Id of the SQLite benchmark user with `size` transactions, seeding it like get_bench_user() does"""
+    user = storage.users.get_by_email(SQLITE_BENCH_EMAIL.format(size=size))
+    if user is not None:
+        return user['id']
+    user_id = storage.users.create(f"bench{size}", SQLITE_BENCH_EMAIL.format(size=size), 'x', 1000)
+    rng = random.Random(seed)
+    span_days = 365 * years
+    start = date.today() - timedelta(days=span_days)
+    inserted = 0
+    while inserted < size:
+        rows = [random_transaction(user_id, rng, start, span_days) for _ in range(min(batch_size, size - inserted))]
+        storage.conn.executemany(
+            "INSERT INTO transactions (user_id, type, category, amount, description, date, payment_method) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows
+        )
+        inserted += len(rows)
+    storage.commit()
+    return user_id
+
+
+def bench_backend(backend, size, iterations, sqlite_path):
+    storage = open_storage(backend, path=sqlite_path)
+    try:
+        if backend == 'sqlite':
+            user_id = sqlite_bench_user(storage, size)
+        else:
+            user_id = get_bench_user(size)
+        month = date.today().strftime('%Y-%m')
+        for category in ('Food', 'Transport', 'Shopping'):
+            storage.budgets.add(user_id, category, 5000, month)
+        storage.commit()
+
+        label = f"{backend}, {size:,} tx"
+        reads = [
+            ("transactions page (month, 50)", lambda: storage.transactions.list(user_id, month=month, limit=50)),
+            ("month spend", lambda: storage.transactions.month_spend(user_id, month)),
+            ("budgets with spend", lambda: storage.budgets.list_with_spend(user_id, month)),
+            ("balance", lambda: storage.transactions.balance(user_id)),
+            ("goals", lambda: storage.goals.list(user_id)),
+            ("notifications (latest 20)", lambda: storage.notifications.latest(user_id, 20))
+        ]
+        for name, fn in reads:
+            print_latencies(f"{label}: {name}", time_calls(fn, iterations))
+
+        writer = storage.users.create('bench-writer', f"bench-writer-{os.getpid()}@example.com", 'x')
+        storage.commit()
+
+        def add_transaction():
+            storage.transactions.add(writer, 'expense', 'Food', 12.5, date.today(), 'Bench', 'Card')
+            storage.commit()
+
+        try:
+            print_latencies(f"{label}: add transaction + commit", time_calls(add_transaction, iterations))
+        finally:
+            storage.users.delete(writer)
+            storage.commit()
+    finally:
+        storage.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backends', nargs='+', choices=['mysql', 'sqlite'], default=['mysql', 'sqlite'])
+    parser.add_argument('--size', type=int, default=100_000)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--sqlite-path', default='bench.sqlite3')
+    args = parser.parse_args()
+
+    for backend in args.backends:
+        bench_backend(backend, args.size, args.iterations, args.sqlite_path)
+
+
+if __name__ == '__main__':
+    main()
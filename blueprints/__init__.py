@@ -0,0 +1,13 @@
+"""Route blueprints, one per subsystem, registered by app.create_app()
+
+URLs are unchanged from the single-module app; endpoint names gain the
+blueprint prefix, e.g. url_for('auth.login') or url_for('bills.add_bill').
+"""
+from blueprints import api, auth, bills, budgets, goals, main, reports, transactions
+
+BLUEPRINTS = (main.bp, auth.bp, transactions.bp, budgets.bp, goals.bp, bills.bp, reports.bp, api.bp)
+
+
+def register_blueprints(app):
+    for bp in BLUEPRINTS:
+        app.register_blueprint(bp)
@@ -0,0 +1,148 @@
+"""JSON endpoints under /api used by the pages' scripts"""
+from datetime import datetime
+
+from flask import Blueprint, Response, jsonify, request, session
+
+from blueprints.reports import report_job_payload
+from dashboard import get_dashboard_payload
+from db import get_read_connection
+from notifications import get_notification_summary, notifications_payload, payload_etag, stream_notifications
+from pagination import PaginationError, fetch_transactions_page, parse_columns, parse_page_size, serialize_row
+from report_jobs import report_jobs
+from search import SEARCH_LIMIT, SearchError, search_transactions
+
+bp = Blueprint('api', __name__)
+
+
+@bp.route('/api/transactions')
+def api_transactions():
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    args = request.args
+    conn = get_read_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        rows, next_cursor = fetch_transactions_page(
+            cursor, session['user_id'],
+            month=args.get('month') or None,
+            tx_type=args.get('type') or None,
+            category=args.get('category') or None,
+            payment_method=args.get('payment_method') or None,
+            columns=parse_columns(args.get('fields')),
+            after=args.get('cursor') or None,
+            limit=parse_page_size(args.get('limit'))
+        )
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
+    finally:
+        cursor.close()
+        conn.close()
+
+    return jsonify({
+        'transactions': [serialize_row(r) for r in rows],
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None
+    })
+
+@bp.route('/api/transactions/search')
+def api_search_transactions():
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    args = request.args
+    conn = get_read_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        rows = search_transactions(
+            cursor, session['user_id'], args.get('q', ''),
+            min_amount=args.get('min_amount'),
+            max_amount=args.get('max_amount'),
+            start=args.get('start'),
+            end=args.get('end'),
+            tx_type=args.get('type') or None,
+            sort=args.get('sort', 'relevance'),
+            limit=args.get('limit', SEARCH_LIMIT, type=int)
+        )
+    except SearchError as e:
+        return jsonify({'error': str(e)}), 400
+    finally:
+        cursor.close()
+        conn.close()
+
+    results = []
+    for row in rows:
+        row = serialize_row(row)
+        row['score'] = round(float(row['score']), 4)
+        results.append(row)
+    return jsonify({'query': args.get('q', ''), 'transactions': results})
+
+@bp.route('/api/set_theme', methods=['POST'])
+def set_theme():
+    """Set user's theme preference"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    data = request.get_json()
+    theme = data.get('theme', 'dark')
+    session['theme'] = theme
+    return jsonify({'status': 'ok', 'theme': theme})
+
+@bp.route('/api/ping_session', methods=['POST'])
+def ping_session():
+    """Keep session alive when user is active"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    # Update last activity timestamp in session
+    session['last_activity'] = datetime.now().isoformat()
+    return jsonify({'status': 'ok'})
+
+@bp.route('/api/notifications')
+def get_notifications():
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    payload = notifications_payload(*get_notification_summary(session['user_id']))
+    
+    # Pollers send If-None-Match and get a 304 when nothing changed
+    response = jsonify(payload)
+    response.set_etag(payload_etag(payload))
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
+
+@bp.route('/api/notifications/stream')
+def notification_stream():
+    """Push the notification summary whenever it changes (Server-Sent Events)"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    stream = stream_notifications(session['user_id'], request.headers.get('Last-Event-ID'))
+    return Response(stream, mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@bp.route('/api/reports/<job_id>')
+def report_job_status(job_id):
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    job = report_jobs.get(session['user_id'], job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown report job'}), 404
+    return jsonify(report_job_payload(job))
+
+@bp.route('/api/dashboard_data')
+def dashboard_data():
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    conn = get_read_connection()
+    payload = get_dashboard_payload(conn, session['user_id'])
+    conn.close()
+    
+    # Browsers revalidate with If-None-Match / If-Modified-Since and get a 304 until data changes
+    response = jsonify(payload.data)
+    response.set_etag(payload.etag)
+    response.last_modified = payload.last_modified
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
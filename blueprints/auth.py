@@ -0,0 +1,409 @@
+"""Sign-in, registration, password reset and the account (profile) pages"""
+import logging
+import os
+from datetime import datetime
+
+from flask import Blueprint, current_app, flash, redirect, render_template, request, session, url_for
+
+from passwords import PasswordBusy, check_password, hash_password, verify_password
+from storage import get_storage
+from storage.base import DuplicateError, StorageError
+
+log = logging.getLogger(__name__)
+
+bp = Blueprint('auth', __name__)
+
+# Store password reset tokens (in production, use database or Redis)
+password_reset_tokens = {}
+
+
+@bp.app_errorhandler(PasswordBusy)
+def password_busy(e):
+    log.warning("%s on %s", e, request.path)
+    flash('The server is busy. Please try again in a moment.', 'error')
+    return redirect(request.referrer or url_for('auth.login'))
+
+@bp.route('/login', methods=['GET', 'POST'])
+def login():
+    if request.method == 'POST':
+        email = request.form['email']
+        password = request.form['password']
+        
+        user = get_user_by_email(email)
+        ok, new_hash = verify_password(user['password_hash'] if user else None, password)
+        
+        if ok:
+            if new_hash:
+                # Upgrade a legacy SHA-256 or older-cost hash now that we have the password
+                set_password_hash(user['id'], new_hash)
+            session['user_id'] = user['id']
+            session['username'] = user['username']
+            session['profile_pic'] = user.get('profile_pic', 'default.png')
+            return redirect(url_for('main.dashboard'))
+        else:
+            flash('Invalid email or password', 'error')
+            
+    return render_template('login.html')
+
+@bp.route('/forgot_password', methods=['GET', 'POST'])
+def forgot_password():
+    if request.method == 'POST':
+        email = request.form['email']
+        user = get_user_by_email(email)
+        
+        if user:
+            # Generate a reset token
+            import secrets
+            token = secrets.token_urlsafe(32)
+            password_reset_tokens[token] = {
+                'email': email,
+                'expires': datetime.now().timestamp() + 3600  # 1 hour expiry
+            }
+            
+            # In production, send email here
+            # For now, we'll show the reset link (remove in production!)
+            reset_link = url_for('auth.reset_password', token=token, _external=True)
+            
+            # Try to send email (if configured)
+            try:
+                send_reset_email(email, reset_link, user['username'])
+                flash('Password reset link has been sent to your email!', 'success')
+            except Exception as e:
+                # If email fails, show the link directly (for development)
+                flash(f'Reset link (dev mode): {reset_link}', 'info')
+        else:
+            # Don't reveal if email exists or not for security
+            flash('If an account with that email exists, a reset link has been sent.', 'info')
+        
+        return redirect(url_for('auth.forgot_password'))
+    
+    return render_template('forgot_password.html')
+
+@bp.route('/reset_password/<token>', methods=['GET', 'POST'])
+def reset_password(token):
+    # Check if token exists and is valid
+    if token not in password_reset_tokens:
+        flash('Invalid or expired reset link.', 'error')
+        return redirect(url_for('auth.forgot_password'))
+    
+    token_data = password_reset_tokens[token]
+    
+    # Check if token has expired
+    if datetime.now().timestamp() > token_data['expires']:
+        del password_reset_tokens[token]
+        flash('Reset link has expired. Please request a new one.', 'error')
+        return redirect(url_for('auth.forgot_password'))
+    
+    if request.method == 'POST':
+        new_password = request.form['new_password']
+        confirm_password = request.form['confirm_password']
+        
+        if new_password != confirm_password:
+            flash('Passwords do not match.', 'error')
+            return redirect(url_for('auth.reset_password', token=token))
+        
+        if len(new_password) < 6:
+            flash('Password must be at least 6 characters.', 'error')
+            return redirect(url_for('auth.reset_password', token=token))
+        
+        # Update password
+        email = token_data['email']
+        hash_pwd = hash_password(new_password)
+        
+        storage = get_storage()
+        user = storage.users.get_by_email(email)
+        if user:
+            storage.users.set_password_hash(user['id'], hash_pwd)
+            storage.commit()
+        storage.close()
+        
+        # Remove used token
+        del password_reset_tokens[token]
+        
+        flash('Password reset successful! Please login with your new password.', 'success')
+        return redirect(url_for('auth.login'))
+    
+    return render_template('reset_password.html', token=token)
+
+def send_reset_email(email, reset_link, username):
+    """Send password reset email using SMTP"""
+    import smtplib
+    from email.mime.text import MIMEText
+    from email.mime.multipart import MIMEMultipart
+    
+    # Email configuration (you can move these to environment variables)
+    SMTP_SERVER = os.environ.get('SMTP_SERVER', 'smtp.gmail.com')
+    SMTP_PORT = int(os.environ.get('SMTP_PORT', 587))
+    SMTP_USERNAME = os.environ.get('SMTP_USERNAME', '')
+    SMTP_PASSWORD = os.environ.get('SMTP_PASSWORD', '')
+    
+    if not SMTP_USERNAME or not SMTP_PASSWORD:
+        raise Exception("Email not configured")
+    
+    msg = MIMEMultipart('alternative')
+    msg['Subject'] = 'Finance Guru - Password Reset'
+    msg['From'] = SMTP_USERNAME
+    msg['To'] = email
+    
+    html = f"""
+    <html>
+    <body style="font-family: Arial, sans-serif; background-color: #0F172A; color: #F8FAFC; padding: 20px;">
+        <div style="max-width: 500px; margin: 0 auto; background: rgba(255,255,255,0.05); border-radius: 16px; padding: 30px;">
+            <h2 style="color: #7269E3;">Finance Guru</h2>
+            <p>Hi {username},</p>
+            <p>You requested to reset your password. Click the button below to create a new password:</p>
+            <p style="text-align: center; margin: 30px 0;">
+                <a href="{reset_link}" style="background: linear-gradient(135deg, #7269E3, #5b50d6); color: white; padding: 12px 30px; border-radius: 8px; text-decoration: none; font-weight: bold;">Reset Password</a>
+            </p>
+            <p style="color: #94A3B8; font-size: 14px;">This link will expire in 1 hour.</p>
+            <p style="color: #94A3B8; font-size: 14px;">If you didn't request this, please ignore this email.</p>
+        </div>
+    </body>
+    </html>
+    """
+    
+    msg.attach(MIMEText(html, 'html'))
+    
+    with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
+        server.starttls()
+        server.login(SMTP_USERNAME, SMTP_PASSWORD)
+        server.sendmail(SMTP_USERNAME, email, msg.as_string())
+
+@bp.route('/register', methods=['GET', 'POST'])
+def register():
+    if request.method == 'POST':
+        username = request.form['username']
+        email = request.form['email']
+        password = request.form['password']
+        confirm_password = request.form['confirm_password']
+        initial_balance = request.form.get('initial_balance', 0)
+        
+        # Convert initial balance to float
+        try:
+            initial_balance = float(initial_balance) if initial_balance else 0
+        except ValueError:
+            initial_balance = 0
+        
+        if password != confirm_password:
+            flash('Passwords do not match', 'error')
+        else:
+            if create_user(username, email, password, initial_balance):
+                flash('Registration successful! Please login.', 'success')
+                return redirect(url_for('auth.login'))
+            else:
+                flash('Email already registered', 'error')
+                
+    return render_template('register.html')
+
+@bp.route('/logout')
+def logout():
+    session.clear()
+    return redirect(url_for('auth.login'))
+
+@bp.route('/profile', methods=['GET', 'POST'])
+def profile():
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+        
+    user_id = session['user_id']
+    storage = get_storage()
+    
+    if request.method == 'POST':
+        username = request.form['username']
+        email = request.form['email']
+        phone = request.form.get('phone', '')
+        job_title = request.form.get('job_title', '')
+        bio = request.form.get('bio', '')
+        file = request.files.get('profile_pic')
+        
+        try:
+            unique_filename = old_pic = None
+            # Handle File Upload
+            if file and file.filename != '':
+                from werkzeug.utils import secure_filename
+                filename = secure_filename(file.filename)
+                unique_filename = f"{user_id}_{int(datetime.now().timestamp())}_{filename}"
+                # Save new file
+                file.save(os.path.join(current_app.config['UPLOAD_FOLDER'], unique_filename))
+                # Update DB with new picture, keeping the old one to delete once committed
+                old_pic = storage.users.set_profile_pic(user_id, unique_filename)
+            
+            # Update Details
+            storage.users.update_profile(user_id, username, email, phone, job_title, bio)
+            storage.commit()
+            
+            if unique_filename:
+                session['profile_pic'] = unique_filename
+            # Delete old picture file if it's a custom upload (not default) and different from new
+            if old_pic and old_pic != 'default.png' and old_pic != unique_filename:
+                old_path = os.path.join(current_app.config['UPLOAD_FOLDER'], old_pic)
+                try:
+                    if os.path.isfile(old_path):
+                        os.remove(old_path)
+                except Exception as e:
+                    log.warning("Failed to delete old profile picture %s: %s", old_path, e)
+            
+            session['username'] = username
+            flash('Profile updated successfully!', 'success')
+            
+        except DuplicateError:
+            storage.rollback()
+            flash('Error updating profile: that email is already registered', 'error')
+        except StorageError as err:
+            storage.rollback()
+            flash(f'Error updating profile: {err}', 'error')
+        finally:
+            storage.close()
+        
+        return redirect(url_for('auth.profile'))
+    
+    user = storage.users.get(user_id)
+    storage.close()
+    
+    return render_template('profile.html', user=user)
+
+@bp.route('/change_password', methods=['POST'])
+def change_password():
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+    
+    user_id = session['user_id']
+    current_password = request.form.get('current_password', '')
+    new_password = request.form.get('new_password', '')
+    confirm_password = request.form.get('confirm_password', '')
+    
+    # Validate inputs
+    if not current_password or not new_password or not confirm_password:
+        flash('All password fields are required', 'error')
+        return redirect(url_for('auth.profile'))
+    
+    if new_password != confirm_password:
+        flash('New passwords do not match', 'error')
+        return redirect(url_for('auth.profile'))
+    
+    if len(new_password) < 6:
+        flash('Password must be at least 6 characters', 'error')
+        return redirect(url_for('auth.profile'))
+    
+    storage = get_storage()
+    
+    # Verify current password
+    user = storage.users.get(user_id)
+    
+    if not user:
+        storage.close()
+        flash('User not found', 'error')
+        return redirect(url_for('auth.profile'))
+    
+    if not check_password(user['password_hash'], current_password):
+        storage.close()
+        flash('Current password is incorrect', 'error')
+        return redirect(url_for('auth.profile'))
+    
+    # Update password
+    new_hash = hash_password(new_password)
+    storage.users.set_password_hash(user_id, new_hash)
+    storage.commit()
+    storage.close()
+    
+    flash('Password changed successfully!', 'success')
+    return redirect(url_for('auth.profile'))
+
+@bp.route('/update_profile', methods=['POST'])
+def update_profile():
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+    
+    new_password = request.form['new_password']
+    if new_password:
+        hash_pwd = hash_password(new_password)
+        user_id = session['user_id']
+        set_password_hash(user_id, hash_pwd)
+        flash('Password updated successfully', 'success')
+        
+    return redirect(url_for('auth.profile'))
+
+@bp.route('/delete_account', methods=['POST'])
+def delete_account():
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+    
+    user_id = session['user_id']
+    storage = get_storage()
+    
+    try:
+        # Fetch current profile picture filename before deleting user record
+        user = storage.users.get(user_id)
+        profile_pic = user['profile_pic'] if user else None
+        
+        # Transactions, budgets, bills, goals, notifications and ledger rows go with it (ON DELETE CASCADE)
+        storage.users.delete(user_id)
+        storage.commit()
+        
+        # Remove profile picture file if it's a custom upload (not the default placeholder)
+        if profile_pic and profile_pic != 'default.png':
+            pic_path = os.path.join(current_app.config['UPLOAD_FOLDER'], profile_pic)
+            try:
+                if os.path.isfile(pic_path):
+                    os.remove(pic_path)
+            except Exception as e:
+                # Log the error silently; the deletion of the account is more important
+                log.warning("Failed to delete profile picture %s: %s", pic_path, e)
+        
+        session.clear()
+        flash('Your account has been successfully deleted.', 'success')
+        return redirect(url_for('auth.register'))
+    except StorageError as err:
+        storage.rollback()
+        flash(f'Error deleting account: {err}', 'error')
+        return redirect(url_for('auth.profile'))
+    finally:
+        storage.close()
+
+def get_user_by_email(email):
+    try:
+        storage = get_storage()
+    except ConnectionError:
+        log.error("Could not connect to database in get_user_by_email")
+        return None
+    user = storage.users.get_by_email(email)
+    storage.close()
+    return user
+
+def create_user(username, email, password, initial_balance=0):
+    hash_pwd = hash_password(password)
+    try:
+        storage = get_storage()
+    except ConnectionError:
+        log.error("Could not connect to database in create_user")
+        return False
+    try:
+        user_id = storage.users.create(username, email, hash_pwd, initial_balance)
+        
+        # Welcome notification, committed with the new user
+        welcome_msg = f"🎉 Welcome to Finance Guru, {username}! Start tracking your finances today."
+        storage.notifications.add(user_id, welcome_msg, 'success')
+        
+        # Add initial balance notification
+        if initial_balance > 0:
+            balance_msg = f"💰 Your starting balance of ₹{initial_balance:,.2f} has been set."
+            storage.notifications.add(user_id, balance_msg, 'info')
+        
+        storage.commit()
+        
+        return True
+    except DuplicateError:
+        storage.rollback()
+        return False
+    except StorageError as err:
+        storage.rollback()
+        log.error("Database error in create_user: %s", err)
+        return False
+    finally:
+        storage.close()
+
+def set_password_hash(user_id, password_hash):
+    storage = get_storage()
+    storage.users.set_password_hash(user_id, password_hash)
+    storage.commit()
+    storage.close()
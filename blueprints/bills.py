@@ -0,0 +1,155 @@
+"""Bills page and bill payments"""
+from datetime import date
+
+from flask import Blueprint, flash, redirect, render_template, request, session, url_for
+
+from alerts import enqueue as enqueue_alert
+from storage import get_storage
+
+bp = Blueprint('bills', __name__)
+
+
+@bp.route('/bills')
+def bills():
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+    
+    user_id = session['user_id']
+    today = date.today()
+    
+    storage = get_storage(read_only=True)
+    
+    # Bill reminders are checked in the background
+    enqueue_alert('bill_reminders', user_id)
+    
+    # Get all bills for the user
+    all_bills = storage.bills.list(user_id)
+    
+    # Process bills to add status info
+    pending_bills = []
+    overdue_count = 0
+    due_soon_count = 0
+    total_pending = 0
+    
+    for bill in all_bills:
+        days_until = (bill['due_date'] - today).days
+        bill['days_until'] = days_until
+        bill['is_overdue'] = not bill['is_paid'] and days_until < 0
+        bill['is_due_soon'] = not bill['is_paid'] and 0 <= days_until <= 3
+        bill['amount'] = float(bill['amount'])
+        
+        if not bill['is_paid']:
+            pending_bills.append(bill)
+            total_pending += bill['amount']
+            if bill['is_overdue']:
+                overdue_count += 1
+            elif bill['is_due_soon']:
+                due_soon_count += 1
+    
+    storage.close()
+    
+    return render_template('bills.html', 
+                           bills=all_bills, 
+                           pending_bills=pending_bills,
+                           overdue_count=overdue_count,
+                           due_soon_count=due_soon_count,
+                           total_pending=total_pending,
+                           today=today)
+
+@bp.route('/add_bill', methods=['POST'])
+def add_bill():
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+    
+    user_id = session['user_id']
+    name = request.form['name']
+    amount = float(request.form['amount'])
+    due_date = request.form['due_date']
+    category = request.form['category']
+    is_recurring = 'is_recurring' in request.form
+    recurrence = request.form.get('recurrence', 'monthly')
+    
+    storage = get_storage()
+    storage.bills.add(user_id, name, amount, due_date, category, is_recurring, recurrence)
+    storage.commit()
+    
+    # Create notification for new bill
+    storage.notifications.add(user_id, f"📝 Bill added: {name} (₹{amount:.0f}) due on {due_date}", 'info')
+    storage.commit()
+    
+    storage.close()
+    
+    flash('Bill added successfully!', 'success')
+    return redirect(url_for('bills.bills'))
+
+@bp.route('/mark_bill_paid/<int:id>', methods=['POST'])
+def mark_bill_paid(id):
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+    
+    user_id = session['user_id']
+    today = date.today()
+    
+    storage = get_storage()
+    
+    # Get bill details
+    bill = storage.bills.get(user_id, id)
+    
+    if bill:
+        # Mark as paid
+        storage.bills.mark_paid(user_id, id, today)
+        storage.commit()
+        
+        # If recurring, create next bill
+        if bill['is_recurring']:
+            from dateutil.relativedelta import relativedelta
+            
+            next_due = bill['due_date']
+            if bill['recurrence'] == 'weekly':
+                next_due += relativedelta(weeks=1)
+            elif bill['recurrence'] == 'monthly':
+                next_due += relativedelta(months=1)
+            elif bill['recurrence'] == 'yearly':
+                next_due += relativedelta(years=1)
+            
+            storage.bills.add(user_id, bill['name'], bill['amount'], next_due, bill['category'], True,
+                              bill['recurrence'])
+            storage.commit()
+            
+            flash(f'Bill paid! Next {bill["recurrence"]} bill created for {next_due}', 'success')
+        else:
+            flash('Bill marked as paid!', 'success')
+        
+        # Create notification
+        storage.notifications.add(user_id, f"✅ Bill paid: {bill['name']} (₹{float(bill['amount']):.0f})", 'success')
+        storage.commit()
+    
+    storage.close()
+    
+    return redirect(url_for('bills.bills'))
+
+@bp.route('/mark_bill_unpaid/<int:id>', methods=['POST'])
+def mark_bill_unpaid(id):
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+    
+    storage = get_storage()
+    storage.bills.mark_unpaid(session['user_id'], id)
+    storage.commit()
+    storage.close()
+    
+    flash('Bill marked as unpaid', 'info')
+    return redirect(url_for('bills.bills'))
+
+@bp.route('/delete_bill/<int:id>', methods=['POST'])
+def delete_bill(id):
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+    
+    storage = get_storage()
+    storage.bills.delete(session['user_id'], id)
+    storage.commit()
+    storage.close()
+    
+    flash('Bill deleted', 'success')
+    return redirect(url_for('bills.bills'))
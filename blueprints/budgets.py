@@ -0,0 +1,88 @@
+"""Monthly budgets page"""
+from datetime import datetime
+
+from flask import Blueprint, flash, redirect, render_template, request, session, url_for
+
+from storage import get_storage
+
+bp = Blueprint('budgets', __name__)
+
+
+@bp.route('/budget')
+def budget():
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+    
+    current_month = datetime.now().strftime('%Y-%m')
+    user_id = session['user_id']
+    storage = get_storage()
+    
+    # Delete budgets from previous months to reset them
+    if storage.budgets.delete_before(user_id, current_month):
+        storage.commit()
+    
+    # Fetch budgets for the current month only, with their spend
+    budgets = storage.budgets.list_with_spend(user_id, current_month)
+    
+    for b in budgets:
+        b['limit_amount'] = float(b['limit_amount'])  # Convert Decimal to float
+        b['spent'] = float(b['spent'])
+        b['remaining'] = b['limit_amount'] - b['spent']
+        b['percent'] = (b['spent'] / b['limit_amount'] * 100) if b['limit_amount'] > 0 else 0
+    
+    storage.close()
+    
+    return render_template('budget.html', budgets=budgets, current_month=current_month)
+
+@bp.route('/add_budget', methods=['POST'])
+def add_budget():
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+    
+    user_id = session['user_id']
+    category = request.form['category']
+    limit = request.form['limit_amount']
+    month = request.form['month']
+    
+    storage = get_storage()
+    if storage.budgets.add(user_id, category, limit, month) is None:
+        flash('Budget for this category already exists!', 'error')
+    else:
+        storage.commit()
+        
+        # Create notification for new budget
+        msg = f"💰 Budget set: ₹{float(limit):.0f} for {category} in {month}"
+        try:
+            storage.notifications.add(user_id, msg, 'info')
+            storage.commit()
+        except:
+            pass
+        
+        flash('Budget set successfully', 'success')
+    storage.close()
+    return redirect(url_for('budgets.budget'))
+
+@bp.route('/update_budget', methods=['POST'])
+def update_budget():
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+    
+    budget_id = request.form['budget_id']
+    limit = request.form['limit_amount']
+    
+    storage = get_storage()
+    storage.budgets.update_limit(session['user_id'], budget_id, limit)
+    storage.commit()
+    storage.close()
+    flash('Budget updated successfully', 'success')
+    return redirect(url_for('budgets.budget'))
+
+@bp.route('/delete_budget/<int:id>', methods=['POST'])
+def delete_budget(id):
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+    storage = get_storage()
+    storage.budgets.delete(session['user_id'], id)
+    storage.commit()
+    storage.close()
+    return redirect(url_for('budgets.budget'))
@@ -0,0 +1,6 @@
+"""Helpers shared by the blueprints"""
+from flask import request
+
+
+def wants_json():
+    return request.accept_mimetypes.best == 'application/json'
@@ -0,0 +1,102 @@
+"""Savings goals page"""
+from datetime import date
+
+from flask import Blueprint, flash, redirect, render_template, request, session, url_for
+
+from storage import get_storage
+
+bp = Blueprint('goals', __name__)
+
+
+@bp.route('/goals')
+def goals():
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+    user_id = session['user_id']
+    storage = get_storage(read_only=True)
+    goals = storage.goals.list(user_id)
+    total_target = sum(g['target_amount'] for g in goals)
+    total_saved = sum(g['current_amount'] for g in goals)
+    storage.close()
+    return render_template('goals.html', goals=goals, total_target=total_target, total_saved=total_saved)
+
+@bp.route('/add_goal', methods=['POST'])
+def add_goal():
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+    user_id = session['user_id']
+    name = request.form['name']
+    target = request.form['target_amount']
+    current = request.form.get('current_amount', 0)
+    deadline = request.form['deadline'] or None
+    
+    storage = get_storage()
+    storage.goals.add(user_id, name, target, current, deadline)
+    storage.commit()
+    
+    # Create notification for new goal
+    deadline_str = f" by {deadline}" if deadline else ""
+    msg = f"🎯 New goal created: '{name}' - Target ₹{float(target):.0f}{deadline_str}"
+    try:
+        storage.notifications.add(user_id, msg, 'info')
+        storage.commit()
+    except:
+        pass
+
+    # If initial amount > 0, record as transaction
+    if float(current) > 0:
+        storage.transactions.add(user_id, 'expense', 'Financial Goal', float(current), date.today(),
+                                 f"Initial deposit for goal: {name}", 'Savings')
+        storage.commit()
+    
+    storage.close()
+    flash('Goal added successfully', 'success')
+    return redirect(url_for('goals.goals'))
+
+@bp.route('/update_goal', methods=['POST'])
+def update_goal():
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+    goal_id = request.form['goal_id']
+    amount = float(request.form['amount'])
+    user_id = session['user_id']
+    
+    storage = get_storage()
+    
+    # Get current goal state
+    goal = storage.goals.get(user_id, goal_id)
+    
+    if goal:
+        new_amount = float(goal['current_amount']) + amount
+        target = float(goal['target_amount'])
+        
+        storage.goals.set_amount(user_id, goal_id, new_amount)
+        storage.commit()
+        
+        # Record transaction
+        tx_type = 'expense' if amount > 0 else 'income'
+        tx_desc = f"Added to goal: {goal['name']}" if amount > 0 else f"Withdrawn from goal: {goal['name']}"
+        storage.transactions.add(user_id, tx_type, 'Financial Goal', abs(amount), date.today(), tx_desc, 'Savings')
+        storage.commit()
+        
+        # Check if goal is now complete
+        if new_amount >= target and float(goal['current_amount']) < target:
+            msg = f"🎉 Congratulations! You've reached your goal '{goal['name']}'! Target: ₹{target:.0f}"
+            storage.notifications.add(user_id, msg, 'success')
+            storage.commit()
+            flash(f'Goal completed! 🎉', 'success')
+        else:
+            flash('Goal updated', 'success')
+    
+    storage.close()
+    return redirect(url_for('goals.goals'))
+
+@bp.route('/delete_goal/<int:id>', methods=['POST'])
+def delete_goal(id):
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+    storage = get_storage()
+    storage.goals.delete(session['user_id'], id)
+    storage.commit()
+    storage.close()
+    return redirect(url_for('goals.goals'))
@@ -0,0 +1,125 @@
+"""Home, dashboard page, notification actions and /health"""
+import logging
+from datetime import date
+
+from flask import Blueprint, jsonify, redirect, render_template, session, url_for
+
+from alerts import alert_stats, enqueue as enqueue_alert
+from dashboard import cache_stats as dashboard_cache_stats
+from db import get_db_connection, pool_status, replica_status
+from notifications import (cache_stats as notification_cache_stats, get_notification_summary,
+                           stream_stats as notification_stream_stats)
+from passwords import password_stats
+from report_jobs import report_jobs
+from storage import get_storage
+
+log = logging.getLogger(__name__)
+
+bp = Blueprint('main', __name__)
+
+
+@bp.route('/health')
+def health_check():
+    """Health check endpoint to verify database connection"""
+    import os
+    try:
+        conn = get_db_connection()
+        if conn is None:
+            return jsonify({
+                'status': 'error',
+                'message': 'Could not connect to database',
+                'env_vars': {
+                    'DB_HOST': os.environ.get('DB_HOST', 'NOT SET'),
+                    'DB_USER': os.environ.get('DB_USER', 'NOT SET'),
+                    'DB_NAME': os.environ.get('DB_NAME', 'NOT SET'),
+                    'DB_PASSWORD': '***' if os.environ.get('DB_PASSWORD') else 'NOT SET'
+                }
+            }), 500
+        
+        cursor = conn.cursor()
+        cursor.execute("SHOW TABLES")
+        tables = [t[0] for t in cursor.fetchall()]
+        cursor.close()
+        conn.close()
+        
+        return jsonify({
+            'status': 'ok',
+            'database': 'connected',
+            'tables': tables,
+            'pool': pool_status(),
+            'replicas': replica_status(),
+            'notification_cache': notification_cache_stats(),
+            'dashboard_cache': dashboard_cache_stats(),
+            'notification_streams': notification_stream_stats(),
+            'alerts': alert_stats(),
+            'report_jobs': report_jobs.status(),
+            'passwords': password_stats(),
+            'env_vars': {
+                'DB_HOST': os.environ.get('DB_HOST', 'NOT SET'),
+                'DB_USER': os.environ.get('DB_USER', 'NOT SET'),
+                'DB_NAME': os.environ.get('DB_NAME', 'NOT SET'),
+                'DB_PASSWORD': '***' if os.environ.get('DB_PASSWORD') else 'NOT SET'
+            }
+        })
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+@bp.route('/')
+def home():
+    if 'user_id' in session:
+        return redirect(url_for('main.dashboard'))
+    return redirect(url_for('auth.login'))
+
+@bp.route('/dashboard')
+def dashboard():
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+    
+    # Goal deadline and balance alerts are checked in the background
+    enqueue_alert('goal_deadlines', session['user_id'])
+    enqueue_alert('balance_status', session['user_id'])
+    
+    return render_template('dashboard.html', username=session['username'], now=date.today())
+
+@bp.app_context_processor
+def inject_notifications():
+    if 'user_id' in session:
+        try:
+            notifs, unread_count = get_notification_summary(session['user_id'], limit=10)
+            return dict(notifications=notifs, unread_count=unread_count)
+        except:
+            return dict(notifications=[], unread_count=0)
+    return dict(notifications=[], unread_count=0)
+
+@bp.route('/mark_read', methods=['POST'])
+def mark_read():
+    if 'user_id' in session:
+        user_id = session['user_id']
+        storage = get_storage()
+        storage.notifications.mark_all_read(user_id)
+        storage.commit()
+        storage.close()
+    return '', 204
+
+@bp.route('/delete_notification/<int:id>', methods=['POST'])
+def delete_notification(id):
+    if 'user_id' in session:
+        user_id = session['user_id']
+        storage = get_storage()
+        storage.notifications.delete(user_id, id)
+        storage.commit()
+        storage.close()
+    return '', 204
+
+@bp.route('/clear_notifications', methods=['POST'])
+def clear_notifications():
+    if 'user_id' in session:
+        user_id = session['user_id']
+        storage = get_storage()
+        storage.notifications.clear(user_id)
+        storage.commit()
+        storage.close()
+    return '', 204
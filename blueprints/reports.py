@@ -0,0 +1,101 @@
+"""Report page, background Excel/PDF report downloads and CSV/Parquet exports"""
+import logging
+
+from flask import Blueprint, flash, jsonify, redirect, render_template, request, session, url_for
+
+from blueprints.common import wants_json
+from db import get_db_connection
+from exports import (PARQUET_MIMETYPE, ExportError, csv_response, export_filename, parse_export_filters,
+                     write_parquet_export)
+from ledger import get_data_version
+from report_jobs import report_jobs
+from reports import REPORT_FORMATS, file_response, make_temp_path, remove_file
+
+log = logging.getLogger(__name__)
+
+bp = Blueprint('reports', __name__)
+
+
+@bp.route('/report')
+def report():
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+    return render_template('report.html')
+
+def report_job_payload(job):
+    payload = job.to_dict()
+    payload['status_url'] = url_for('api.report_job_status', job_id=job.job_id)
+    payload['download_url'] = url_for('reports.download_report_job', job_id=job.job_id)
+    return payload
+
+def send_report_artifact(job):
+    report_format = REPORT_FORMATS[job.report_type]
+    path = report_jobs.artifact_path(job.user_id, job.report_type, job.version)
+    # Cached artifacts are shared between requests, so they are not deleted after sending
+    try:
+        return file_response(path, report_format.download_name, report_format.mimetype, delete=False)
+    except OSError:
+        # Evicted since the job finished
+        flash('The report expired. Please download it again.', 'error')
+        return redirect(url_for('reports.report'))
+
+@bp.route('/download_report/<type>')
+def download_report(type):
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+    if type in ('csv', 'parquet'):
+        return export_transactions(type)
+    if type not in REPORT_FORMATS:
+        return redirect(url_for('reports.report'))
+
+    # Reports are built in the background and cached per users.data_version
+    user_id = session['user_id']
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    version = get_data_version(cursor, user_id)
+    cursor.close()
+    conn.close()
+
+    job = report_jobs.submit(user_id, type, version)
+    if wants_json():
+        return jsonify(report_job_payload(job)), (200 if job.status == 'done' else 202)
+    if job.status == 'done':
+        return send_report_artifact(job)
+    return redirect(url_for('reports.report', job=job.job_id))
+
+def export_transactions(type):
+    """Filtered CSV (streamed) or Parquet export, built in the request"""
+    user_id = session['user_id']
+    path = None
+    try:
+        filters = parse_export_filters(request.args)
+        if type == 'csv':
+            return csv_response(user_id, filters)
+        path = make_temp_path('.parquet')
+        write_parquet_export(user_id, path, filters)
+    except ExportError as e:
+        flash(str(e), 'error')
+        return redirect(url_for('reports.report'))
+    except Exception as e:
+        if path:
+            remove_file(path)
+        if isinstance(e, ImportError):
+            flash('Parquet export is not available on this server.', 'error')
+        else:
+            log.exception("Error exporting %s", type)
+            flash('Could not generate the export. Please try again.', 'error')
+        return redirect(url_for('reports.report'))
+    return file_response(path, export_filename(filters, '.parquet'), PARQUET_MIMETYPE)
+
+@bp.route('/reports/<job_id>/download')
+def download_report_job(job_id):
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+
+    job = report_jobs.get(session['user_id'], job_id)
+    if job is None or job.status == 'failed':
+        flash('Could not generate the report. Please try again.', 'error')
+        return redirect(url_for('reports.report'))
+    if job.status != 'done':
+        return redirect(url_for('reports.report', job=job.job_id))
+    return send_report_artifact(job)
@@ -0,0 +1,156 @@
+"""Transactions page: listing, adding, deleting and importing statements"""
+import logging
+from datetime import date, datetime
+
+from flask import Blueprint, flash, jsonify, redirect, render_template, request, session, url_for
+
+from alerts import enqueue_transaction_alerts
+from blueprints.common import wants_json
+from db import get_read_connection
+from importer import ImportFormatError, detect_format as detect_import_format, import_file
+from ledger import fetch_budgets_with_spend, get_month_spend, month_range
+from pagination import fetch_transactions_page
+from storage import get_storage
+from storage.base import StorageError
+
+log = logging.getLogger(__name__)
+
+bp = Blueprint('transactions', __name__)
+
+
+@bp.route('/transactions')
+def transactions():
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+    
+    user_id = session['user_id']
+    # Determine selected month (YYYY-MM), default to current month
+    current_month = datetime.now().strftime('%Y-%m')
+    selected_month = request.args.get('month') or current_month
+    try:
+        # Also normalizes e.g. 2024-1 to 2024-01, the form budgets and the spend rollup use
+        selected_month = month_range(selected_month)[0].strftime('%Y-%m')
+    except ValueError:
+        flash(f'Invalid month "{selected_month}", showing {current_month} instead', 'error')
+        selected_month = current_month
+    
+    conn = get_read_connection()
+    if conn is None:
+        flash('Could not connect to database', 'error')
+        return render_template('transactions.html', transactions=[], budgets=[], today=date.today(), total_budget=0,
+                               total_spent=0, remaining_budget=0, selected_month=selected_month, next_cursor=None)
+    cursor = conn.cursor(dictionary=True)
+    
+    # First page of the month's non-deleted transactions; the rest load from /api/transactions
+    transactions, next_cursor = fetch_transactions_page(cursor, user_id, month=selected_month)
+    
+    # Calculate total spent for the selected month (all transactions, including soft-deleted for budget accuracy)
+    total_spent = get_month_spend(cursor, user_id, selected_month)
+    
+    # Get total budget for the selected month
+    cursor.execute(
+        "SELECT SUM(limit_amount) as total FROM budgets WHERE user_id = %s AND month = %s",
+        (user_id, selected_month)
+    )
+    budget_res = cursor.fetchone()
+    total_budget = float(budget_res['total'] or 0)
+    
+    remaining_budget = total_budget - total_spent
+    
+    # Fetch budgets for the selected month with their spend
+    budgets = fetch_budgets_with_spend(cursor, user_id, selected_month)
+    
+    for b in budgets:
+        b['limit_amount'] = float(b['limit_amount'])  # Convert Decimal to float
+        b['spent'] = float(b['spent'])
+        b['remaining'] = b['limit_amount'] - b['spent']
+        b['percent'] = (b['spent'] / b['limit_amount'] * 100) if b['limit_amount'] > 0 else 0
+    
+    cursor.close()
+    conn.close()
+    
+    return render_template(
+        'transactions.html',
+        transactions=transactions,
+        budgets=budgets,
+        today=date.today(),
+        total_budget=total_budget,
+        total_spent=total_spent,
+        remaining_budget=remaining_budget,
+        selected_month=selected_month,
+        next_cursor=next_cursor
+    )
+
+@bp.route('/add_transaction', methods=['POST'])
+def add_transaction():
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+    
+    user_id = session['user_id']
+    tx_type = request.form['type']
+    category = request.form['category'].strip()  # Strip whitespace
+    amount = float(request.form['amount'])
+    date_val = request.form['date']
+    description = request.form.get('description', '')
+    payment_method = request.form.get('payment_method', 'Cash')
+
+    storage = get_storage()
+
+    try:
+        # Insert the transaction (balance and budget spend are updated with it)
+        transaction_id = storage.transactions.add(user_id, tx_type, category, amount, date_val, description,
+                                                  payment_method)
+        storage.commit()
+        
+        # Budget, spending and balance checks run in the alert workers
+        enqueue_transaction_alerts(user_id, transaction_id, tx_type, category, amount, date_val)
+        flash('Transaction added successfully!', 'success')
+    except StorageError as err:
+        log.error("Database error adding transaction: %s", err)
+        flash(f'Error adding transaction: {err}', 'error')
+    finally:
+        storage.close()
+    
+    return redirect(url_for('transactions.transactions'))
+
+@bp.route('/import_transactions', methods=['POST'])
+def import_transactions_route():
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+
+    upload = request.files.get('statement')
+    if upload is None or not upload.filename:
+        flash('Choose a CSV, OFX or Excel file to import.', 'error')
+        return redirect(url_for('transactions.transactions'))
+
+    # Parsed straight from the uploaded stream; rows are inserted in chunked transactions
+    file_format = detect_import_format(upload.filename)
+    try:
+        result = import_file(session['user_id'], upload.stream, file_format)
+    except ImportFormatError as e:
+        flash(str(e), 'error')
+        return redirect(url_for('transactions.transactions'))
+    except Exception:
+        log.exception("Error importing %s", upload.filename)
+        flash('Import failed. Rows from completed batches were kept.', 'error')
+        return redirect(url_for('transactions.transactions'))
+
+    if wants_json():
+        return jsonify(result.to_dict())
+    message = f"Imported {result.imported} transactions"
+    if result.skipped:
+        message += f"; skipped {result.skipped} invalid rows ({'; '.join(result.errors[:3])})"
+    flash(message, 'success' if result.imported else 'error')
+    return redirect(url_for('transactions.transactions'))
+
+@bp.route('/delete_transaction/<int:id>', methods=['POST'])
+def delete_transaction(id):
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+    
+    storage = get_storage()
+    storage.transactions.delete(session['user_id'], id)
+    storage.commit()
+    storage.close()
+    flash('Transaction removed', 'success')
+    return redirect(url_for('transactions.transactions'))
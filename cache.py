@@ -0,0 +1,149 @@
+"""Small per-key caches with hit/miss counters
+
+LRUCache lives in the worker process. Set CACHE_URL (e.g. redis://localhost:6379/0)
+to share entries and invalidations between gunicorn workers through RedisCache;
+the `redis` package is only imported when that backend is used.
+"""
+import logging
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+log = logging.getLogger(__name__)
+
+CACHE_URL = os.environ.get('CACHE_URL')
+
+
+class LRUCache:
+    """In-process cache that evicts the least recently used key and expires entries after `ttl` seconds"""
+
+    def __init__(self, name, maxsize=1024, ttl=30):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Cached value for `key`, or None when missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + (ttl or self.ttl))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'backend': 'memory',
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+
+class RedisCache:
+    """Shared cache with the same interface as LRUCache; Redis handles expiry and eviction"""
+
+    def __init__(self, name, url, ttl=30):
+        import redis  # Only needed when CACHE_URL is set
+
+        self.name = name
+        self.ttl = ttl
+        self._client = redis.Redis.from_url(url)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, key):
+        return f"finance-guru:{self.name}:{key}"
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key):
+        try:
+            raw = self._client.get(self._key(key))
+        except Exception as e:
+            log.warning("Cache error (%s): %s", self.name, e)
+            raw = None
+        self._count(raw is not None)
+        # Entries are only ever written by this app, so unpickling them is safe
+        return pickle.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl=None):
+        try:
+            self._client.setex(self._key(key), ttl or self.ttl, pickle.dumps(value))
+        except Exception as e:
+            log.warning("Cache error (%s): %s", self.name, e)
+
+    def delete(self, key):
+        try:
+            self._client.delete(self._key(key))
+        except Exception as e:
+            log.warning("Cache error (%s): %s", self.name, e)
+
+    def clear(self):
+        try:
+            keys = list(self._client.scan_iter(self._key('*')))
+            if keys:
+                self._client.delete(*keys)
+        except Exception as e:
+            log.warning("Cache error (%s): %s", self.name, e)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'backend': 'redis',
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+
+def make_cache(name, maxsize=1024, ttl=30):
+    """RedisCache when CACHE_URL is set, otherwise an in-process LRUCache"""
+    if CACHE_URL:
+        try:
+            return RedisCache(name, CACHE_URL, ttl=ttl)
+        except ImportError:
+            log.warning("CACHE_URL is set but the redis package is not installed; using in-process cache for %s", name)
+    return LRUCache(name, maxsize=maxsize, ttl=ttl)
@@ -0,0 +1,85 @@
+"""Check that importing the app stays fast and leaves the report stack unloaded
+
+    python check_import_time.py [--module app] [--max-ms 1000] [--max-rss-mb 80]
+
+Imports --module in a fresh interpreter under `python -X importtime` and
+fails (exit 1) if any of the heavy report libraries were imported, if the
+module's cumulative import time is above --max-ms, or if the interpreter's
+peak RSS after the import is above --max-rss-mb. The import time includes
+app.py's startup schema check, so run it where the database is reachable
+(or refuses connections quickly). The RSS with report_writers loaded is
+printed for comparison; that is what a worker grows to after its first
+Excel/PDF report.
+"""
+import argparse
+import re
+import subprocess
+import sys
+
+# Only report_writers (and exports, for Parquet) may import these, and only on demand
+HEAVY_MODULES = ('pandas', 'numpy', 'matplotlib', 'fpdf', 'openpyxl', 'pyarrow')
+
+_LINE_RE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)')
+
+RSS_SNIPPET = "import resource, {modules}; print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)"
+
+
+def import_times(module):
+    """{module name: cumulative microseconds} for a fresh `import module`"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{result.stderr}")
+    times = {}
+    for line in result.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            times[match.group(4)] = int(match.group(2))
+    return times
+
+
+def peak_rss_mb(modules):
+    """Peak RSS in MB of a fresh interpreter after importing `modules`"""
+    output = subprocess.run([sys.executable, '-c', RSS_SNIPPET.format(modules=', '.join(modules))],
+                            capture_output=True, text=True, check=True).stdout
+    # ru_maxrss is in kilobytes on Linux
+    return int(output.split()[-1]) / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--module', default='app')
+    parser.add_argument('--max-ms', type=float, default=1000)
+    parser.add_argument('--max-rss-mb', type=float, default=80)
+    args = parser.parse_args()
+
+    times = import_times(args.module)
+    total_ms = times.get(args.module, 0) / 1000
+    slowest = sorted(((us, name) for name, us in times.items() if '.' not in name and name != args.module),
+                     reverse=True)[:10]
+    print(f"import {args.module}: {total_ms:.0f} ms cumulative")
+    for us, name in slowest:
+        print(f"    {name:<30} {us / 1000:8.1f} ms")
+
+    rss = peak_rss_mb([args.module])
+    with_reports = peak_rss_mb([args.module, 'report_writers'])
+    print(f"peak RSS: {rss:.1f} MB after import, {with_reports:.1f} MB with report_writers loaded")
+
+    failures = []
+    loaded = sorted(name for name in times if name.split('.')[0] in HEAVY_MODULES and '.' not in name)
+    if loaded:
+        failures.append(f"heavy modules imported at startup: {', '.join(loaded)}")
+    if total_ms > args.max_ms:
+        failures.append(f"import took {total_ms:.0f} ms (budget {args.max_ms:.0f} ms)")
+    if rss > args.max_rss_mb:
+        failures.append(f"peak RSS {rss:.1f} MB (budget {args.max_rss_mb:.0f} MB)")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == '__main__':
+    main()
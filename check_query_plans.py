@@ -0,0 +1,108 @@
+"""EXPLAIN the hot transaction/notification queries and fail on full table scans
+
+Run against a database with realistic data (a tiny table may legitimately be
+scanned), e.g. after seeding one of the benchmarks:
+    python check_query_plans.py [--user-id ID]
+Exits with status 1 if any query reads transactions, notifications or
+budgets with a full scan (EXPLAIN type ALL) or without an index.
+"""
+import argparse
+import sys
+from datetime import date, timedelta
+
+from db import get_db_connection
+from exports import ExportFilters, build_export_query
+from ledger import month_range
+from pagination import PAGE_SIZE
+from search import boolean_query
+
+CHECKED_TABLES = {'transactions', 't', 'notifications', 'budgets', 'b'}
+
+
+def hot_queries(user_id):
+    month_start, month_end = month_range(date.today().strftime('%Y-%m'))
+    today = date.today()
+    return [
+        ("transactions listing",
+         "SELECT * FROM transactions WHERE user_id = %s AND is_deleted = FALSE AND date >= %s AND date < %s ORDER BY date DESC",
+         (user_id, month_start, month_end)),
+        ("transactions page after cursor",
+         "SELECT id, date, type, category, amount, description, payment_method FROM transactions "
+         "WHERE user_id = %s AND is_deleted = FALSE AND date <= %s AND (date < %s OR id < %s) "
+         "ORDER BY date DESC, id DESC LIMIT %s",
+         (user_id, today, today, 2 ** 31 - 1, PAGE_SIZE + 1)),
+        ("dashboard recent transactions",
+         "SELECT * FROM transactions WHERE user_id = %s AND is_deleted = FALSE ORDER BY date DESC LIMIT 5",
+         (user_id,)),
+        ("unusual spending category average",
+         "SELECT AVG(amount), COUNT(*), MAX(amount) FROM transactions WHERE user_id = %s AND type = 'expense' "
+         "AND category_norm = %s AND date >= DATE_SUB(CURDATE(), INTERVAL 3 MONTH)",
+         (user_id, 'food')),
+        ("unusual spending daily average",
+         "SELECT AVG(daily_total) FROM (SELECT date, SUM(amount) AS daily_total FROM transactions "
+         "WHERE user_id = %s AND type = 'expense' AND date >= DATE_SUB(CURDATE(), INTERVAL 1 MONTH) GROUP BY date) d",
+         (user_id,)),
+        ("today's spending",
+         "SELECT SUM(amount) FROM transactions WHERE user_id = %s AND type = 'expense' AND date = CURDATE()",
+         (user_id,)),
+        ("balance ledger rebuild",
+         "SELECT SUM(amount) FROM transactions t WHERE t.user_id = %s AND t.is_deleted = FALSE",
+         (user_id,)),
+        ("filtered export",
+         *build_export_query(user_id, ExportFilters(start=today - timedelta(days=365), type='expense',
+                                                    category='food'))),
+        ("transaction search",
+         "SELECT id FROM transactions WHERE MATCH(search_text) AGAINST (%s IN BOOLEAN MODE) "
+         "AND user_id = %s AND is_deleted = FALSE",
+         (boolean_query(user_id, ['groceries']), user_id)),
+        ("notifications sent today",
+         "SELECT id FROM notifications WHERE user_id = %s AND date >= %s AND date < CURDATE() + INTERVAL 1 DAY",
+         (user_id, today)),
+        ("latest notifications",
+         "SELECT * FROM notifications WHERE user_id = %s ORDER BY date DESC LIMIT 10",
+         (user_id,)),
+        ("budgets for month",
+         "SELECT * FROM budgets b WHERE b.user_id = %s AND b.month = %s",
+         (user_id, today.strftime('%Y-%m'))),
+    ]
+
+
+def find_heaviest_user(cursor):
+    cursor.execute("SELECT user_id FROM transactions GROUP BY user_id ORDER BY COUNT(*) DESC LIMIT 1")
+    row = cursor.fetchone()
+    return row['user_id'] if row else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if a hot query falls back to a full scan")
+    parser.add_argument('--user-id', type=int, help="User to build sample parameters for (default: most transactions)")
+    args = parser.parse_args()
+
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    user_id = args.user_id or find_heaviest_user(cursor)
+    if user_id is None:
+        print("No transactions found; seed some data first.")
+        sys.exit(1)
+
+    failures = 0
+    for name, query, params in hot_queries(user_id):
+        cursor.execute("EXPLAIN " + query, params)
+        for row in cursor.fetchall():
+            if row['table'] not in CHECKED_TABLES:
+                continue
+            full_scan = row['type'] == 'ALL' or row['key'] is None
+            status = "FULL SCAN" if full_scan else "ok"
+            print(f"{status:<10} {name:<36} table={row['table']} type={row['type']} key={row['key']} rows={row['rows']}")
+            failures += full_scan
+
+    cursor.close()
+    conn.close()
+    if failures:
+        print(f"{failures} query plan(s) fell back to a full scan.")
+        sys.exit(1)
+    print("All hot queries use an index.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,12 @@
-import hashlib
 from db import get_db_connection
+from passwords import hash_password
 
 def create_test_user():
     username = "Demo User"
     email = "demo@example.com"
     password = "password"
     
-    hash_pwd = hashlib.sha256(password.encode()).hexdigest()
+    hash_pwd = hash_password(password)
     
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -0,0 +1,253 @@
+"""Dashboard aggregation layer
+
+Builds the whole /api/dashboard_data payload in two round trips: one UNION'd
+query for every aggregate and one multi-statement batch for the row lists.
+The same sub-queries are exported one by one (AGGREGATE_PARTS, ROW_PARTS)
+for async_api.py, which runs them concurrently instead.
+
+Payloads are cached per (user, users.data_version, today). Every write that
+changes what the dashboard shows bumps data_version, so a new version simply
+misses the cache and old entries age out; the date is part of the key
+because overdue/due-soon bill flags depend on it. The version is also the
+response's ETag, so an unchanged dashboard costs one primary key read and a
+304. Set CACHE_URL to share entries between workers (see cache.py).
+"""
+import os
+from dataclasses import dataclass, field
+from datetime import date, datetime, time
+
+from cache import make_cache
+from ledger import get_data_stamp
+
+_cache = make_cache(
+    'dashboard',
+    maxsize=int(os.environ.get('DASHBOARD_CACHE_SIZE', 1024)),
+    ttl=int(os.environ.get('DASHBOARD_CACHE_TTL', 3600))
+)
+
+# Dashboard sub-queries. The sync path sends them in two round trips (AGGREGATE_QUERY,
+# ROWS_QUERY); async_api.py runs each one on its own connection concurrently.
+TOTALS_QUERY = """
+    SELECT 'totals' AS kind, NULL AS label,
+           COALESCE(SUM(CASE WHEN type = 'income' THEN amount END), 0) AS income,
+           COALESCE(SUM(CASE WHEN type = 'expense' THEN amount END), 0) AS expense,
+           (SELECT initial_balance FROM users WHERE id = %s) AS initial_balance
+    FROM transactions WHERE user_id = %s
+"""
+
+CATEGORY_SPEND_QUERY = """
+    SELECT 'category' AS kind, category AS label, 0 AS income, SUM(amount) AS expense, NULL AS initial_balance
+    FROM transactions WHERE user_id = %s AND type = 'expense'
+    GROUP BY category
+"""
+
+MONTHLY_QUERY = """
+    SELECT 'month' AS kind, month AS label, income, expense, NULL AS initial_balance FROM (
+        SELECT DATE_FORMAT(date, '%Y-%m') AS month,
+               SUM(CASE WHEN type = 'income' THEN amount ELSE 0 END) AS income,
+               SUM(CASE WHEN type = 'expense' THEN amount ELSE 0 END) AS expense
+        FROM transactions
+        WHERE user_id = %s
+        GROUP BY month
+        ORDER BY month DESC
+        LIMIT 12
+    ) AS recent_months
+"""
+
+RECENT_TRANSACTIONS_QUERY = "SELECT * FROM transactions WHERE user_id = %s AND is_deleted = FALSE ORDER BY date DESC LIMIT 5"
+UNPAID_BILLS_QUERY = "SELECT * FROM bills WHERE user_id = %s AND is_paid = FALSE ORDER BY due_date ASC"
+GOALS_QUERY = "SELECT * FROM goals WHERE user_id = %s"
+
+# (query, number of user_id parameters), in the order build_dashboard_data() takes the results
+AGGREGATE_PARTS = ((TOTALS_QUERY, 2), (CATEGORY_SPEND_QUERY, 1), (MONTHLY_QUERY, 1))
+ROW_PARTS = ((RECENT_TRANSACTIONS_QUERY, 1), (UNPAID_BILLS_QUERY, 1), (GOALS_QUERY, 1))
+
+# Round trip 1: totals, per-category spend and the last 12 months, tagged by `kind`
+AGGREGATE_QUERY = "    UNION ALL".join(query for query, _ in AGGREGATE_PARTS)
+
+# Round trip 2: recent transactions, unpaid bills and goals
+ROWS_QUERY = ";\n".join(query for query, _ in ROW_PARTS)
+
+UPCOMING_BILLS_LIMIT = 5
+
+
+@dataclass
+class BillSummary:
+    pending_count: int = 0
+    overdue_count: int = 0
+    due_soon_count: int = 0
+    pending_amount: float = 0.0
+    upcoming: list = field(default_factory=list)
+
+
+@dataclass
+class DashboardData:
+    income: float
+    expense: float
+    balance: float
+    transactions: list
+    categories: list
+    monthly: list
+    bills: BillSummary
+    goals: list
+
+    def to_dict(self):
+        """Payload in the shape script.js and report.html expect"""
+        return {
+            'income': self.income,
+            'expense': self.expense,
+            'balance': self.balance,
+            'transactions': self.transactions,
+            'categories': self.categories,
+            'monthly': self.monthly,
+            'bills': {
+                'pending_count': self.bills.pending_count,
+                'overdue_count': self.bills.overdue_count,
+                'due_soon_count': self.bills.due_soon_count,
+                'pending_amount': self.bills.pending_amount,
+                'upcoming': self.bills.upcoming
+            },
+            'goals': self.goals
+        }
+
+
+def fetch_dashboard_data(conn, user_id, today=None):
+    """Run both round trips on `conn` and return a DashboardData"""
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(AGGREGATE_QUERY, (user_id,) * sum(n for _, n in AGGREGATE_PARTS))
+        aggregates = cursor.fetchall()
+
+        row_sets = [
+            result.fetchall()
+            for result in cursor.execute(ROWS_QUERY, (user_id,) * 3, multi=True)
+            if result.with_rows
+        ]
+    finally:
+        cursor.close()
+
+    recent_transactions, bills, goals = row_sets
+    return build_dashboard_data(aggregates, recent_transactions, bills, goals, today or date.today())
+
+
+@dataclass
+class DashboardPayload:
+    data: dict
+    etag: str
+    last_modified: datetime
+
+
+def cache_key(user_id, stamp, today):
+    """(cache key, Last-Modified) for the user's get_data_stamp() result"""
+    version, updated_at = stamp or (0, None)
+    # A new day can change the payload without a write, so it never predates today
+    start_of_day = datetime.combine(today, time.min)
+    last_modified = max(updated_at, start_of_day) if updated_at else start_of_day
+    return f"{user_id}:{version}:{today.isoformat()}", last_modified
+
+
+def cached_data(key):
+    return _cache.get(key)
+
+
+def cache_data(key, data):
+    _cache.set(key, data)
+
+
+def make_payload(key, data, last_modified):
+    return DashboardPayload(data, f"dash-{key.replace(':', '-')}", last_modified)
+
+
+def get_dashboard_payload(conn, user_id, today=None):
+    """The user's dashboard payload from the cache, building it on a miss"""
+    today = today or date.today()
+    cursor = conn.cursor()
+    try:
+        stamp = get_data_stamp(cursor, user_id)
+    finally:
+        cursor.close()
+    key, last_modified = cache_key(user_id, stamp, today)
+
+    data = cached_data(key)
+    if data is None:
+        data = fetch_dashboard_data(conn, user_id, today).to_dict()
+        cache_data(key, data)
+    return make_payload(key, data, last_modified)
+
+
+def cache_stats():
+    return _cache.stats()
+
+
+def build_dashboard_data(aggregates, recent_transactions, bills, goals, today):
+    """Shape raw result rows into a DashboardData (no database access)"""
+    income = expense = 0
+    initial_balance = 0
+    categories = []
+    monthly = []
+
+    for row in aggregates:
+        if row['kind'] == 'totals':
+            income = row['income'] or 0
+            expense = row['expense'] or 0
+            initial_balance = float(row['initial_balance']) if row['initial_balance'] else 0
+        elif row['kind'] == 'category':
+            categories.append({'category': row['label'], 'total': row['expense']})
+        elif row['kind'] == 'month':
+            monthly.append({'month': row['label'], 'income': row['income'], 'expense': row['expense']})
+
+    # UNION ALL does not keep the derived table's order
+    monthly.sort(key=lambda m: m['month'], reverse=True)
+
+    # Balance includes the initial balance
+    balance = initial_balance + float(income) - float(expense)
+
+    return DashboardData(
+        income=float(income),
+        expense=float(expense),
+        balance=float(balance),
+        transactions=recent_transactions,
+        categories=categories,
+        monthly=monthly,
+        bills=summarize_bills(bills, today),
+        goals=[summarize_goal(goal) for goal in goals]
+    )
+
+
+def summarize_bills(bills, today):
+    summary = BillSummary(pending_count=len(bills))
+
+    for bill in bills:
+        days_until = (bill['due_date'] - today).days
+        bill['is_overdue'] = days_until < 0
+        bill['is_due_soon'] = 0 <= days_until <= 3
+
+        if bill['is_overdue']:
+            summary.overdue_count += 1
+        elif bill['is_due_soon']:
+            summary.due_soon_count += 1
+
+        summary.pending_amount += float(bill['amount'])
+
+        if len(summary.upcoming) < UPCOMING_BILLS_LIMIT:
+            # Convert decimal to float for JSON serialization
+            bill['amount'] = float(bill['amount'])
+            if isinstance(bill['due_date'], (date, datetime)):
+                bill['due_date'] = bill['due_date'].strftime('%Y-%m-%d')
+            summary.upcoming.append(bill)
+
+    return summary
+
+
+def summarize_goal(goal):
+    target = float(goal['target_amount'])
+    current = float(goal['current_amount'])
+    percent = (current / target * 100) if target > 0 else 0
+
+    return {
+        'name': goal['name'],
+        'target_amount': target,
+        'current_amount': current,
+        'percentage': round(percent, 1),
+        'deadline': goal['deadline'].strftime('%Y-%m-%d') if goal['deadline'] else None
+    }
@@ -0,0 +1,27 @@
+"""Gunicorn settings, read automatically when gunicorn starts in the repo root
+
+The app is imported once in the master (preload_app) and workers are forked
+from it, sharing the imported code copy-on-write instead of each importing it
+again. create_app() opens no pooled connections and starts no threads; pools
+and executors are created lazily in each worker (db.get_pool() and friends
+check os.getpid()), so nothing made before the fork is shared between workers.
+"""
+import gc
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8000)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+# SSE notification streams hold a thread each (see DEPLOY.md, Notification Stream)
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') != '0'
+
+# Recycle workers so one that has loaded the report libraries gives the memory back
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = max_requests // 10
+
+
+def pre_fork(server, worker):
+    # Move everything the master allocated out of the collector's reach, so
+    # collections in the workers don't touch (and un-share) those pages
+    gc.freeze()
@@ -0,0 +1,356 @@
+"""Bulk transaction import from bank statements (CSV, OFX, Excel)
+
+Rows are parsed lazily from the uploaded file, validated one at a time and
+inserted with executemany() in chunks of IMPORT_BATCH_SIZE, one commit per
+chunk. Each chunk updates the balance and monthly spend summaries once with
+summed deltas (ledger.record_transactions), and the alert rules run once
+after the whole file instead of once per row.
+
+Accepted layouts:
+  CSV    a header row with date, type, category, amount and optionally
+         description / payment_method; the CSV export's extra id column is
+         ignored. Without a type column a negative amount is an expense, and
+         separate debit/credit columns are understood too.
+  Excel  the Transactions sheet of the /download_report workbook (or the
+         first sheet), with the same columns as CSV.
+  OFX    <STMTTRN> records; the sign of TRNAMT gives the type and the
+         category is IMPORT_DEFAULT_CATEGORY.
+
+Invalid rows are skipped and reported with their line number; importing the
+same statement twice adds its transactions twice.
+
+    python importer.py statement.csv --user-id 7 [--format ofx] [--dry-run]
+"""
+import argparse
+import csv
+import io
+import os
+import re
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from alerts import engine as alert_engine, enqueue
+from db import get_dedicated_connection
+from ledger import record_transactions
+
+IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', 1000))
+IMPORT_DEFAULT_CATEGORY = 'Other'
+# Errors kept for the report; the rest are only counted
+MAX_REPORTED_ERRORS = 20
+
+IMPORT_FORMATS = {'.csv': 'csv', '.ofx': 'ofx', '.qfx': 'ofx', '.xlsx': 'excel'}
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%Y/%m/%d', '%Y-%m-%d %H:%M:%S')
+MAX_AMOUNT = Decimal('99999999.99')  # DECIMAL(10, 2)
+CHUNK_SIZE = 64 * 1024
+
+INSERT_QUERY = (
+    "INSERT INTO transactions (user_id, type, category, amount, description, date, payment_method, is_deleted) "
+    "VALUES (%s, %s, %s, %s, %s, %s, %s, FALSE)"
+)
+
+COLUMN_ALIASES = {
+    'transaction date': 'date',
+    'payment method': 'payment_method',
+    'memo': 'description',
+    'narration': 'description',
+}
+
+
+class InvalidRow(ValueError):
+    """A statement row that cannot be imported"""
+
+
+class ImportFormatError(ValueError):
+    """Raised when a file is not in a layout the importer understands"""
+
+
+@dataclass
+class ImportResult:
+    imported: int = 0
+    skipped: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+    errors: list = field(default_factory=list)
+
+    @property
+    def rows_per_second(self):
+        return self.imported / self.seconds if self.seconds else 0.0
+
+    def add_error(self, line, message):
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"line {line}: {message}")
+
+    def to_dict(self):
+        return {
+            'imported': self.imported,
+            'skipped': self.skipped,
+            'batches': self.batches,
+            'seconds': round(self.seconds, 3),
+            'rows_per_second': round(self.rows_per_second),
+            'errors': self.errors
+        }
+
+
+def detect_format(filename):
+    return IMPORT_FORMATS.get(os.path.splitext(filename or '')[1].lower())
+
+
+# --- Parsers: yield (line number, dict of raw values) ---
+
+def _normalize_header(names):
+    columns = []
+    for name in names:
+        name = str(name or '').strip().lower()
+        columns.append(COLUMN_ALIASES.get(name, name.replace(' ', '_')))
+    return columns
+
+
+def iter_csv_rows(stream):
+    """Rows of a CSV statement; `stream` is a binary file object"""
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    reader = csv.reader(text)
+    header = next(reader, None)
+    if header is None:
+        return
+    columns = _normalize_header(header)
+    if 'date' not in columns or not ({'amount', 'debit', 'credit'} & set(columns)):
+        raise ImportFormatError("CSV needs a header row with at least date and amount columns")
+    for values in reader:
+        if not any(v.strip() for v in values):
+            continue
+        yield reader.line_num, dict(zip(columns, values))
+
+
+def iter_excel_rows(stream):
+    """Rows of the Transactions sheet of an .xlsx workbook"""
+    from openpyxl import load_workbook
+
+    wb = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        ws = wb['Transactions'] if 'Transactions' in wb.sheetnames else wb.worksheets[0]
+        rows = ws.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = _normalize_header(header)
+        if 'date' not in columns or 'amount' not in columns:
+            raise ImportFormatError("The sheet needs a header row with at least date and amount columns")
+        for line, values in enumerate(rows, start=2):
+            if all(v is None or v == '' for v in values):
+                continue
+            yield line, dict(zip(columns, values))
+    finally:
+        wb.close()
+
+
+OFX_RECORD_RE = re.compile(r'<STMTTRN>(.*?)</STMTTRN>', re.S | re.I)
+OFX_FIELD_RE = re.compile(r'<(\w+)>([^<\r\n]*)')
+
+
+def _ofx_record(block):
+    fields = {tag.upper(): value.strip() for tag, value in OFX_FIELD_RE.findall(block)}
+    amount = fields.get('TRNAMT', '')
+    posted = fields.get('DTPOSTED', '')
+    return {
+        'date': f"{posted[:4]}-{posted[4:6]}-{posted[6:8]}" if len(posted) >= 8 else posted,
+        'amount': amount,
+        'type': 'expense' if amount.startswith('-') else 'income',
+        'category': IMPORT_DEFAULT_CATEGORY,
+        'description': ' - '.join(v for v in (fields.get('NAME'), fields.get('MEMO')) if v),
+        'payment_method': 'Bank Transfer'
+    }
+
+
+def iter_ofx_rows(stream):
+    """<STMTTRN> records of an OFX/QFX statement (SGML or XML), read in chunks"""
+    buffer = ''
+    record = 0
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        buffer += chunk.decode('latin-1') if isinstance(chunk, bytes) else chunk
+        end = 0
+        for match in OFX_RECORD_RE.finditer(buffer):
+            record += 1
+            end = match.end()
+            yield record, _ofx_record(match.group(1))
+        buffer = buffer[end:]
+    if record == 0:
+        raise ImportFormatError("No <STMTTRN> records found in the OFX file")
+
+
+PARSERS = {'csv': iter_csv_rows, 'excel': iter_excel_rows, 'ofx': iter_ofx_rows}
+
+
+# --- Validation ---
+
+def parse_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = str(value or '').strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            pass
+    raise InvalidRow(f"unrecognised date {text!r}")
+
+
+def parse_amount(value):
+    if value is None or str(value).strip() == '':
+        return None
+    text = str(value).strip().replace(',', '').replace('Rs', '').replace('₹', '').strip()
+    try:
+        amount = Decimal(text)
+    except InvalidOperation:
+        raise InvalidRow(f"invalid amount {value!r}")
+    if not amount.is_finite():
+        raise InvalidRow(f"invalid amount {value!r}")
+    return amount
+
+
+def validate_row(user_id, raw):
+    """INSERT_QUERY parameters for one raw row; raises InvalidRow"""
+    tx_date = parse_date(raw.get('date'))
+
+    amount = parse_amount(raw.get('amount'))
+    if amount is None:
+        debit, credit = parse_amount(raw.get('debit')), parse_amount(raw.get('credit'))
+        if debit:
+            amount = -abs(debit)
+        elif credit:
+            amount = abs(credit)
+        else:
+            raise InvalidRow("missing amount")
+
+    tx_type = str(raw.get('type') or '').strip().lower()
+    if not tx_type:
+        tx_type = 'expense' if amount < 0 else 'income'
+    elif tx_type not in ('income', 'expense'):
+        raise InvalidRow(f"type must be income or expense, not {raw.get('type')!r}")
+    amount = abs(amount).quantize(Decimal('0.01'))
+    if amount == 0 or amount > MAX_AMOUNT:
+        raise InvalidRow(f"amount {amount} is out of range")
+
+    category = str(raw.get('category') or '').strip() or IMPORT_DEFAULT_CATEGORY
+    if len(category) > 50:
+        raise InvalidRow("category is longer than 50 characters")
+    description = str(raw.get('description') or '').strip()[:255]
+    payment_method = (str(raw.get('payment_method') or '').strip() or 'Cash')[:50]
+
+    return (user_id, tx_type, category, amount, description, tx_date, payment_method)
+
+
+def iter_valid_rows(user_id, rows, result):
+    for line, raw in rows:
+        try:
+            yield validate_row(user_id, raw)
+        except InvalidRow as e:
+            result.add_error(line, e)
+
+
+# --- Loading ---
+
+def _insert_batch(conn, cursor, user_id, batch):
+    cursor.executemany(INSERT_QUERY, batch)
+    record_transactions(cursor, user_id, [(r[1], r[2], r[3], r[5]) for r in batch])
+    conn.commit()
+
+
+def import_transactions(user_id, rows, batch_size=IMPORT_BATCH_SIZE, dry_run=False):
+    """Validate and insert parsed rows; returns an ImportResult
+
+    Each chunk commits on its own, so a database error stops the import with
+    the earlier chunks kept (result.imported says how many).
+    """
+    result = ImportResult()
+    started = time.perf_counter()
+    conn = None if dry_run else get_dedicated_connection()
+    if conn is None and not dry_run:
+        raise ConnectionError("Could not connect to database")
+
+    budget_categories = set()
+    this_month = date.today().strftime('%Y-%m')
+    cursor = conn.cursor() if conn else None
+    batch = []
+    try:
+        for row in iter_valid_rows(user_id, rows, result):
+            if row[1] == 'expense' and row[5].strftime('%Y-%m') == this_month:
+                budget_categories.add(row[2])
+            batch.append(row)
+            if len(batch) >= batch_size:
+                if cursor:
+                    _insert_batch(conn, cursor, user_id, batch)
+                result.imported += len(batch)
+                result.batches += 1
+                batch = []
+        if batch:
+            if cursor:
+                _insert_batch(conn, cursor, user_id, batch)
+            result.imported += len(batch)
+            result.batches += 1
+    except Exception:
+        if conn:
+            conn.rollback()
+        raise
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+        result.seconds = time.perf_counter() - started
+
+    if result.imported and not dry_run:
+        enqueue_import_alerts(user_id, budget_categories, this_month)
+    return result
+
+
+def enqueue_import_alerts(user_id, categories, month):
+    """Balance and budget checks once per import; per-transaction spending checks are skipped"""
+    for category in categories:
+        enqueue('budget_threshold', user_id, category=category, month=month)
+    enqueue('balance_status', user_id)
+
+
+def import_file(user_id, stream, file_format, **kwargs):
+    """Parse `stream` as `file_format` ('csv', 'ofx' or 'excel') and import it"""
+    if file_format not in PARSERS:
+        raise ImportFormatError("Unsupported file type; use CSV, OFX or Excel (.xlsx)")
+    return import_transactions(user_id, PARSERS[file_format](stream), **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import a bank statement into a user's transactions")
+    parser.add_argument('path', help="CSV, OFX/QFX or .xlsx file")
+    parser.add_argument('--user-id', type=int, required=True)
+    parser.add_argument('--format', choices=sorted(PARSERS), help="Default: from the file extension")
+    parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+    parser.add_argument('--dry-run', action='store_true', help="Validate only; nothing is written")
+    args = parser.parse_args()
+
+    # No request to outlive here: run the alert checks before exiting
+    alert_engine.workers = 0
+    file_format = args.format or detect_format(args.path)
+    with open(args.path, 'rb') as stream:
+        try:
+            result = import_file(args.user_id, stream, file_format, batch_size=args.batch_size, dry_run=args.dry_run)
+        except ImportFormatError as e:
+            print(e)
+            sys.exit(1)
+
+    action = "validated" if args.dry_run else "imported"
+    print(f"{result.imported} rows {action} in {result.batches} batches, {result.skipped} skipped, "
+          f"{result.seconds:.2f}s ({result.rows_per_second:,.0f} rows/s)")
+    for error in result.errors:
+        print(f"  {error}")
+
+
+if __name__ == '__main__':
+    main()
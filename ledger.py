@@ -0,0 +1,370 @@
+"""Incrementally maintained per-user balances and monthly category spend
+
+user_balances holds initial_balance + income - expenses for every user, so a
+balance lookup is a primary key read. monthly_category_spend holds the total
+and count per (user, month, normalized category, type), so budget spend is a
+point lookup instead of a scan of the user's history.
+
+Every write path that inserts or soft-deletes a transaction calls
+record_transaction() / record_deletion() on the same cursor, before
+committing, so the summaries and the transactions stay in one transaction.
+Both also bump users.data_version (and stamp data_updated_at), which other
+writes (budgets, bills, goals) bump through bump_data_version(); cached
+reports and dashboard payloads are keyed by it.
+
+Check and rebuild them against the transactions table with:
+    python ledger.py reconcile [--dry-run]
+    python ledger.py verify-spend
+    python ledger.py backfill-spend [--user-id ID]
+"""
+import argparse
+from datetime import date
+
+from db import get_db_connection
+
+# Non-deleted transactions only, same as the balance shown to the user
+REBUILD_BALANCE_QUERY = """
+    INSERT INTO user_balances (user_id, initial_balance, total_income, total_expense)
+    SELECT * FROM (
+        SELECT u.id AS user_id,
+               COALESCE(u.initial_balance, 0) AS initial_balance,
+               COALESCE(SUM(CASE WHEN t.type = 'income' THEN t.amount END), 0) AS total_income,
+               COALESCE(SUM(CASE WHEN t.type = 'expense' THEN t.amount END), 0) AS total_expense
+        FROM users u
+        LEFT JOIN transactions t
+               ON t.user_id = u.id AND t.is_deleted = FALSE
+        WHERE u.id = %s
+        GROUP BY u.id, u.initial_balance
+    ) AS src
+    ON DUPLICATE KEY UPDATE
+        initial_balance = src.initial_balance,
+        total_income = src.total_income,
+        total_expense = src.total_expense
+"""
+
+DRIFT_QUERY = """
+    SELECT u.id AS user_id,
+           COALESCE(u.initial_balance, 0)
+             + COALESCE(SUM(CASE WHEN t.type = 'income' THEN t.amount END), 0)
+             - COALESCE(SUM(CASE WHEN t.type = 'expense' THEN t.amount END), 0) AS expected,
+           b.balance AS stored
+    FROM users u
+    LEFT JOIN transactions t
+           ON t.user_id = u.id AND t.is_deleted = FALSE
+    LEFT JOIN user_balances b ON b.user_id = u.id
+    GROUP BY u.id, u.initial_balance, b.balance
+"""
+
+
+def rebuild_balance(cursor, user_id):
+    """Recompute one user's ledger row from the transactions table"""
+    cursor.execute(REBUILD_BALANCE_QUERY, (user_id,))
+
+
+# Budget spend counts soft-deleted transactions too, so `total`/`count` cover
+# every row and `deleted_total`/`deleted_count` hold the soft-deleted share
+SPEND_AGGREGATE_QUERY = """
+    SELECT user_id, DATE_FORMAT(date, '%Y-%m') AS month, category_norm, type,
+           SUM(amount) AS total, COUNT(*) AS count,
+           COALESCE(SUM(CASE WHEN is_deleted THEN amount END), 0) AS deleted_total,
+           COALESCE(SUM(CASE WHEN is_deleted THEN 1 ELSE 0 END), 0) AS deleted_count
+    FROM transactions
+    WHERE user_id = %s
+    GROUP BY user_id, DATE_FORMAT(date, '%Y-%m'), category_norm, type
+"""
+
+REBUILD_SPEND_QUERY = """
+    INSERT INTO monthly_category_spend
+        (user_id, month, category_norm, type, total, count, deleted_total, deleted_count)
+""" + SPEND_AGGREGATE_QUERY
+
+SPEND_FIELDS = ('total', 'count', 'deleted_total', 'deleted_count')
+
+# Budgets with the month's spend in their category (limit_amount/spent are Decimals)
+BUDGET_SPEND_QUERY = """
+    SELECT b.*, COALESCE(m.total, 0) AS spent
+    FROM budgets b
+    LEFT JOIN monthly_category_spend m
+           ON m.user_id = b.user_id AND m.month = b.month
+          AND m.category_norm = LOWER(TRIM(b.category)) AND m.type = 'expense'
+    WHERE b.user_id = %s
+"""
+
+
+def normalize_category(category):
+    """Python twin of the SQL LOWER(TRIM(category)) behind transactions.category_norm
+
+    TRIM only removes spaces, so tabs and newlines are kept here too; otherwise the
+    incremental rollup and rebuild_category_spend() would file such categories under different keys.
+    """
+    return category.strip(' ').lower()
+
+
+def month_of(tx_date):
+    """'YYYY-MM' for a date or an ISO 'YYYY-MM-DD' string"""
+    return str(tx_date)[:7]
+
+
+def month_range(month):
+    """Half-open [first day, first day of next month) for a 'YYYY-MM' string
+
+    Use as `date >= %s AND date < %s` so the date index can be used.
+    """
+    year, mon = (int(part) for part in month.split('-'))
+    start = date(year, mon, 1)
+    end = date(year + mon // 12, mon % 12 + 1, 1)
+    return start, end
+
+
+def _apply_balance(cursor, user_id, tx_type, amount):
+    column = 'total_income' if tx_type == 'income' else 'total_expense'
+    cursor.execute(
+        f"UPDATE user_balances SET {column} = {column} + %s WHERE user_id = %s",
+        (amount, user_id)
+    )
+    if cursor.rowcount == 0:
+        # No ledger row yet: rebuilding from scratch already includes this change
+        rebuild_balance(cursor, user_id)
+
+
+def bump_data_version(cursor, user_id):
+    """Mark the user's data as changed; call before committing the change"""
+    cursor.execute(
+        "UPDATE users SET data_version = data_version + 1, data_updated_at = UTC_TIMESTAMP() WHERE id = %s",
+        (user_id,)
+    )
+
+
+def get_data_version(cursor, user_id):
+    cursor.execute("SELECT data_version FROM users WHERE id = %s", (user_id,))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    return row['data_version'] if isinstance(row, dict) else row[0]
+
+
+DATA_STAMP_QUERY = "SELECT data_version, data_updated_at FROM users WHERE id = %s"
+
+
+def get_data_stamp(cursor, user_id):
+    """(data_version, data_updated_at as naive UTC or None), or None for an unknown user"""
+    cursor.execute(DATA_STAMP_QUERY, (user_id,))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    return (row['data_version'], row['data_updated_at']) if isinstance(row, dict) else tuple(row)
+
+
+def record_transaction(cursor, user_id, tx_type, category, amount, tx_date):
+    """Apply a newly inserted transaction to the balance and spend summaries
+
+    Call after the transactions row was written, before committing.
+    """
+    _apply_balance(cursor, user_id, tx_type, amount)
+    bump_data_version(cursor, user_id)
+    _apply_spend(cursor, user_id, month_of(tx_date), normalize_category(category), tx_type, amount, 1)
+
+
+def record_transactions(cursor, user_id, rows):
+    """record_transaction() for many rows at once: (tx_type, category, amount, tx_date) tuples
+
+    Deltas are summed first, so the ledger row and each (month, category,
+    type) spend row are written once however many transactions there are.
+    """
+    totals = {'income': 0, 'expense': 0}
+    spend = {}
+    for tx_type, category, amount, tx_date in rows:
+        totals[tx_type] += amount
+        key = (month_of(tx_date), normalize_category(category), tx_type)
+        total, count = spend.get(key, (0, 0))
+        spend[key] = (total + amount, count + 1)
+    if not spend:
+        return
+
+    cursor.execute(
+        "UPDATE user_balances SET total_income = total_income + %s, total_expense = total_expense + %s "
+        "WHERE user_id = %s",
+        (totals['income'], totals['expense'], user_id)
+    )
+    if cursor.rowcount == 0:
+        rebuild_balance(cursor, user_id)
+    bump_data_version(cursor, user_id)
+    for (month, category_norm, tx_type), (total, count) in spend.items():
+        _apply_spend(cursor, user_id, month, category_norm, tx_type, total, count)
+
+
+def _apply_spend(cursor, user_id, month, category_norm, tx_type, total, count):
+    cursor.execute("""
+        INSERT INTO monthly_category_spend (user_id, month, category_norm, type, total, count)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE total = total + %s, count = count + %s
+    """, (user_id, month, category_norm, tx_type, total, count, total, count))
+
+
+def record_deletion(cursor, user_id, tx_type, category, amount, tx_date):
+    """Apply a soft delete to the balance and spend summaries
+
+    Call after is_deleted was set, before committing. The balance drops the
+    transaction; budget spend keeps it and tracks it in deleted_total.
+    """
+    _apply_balance(cursor, user_id, tx_type, -amount)
+    bump_data_version(cursor, user_id)
+    cursor.execute("""
+        UPDATE monthly_category_spend
+        SET deleted_total = deleted_total + %s, deleted_count = deleted_count + 1
+        WHERE user_id = %s AND month = %s AND category_norm = %s AND type = %s
+    """, (amount, user_id, month_of(tx_date), normalize_category(category), tx_type))
+
+
+def rebuild_category_spend(cursor, user_id):
+    """Recompute one user's monthly_category_spend rows from the transactions table"""
+    cursor.execute("DELETE FROM monthly_category_spend WHERE user_id = %s", (user_id,))
+    cursor.execute(REBUILD_SPEND_QUERY, (user_id,))
+
+
+def get_category_spend(cursor, user_id, month, category, tx_type='expense'):
+    """Total of one category in one month, soft-deleted transactions included"""
+    cursor.execute("""
+        SELECT total FROM monthly_category_spend
+        WHERE user_id = %s AND month = %s AND category_norm = %s AND type = %s
+    """, (user_id, month, normalize_category(category), tx_type))
+    row = cursor.fetchone()
+    if row is None:
+        return 0.0
+    return float(row['total'] if isinstance(row, dict) else row[0])
+
+
+def get_month_spend(cursor, user_id, month, tx_type='expense'):
+    """Total of all categories in one month, soft-deleted transactions included"""
+    cursor.execute("""
+        SELECT COALESCE(SUM(total), 0) AS total FROM monthly_category_spend
+        WHERE user_id = %s AND month = %s AND type = %s
+    """, (user_id, month, tx_type))
+    row = cursor.fetchone()
+    return float(row['total'] if isinstance(row, dict) else row[0])
+
+
+def fetch_budgets_with_spend(cursor, user_id, month=None):
+    """Budget rows with a `spent` column, for one month or all of them"""
+    if month is None:
+        cursor.execute(BUDGET_SPEND_QUERY, (user_id,))
+    else:
+        cursor.execute(BUDGET_SPEND_QUERY + " AND b.month = %s", (user_id, month))
+    return cursor.fetchall()
+
+
+def get_balance(cursor, user_id):
+    """Return the user's current balance, building the ledger row on first use
+
+    The caller commits, since the first lookup may write the row.
+    """
+    cursor.execute("SELECT balance FROM user_balances WHERE user_id = %s", (user_id,))
+    row = cursor.fetchone()
+    if row is None:
+        rebuild_balance(cursor, user_id)
+        cursor.execute("SELECT balance FROM user_balances WHERE user_id = %s", (user_id,))
+        row = cursor.fetchone()
+    if row is None:
+        return 0
+    balance = row['balance'] if isinstance(row, dict) else row[0]
+    return float(balance)
+
+
+def reconcile(dry_run=False):
+    """Compare every ledger row with the transactions table and rebuild drifted rows"""
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute(DRIFT_QUERY)
+    rows = cursor.fetchall()
+
+    drifted = [r for r in rows if r['stored'] is None or r['stored'] != r['expected']]
+    for r in drifted:
+        stored = 'missing' if r['stored'] is None else f"{r['stored']:.2f}"
+        print(f"User {r['user_id']}: stored {stored}, expected {r['expected']:.2f}")
+        if not dry_run:
+            rebuild_balance(cursor, r['user_id'])
+
+    if not dry_run:
+        conn.commit()
+    cursor.close()
+    conn.close()
+
+    action = "found" if dry_run else "rebuilt"
+    print(f"Checked {len(rows)} users, {action} {len(drifted)} drifted balances.")
+    return drifted
+
+
+def _all_user_ids(cursor, user_id=None):
+    if user_id is not None:
+        return [user_id]
+    cursor.execute("SELECT id FROM users ORDER BY id")
+    return [row['id'] for row in cursor.fetchall()]
+
+
+def _describe_spend(row):
+    if row is None:
+        return 'missing'
+    return ', '.join(f"{f}={row[f]}" for f in SPEND_FIELDS)
+
+
+def backfill_spend(user_id=None):
+    """Rebuild monthly_category_spend from transactions, one user per commit"""
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    user_ids = _all_user_ids(cursor, user_id)
+    for uid in user_ids:
+        rebuild_category_spend(cursor, uid)
+        conn.commit()
+    cursor.close()
+    conn.close()
+    print(f"Rebuilt monthly category spend for {len(user_ids)} users.")
+
+
+def verify_spend(user_id=None):
+    """Compare monthly_category_spend with a fresh aggregate of transactions"""
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    mismatches = []
+    user_ids = _all_user_ids(cursor, user_id)
+
+    for uid in user_ids:
+        cursor.execute(SPEND_AGGREGATE_QUERY, (uid,))
+        expected = {(r['month'], r['category_norm'], r['type']): r for r in cursor.fetchall()}
+        cursor.execute("SELECT * FROM monthly_category_spend WHERE user_id = %s", (uid,))
+        stored = {(r['month'], r['category_norm'], r['type']): r for r in cursor.fetchall()}
+
+        for key in sorted(set(expected) | set(stored)):
+            want, have = expected.get(key), stored.get(key)
+            if want is None or have is None or any(want[f] != have[f] for f in SPEND_FIELDS):
+                mismatches.append((uid, key))
+                month, category, tx_type = key
+                print(f"User {uid} {month} {category!r} {tx_type}: "
+                      f"stored {_describe_spend(have)}, expected {_describe_spend(want)}")
+
+    cursor.close()
+    conn.close()
+    print(f"Checked {len(user_ids)} users, {len(mismatches)} mismatched rows.")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the user_balances ledger")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    reconcile_parser = subparsers.add_parser('reconcile', help="Rebuild balances that drifted from transactions")
+    reconcile_parser.add_argument('--dry-run', action='store_true', help="Only report drift")
+    backfill_parser = subparsers.add_parser('backfill-spend', help="Rebuild monthly_category_spend from transactions")
+    backfill_parser.add_argument('--user-id', type=int, help="Only this user")
+    verify_parser = subparsers.add_parser('verify-spend', help="Report monthly_category_spend rows that drifted")
+    verify_parser.add_argument('--user-id', type=int, help="Only this user")
+    args = parser.parse_args()
+
+    if args.command == 'reconcile':
+        reconcile(dry_run=args.dry_run)
+    elif args.command == 'backfill-spend':
+        backfill_spend(user_id=args.user_id)
+    elif args.command == 'verify-spend':
+        verify_spend(user_id=args.user_id)
+
+
+if __name__ == "__main__":
+    main()
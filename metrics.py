@@ -0,0 +1,288 @@
+"""Request and query instrumentation, exported at /metrics
+
+init_metrics(app) times every request (http_request_duration_seconds by
+method, endpoint and status) and counts the queries each one ran.
+Connections from db.py hand out InstrumentedCursor wrappers. These time
+every execute()/executemany() into db_query_duration_seconds, labelled by
+operation and table from the normalized SQL. Queries slower than
+SLOW_QUERY_MS and requests slower than SLOW_REQUEST_MS are logged with their
+normalized SQL or route. Responses carry a Server-Timing header with the
+request's query count and database time, so it shows up in browser devtools.
+
+Metrics live in the worker process: with several gunicorn workers each
+scrape sees one worker, so aggregate with rate()/sum() in Prometheus.
+Set METRICS_TOKEN to require `Authorization: Bearer <token>` on /metrics.
+"""
+import hmac
+import logging
+import os
+import re
+import threading
+import time
+
+from flask import Response, g, has_app_context, has_request_context, request
+
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 200))
+SLOW_REQUEST_MS = float(os.environ.get('SLOW_REQUEST_MS', 1000))
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+PROMETHEUS_MIMETYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+log = logging.getLogger(__name__)
+
+
+# --- Metric types ---
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + list(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Counter:
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(n, '') for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, '') for n in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series):
+                    le = f'le="{bound}"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, [le])} {count}")
+                inf = 'le="+Inf"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, [inf])} {series[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {series[-2]:.6f}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {series[-1]}")
+        return lines
+
+
+class GaugeSet:
+    """Gauges read at scrape time from a function returning a dict (e.g. pool_status)"""
+
+    def __init__(self, prefix, help_text, collect):
+        self.prefix = prefix
+        self.help = help_text
+        self.collect = collect
+
+    def render(self):
+        try:
+            values = self.collect()
+        except Exception as e:
+            log.warning("Could not collect %s metrics: %s", self.prefix, e)
+            return []
+        lines = []
+        for key, value in sorted(values.items()):
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            name = f"{self.prefix}_{key}"
+            lines += [f"# HELP {name} {self.help}: {key}", f"# TYPE {name} gauge", f"{name} {value}"]
+        return lines
+
+
+request_latency = Histogram('http_request_duration_seconds', 'Request latency',
+                            ('method', 'endpoint', 'status'))
+request_queries = Histogram('http_request_db_queries', 'Queries run per request', ('endpoint',),
+                            buckets=QUERY_COUNT_BUCKETS)
+query_latency = Histogram('db_query_duration_seconds', 'Query latency', ('operation', 'table'))
+query_errors = Counter('db_query_errors_total', 'Queries that raised', ('operation', 'table'))
+slow_queries = Counter('db_slow_queries_total', f'Queries slower than {SLOW_QUERY_MS:g} ms', ('operation', 'table'))
+
+REGISTRY = [request_latency, request_queries, query_latency, query_errors, slow_queries]
+
+
+def register_gauges(prefix, help_text, collect):
+    REGISTRY.append(GaugeSet(prefix, help_text, collect))
+
+
+def render_metrics():
+    lines = []
+    for metric in REGISTRY:
+        lines += metric.render()
+    return '\n'.join(lines) + '\n'
+
+
+# --- Queries ---
+
+_STRING_RE = re.compile(r"'(?:[^'\\]|\\.)*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_LIST_RE = re.compile(r'\((?:\s*\?\s*,)+\s*\?\s*\)')
+_TABLE_RE = re.compile(r'\b(?:FROM|INTO|UPDATE|JOIN)\s+`?(\w+)`?', re.I)
+
+
+def normalize_sql(sql):
+    """Statement with literals and placeholders replaced by ?, on one line"""
+    if isinstance(sql, (bytes, bytearray)):
+        sql = sql.decode('utf-8', 'replace')
+    sql = _STRING_RE.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _LIST_RE.sub('(...)', sql)
+    return ' '.join(sql.split())
+
+
+def classify(normalized):
+    """(operation, table) labels for a normalized statement"""
+    operation = normalized.split(' ', 1)[0].upper() if normalized else 'UNKNOWN'
+    match = _TABLE_RE.search(normalized)
+    return operation, match.group(1) if match else ''
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+def record_query(sql, elapsed, error=False):
+    normalized = normalize_sql(sql)
+    operation, table = classify(normalized)
+    query_latency.observe(elapsed, operation=operation, table=table)
+    if error:
+        query_errors.inc(operation=operation, table=table)
+
+    if has_app_context():
+        stats = g.get('_query_stats')
+        if stats is not None:
+            stats.count += 1
+            stats.seconds += elapsed
+
+    elapsed_ms = elapsed * 1000
+    if elapsed_ms >= SLOW_QUERY_MS:
+        slow_queries.inc(operation=operation, table=table)
+        endpoint = (request.endpoint or request.path) if has_request_context() else 'background'
+        log.warning("Slow query (%.0f ms, %s): %s", elapsed_ms, endpoint, normalized)
+
+
+class InstrumentedCursor:
+    """Cursor proxy that times execute()/executemany(); everything else passes through"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._cursor.close()
+
+    def _timed(self, method, operation, args, kwargs):
+        started = time.perf_counter()
+        try:
+            result = method(operation, *args, **kwargs)
+        except Exception:
+            record_query(operation, time.perf_counter() - started, error=True)
+            raise
+        # multi=True returns a lazy iterator, so this only times sending the batch
+        record_query(operation, time.perf_counter() - started)
+        return result
+
+    def execute(self, operation, *args, **kwargs):
+        return self._timed(self._cursor.execute, operation, args, kwargs)
+
+    def executemany(self, operation, *args, **kwargs):
+        return self._timed(self._cursor.executemany, operation, args, kwargs)
+
+
+# --- Requests ---
+
+def _start_request():
+    g._request_started = time.perf_counter()
+    g._query_stats = QueryStats()
+
+
+def _finish_request(response):
+    started = g.pop('_request_started', None)
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    stats = g.get('_query_stats') or QueryStats()
+    endpoint = request.endpoint or 'unmatched'
+
+    request_latency.observe(elapsed, method=request.method, endpoint=endpoint, status=response.status_code)
+    request_queries.observe(stats.count, endpoint=endpoint)
+    response.headers['Server-Timing'] = (
+        f'db;dur={stats.seconds * 1000:.1f};desc="{stats.count} queries", app;dur={elapsed * 1000:.1f}'
+    )
+
+    elapsed_ms = elapsed * 1000
+    if elapsed_ms >= SLOW_REQUEST_MS:
+        log.warning("Slow request (%.0f ms, %d queries, %.0f ms in db): %s %s -> %s", elapsed_ms, stats.count,
+                    stats.seconds * 1000, request.method, request.path, response.status_code)
+    else:
+        log.debug("%s %s -> %s in %.1f ms (%d queries)", request.method, request.path, response.status_code,
+                  elapsed_ms, stats.count)
+    return response
+
+
+def metrics_view():
+    if METRICS_TOKEN:
+        supplied = request.headers.get('Authorization', '').removeprefix('Bearer ')
+        if not hmac.compare_digest(supplied, METRICS_TOKEN):
+            return Response('Unauthorized\n', status=401, mimetype='text/plain')
+    return Response(render_metrics(), mimetype=PROMETHEUS_MIMETYPE)
+
+
+def configure_logging():
+    """Log to stderr at LOG_LEVEL unless the server (or a test) configured logging already"""
+    root = logging.getLogger()
+    if not root.handlers:
+        logging.basicConfig(level=LOG_LEVEL.upper(), format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+
+def init_metrics(app):
+    configure_logging()
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
@@ -0,0 +1,41 @@
+"""Apply database schema migrations
+
+    python migrate.py           apply pending migrations
+    python migrate.py status    list applied and pending migrations
+
+Run this once per deploy (before starting or reloading the web workers);
+the app itself only checks the schema version at startup.
+"""
+import argparse
+
+from migrations import applied_versions, apply_migrations, connect, create_database, discover_migrations
+
+def show_status():
+    create_database()
+    conn = connect()
+    cursor = conn.cursor()
+    applied = applied_versions(cursor)
+    conn.commit()
+    cursor.close()
+    conn.close()
+    for version, name in discover_migrations():
+        state = "applied" if version in applied else "pending"
+        print(f"{state:<8} {name}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply database schema migrations")
+    parser.add_argument('command', nargs='?', default='apply', choices=['apply', 'status'])
+    args = parser.parse_args()
+
+    if args.command == 'status':
+        show_status()
+        return
+
+    applied = apply_migrations()
+    if applied:
+        print(f"Applied {len(applied)} migration(s).")
+    else:
+        print("Database schema is up to date.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Tables as originally created by db.init_db() (absorbs add_bills_table.py)"""
+
+TABLES = {}
+
+TABLES['users'] = (
+    "CREATE TABLE IF NOT EXISTS `users` ("
+    "  `id` int(11) NOT NULL AUTO_INCREMENT,"
+    "  `username` varchar(50) NOT NULL,"
+    "  `email` varchar(100) NOT NULL,"
+    "  `password_hash` varchar(255) NOT NULL,"
+    "  `profile_pic` varchar(255) DEFAULT 'default.png',"
+    "  `created_at` timestamp DEFAULT CURRENT_TIMESTAMP,"
+    "  PRIMARY KEY (`id`),"
+    "  UNIQUE KEY `email` (`email`)"
+    ") ENGINE=InnoDB")
+
+TABLES['transactions'] = (
+    "CREATE TABLE IF NOT EXISTS `transactions` ("
+    "  `id` int(11) NOT NULL AUTO_INCREMENT,"
+    "  `user_id` int(11) NOT NULL,"
+    "  `type` ENUM('income', 'expense') NOT NULL,"
+    "  `category` varchar(50) NOT NULL,"
+    "  `amount` DECIMAL(10, 2) NOT NULL,"
+    "  `description` varchar(255),"
+    "  `date` DATE NOT NULL,"
+    "  `payment_method` varchar(50) DEFAULT 'Cash',"
+    "  `created_at` timestamp DEFAULT CURRENT_TIMESTAMP,"
+    "  PRIMARY KEY (`id`),"
+    "  FOREIGN KEY (`user_id`) REFERENCES `users` (`id`) ON DELETE CASCADE"
+    ") ENGINE=InnoDB")
+
+TABLES['goals'] = (
+    "CREATE TABLE IF NOT EXISTS `goals` ("
+    "  `id` int(11) NOT NULL AUTO_INCREMENT,"
+    "  `user_id` int(11) NOT NULL,"
+    "  `name` varchar(100) NOT NULL,"
+    "  `target_amount` DECIMAL(10, 2) NOT NULL,"
+    "  `current_amount` DECIMAL(10, 2) DEFAULT 0.00,"
+    "  `deadline` DATE,"
+    "  PRIMARY KEY (`id`),"
+    "  FOREIGN KEY (`user_id`) REFERENCES `users` (`id`) ON DELETE CASCADE"
+    ") ENGINE=InnoDB")
+
+TABLES['budgets'] = (
+    "CREATE TABLE IF NOT EXISTS `budgets` ("
+    "  `id` int(11) NOT NULL AUTO_INCREMENT,"
+    "  `user_id` int(11) NOT NULL,"
+    "  `category` varchar(50) NOT NULL,"
+    "  `limit_amount` DECIMAL(10, 2) NOT NULL,"
+    "  `month` VARCHAR(7) NOT NULL," # Format YYYY-MM
+    "  PRIMARY KEY (`id`),"
+    "  FOREIGN KEY (`user_id`) REFERENCES `users` (`id`) ON DELETE CASCADE"
+    ") ENGINE=InnoDB")
+
+TABLES['notifications'] = (
+    "CREATE TABLE IF NOT EXISTS `notifications` ("
+    "  `id` int(11) NOT NULL AUTO_INCREMENT,"
+    "  `user_id` int(11) NOT NULL,"
+    "  `message` varchar(255) NOT NULL,"
+    "  `type` ENUM('info', 'warning', 'danger', 'success') DEFAULT 'info',"
+    "  `is_read` BOOLEAN DEFAULT FALSE,"
+    "  `date` timestamp DEFAULT CURRENT_TIMESTAMP,"
+    "  PRIMARY KEY (`id`),"
+    "  FOREIGN KEY (`user_id`) REFERENCES `users` (`id`) ON DELETE CASCADE"
+    ") ENGINE=InnoDB")
+
+TABLES['bills'] = (
+    "CREATE TABLE IF NOT EXISTS `bills` ("
+    "  `id` int(11) NOT NULL AUTO_INCREMENT,"
+    "  `user_id` int(11) NOT NULL,"
+    "  `name` varchar(100) NOT NULL,"
+    "  `amount` DECIMAL(10, 2) NOT NULL,"
+    "  `due_date` DATE NOT NULL,"
+    "  `category` varchar(50) DEFAULT 'Other',"
+    "  `is_recurring` BOOLEAN DEFAULT FALSE,"
+    "  `recurrence` ENUM('weekly', 'monthly', 'yearly') DEFAULT 'monthly',"
+    "  `is_paid` BOOLEAN DEFAULT FALSE,"
+    "  `paid_date` DATE DEFAULT NULL,"
+    "  `created_at` timestamp DEFAULT CURRENT_TIMESTAMP,"
+    "  PRIMARY KEY (`id`),"
+    "  FOREIGN KEY (`user_id`) REFERENCES `users` (`id`) ON DELETE CASCADE"
+    ") ENGINE=InnoDB")
+
+def upgrade(cursor):
+    for table_description in TABLES.values():
+        cursor.execute(table_description)
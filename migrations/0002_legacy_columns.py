@@ -0,0 +1,10 @@
+"""Columns databases created before 0001's table definitions may lack
+
+Absorbs fix_profile.py, fix_db.py and fix_notifications.py.
+"""
+from migrations import add_column
+
+def upgrade(cursor):
+    add_column(cursor, 'users', 'profile_pic', "VARCHAR(255) DEFAULT 'default.png'")
+    add_column(cursor, 'transactions', 'payment_method', "VARCHAR(50) DEFAULT 'Cash'")
+    add_column(cursor, 'notifications', 'type', "ENUM('info', 'warning', 'danger', 'success') DEFAULT 'info' AFTER message")
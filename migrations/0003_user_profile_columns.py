@@ -0,0 +1,11 @@
+"""Profile fields and starting balance on users
+
+Absorbs fix_profile_v2.py and app.ensure_user_profile_columns().
+"""
+from migrations import add_column
+
+def upgrade(cursor):
+    add_column(cursor, 'users', 'phone', "VARCHAR(20) DEFAULT NULL")
+    add_column(cursor, 'users', 'job_title', "VARCHAR(100) DEFAULT NULL")
+    add_column(cursor, 'users', 'bio', "TEXT DEFAULT NULL")
+    add_column(cursor, 'users', 'initial_balance', "DECIMAL(12, 2) DEFAULT 0.00")
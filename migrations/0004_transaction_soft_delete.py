@@ -0,0 +1,5 @@
+"""Soft-delete flag on transactions (absorbs app.ensure_transaction_soft_delete())"""
+from migrations import add_column
+
+def upgrade(cursor):
+    add_column(cursor, 'transactions', 'is_deleted', "BOOLEAN DEFAULT FALSE")
@@ -0,0 +1,18 @@
+"""Sargable transaction filters (absorbs add_transaction_indexes.py)
+
+Non-null is_deleted, a stored normalized category and the composite indexes
+the hot queries rely on; check with check_query_plans.py.
+"""
+from migrations import add_column, add_index
+
+def upgrade(cursor):
+    # is_deleted = FALSE can only use an index once NULLs are gone
+    cursor.execute("UPDATE transactions SET is_deleted = FALSE WHERE is_deleted IS NULL")
+    cursor.execute("ALTER TABLE transactions MODIFY COLUMN is_deleted BOOLEAN NOT NULL DEFAULT FALSE")
+
+    add_column(cursor, 'transactions', 'category_norm', "VARCHAR(50) AS (LOWER(TRIM(category))) STORED AFTER category")
+
+    add_index(cursor, 'transactions', 'idx_tx_user_deleted_date', "(user_id, is_deleted, date)")
+    add_index(cursor, 'transactions', 'idx_tx_user_type_category_date', "(user_id, type, category_norm, date)")
+    add_index(cursor, 'notifications', 'idx_notif_user_date', "(user_id, date)")
+    add_index(cursor, 'budgets', 'idx_budget_user_month', "(user_id, month)")
@@ -0,0 +1,18 @@
+"""Per-user balance ledger maintained by ledger.py
+
+Rows are built lazily by ledger.get_balance(); `python ledger.py reconcile`
+fills them all at once.
+"""
+
+def upgrade(cursor):
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS `user_balances` ("
+        "  `user_id` int(11) NOT NULL,"
+        "  `initial_balance` DECIMAL(12, 2) NOT NULL DEFAULT 0.00,"
+        "  `total_income` DECIMAL(14, 2) NOT NULL DEFAULT 0.00,"
+        "  `total_expense` DECIMAL(14, 2) NOT NULL DEFAULT 0.00,"
+        "  `balance` DECIMAL(14, 2) AS (`initial_balance` + `total_income` - `total_expense`) STORED,"
+        "  `updated_at` timestamp DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,"
+        "  PRIMARY KEY (`user_id`),"
+        "  FOREIGN KEY (`user_id`) REFERENCES `users` (`id`) ON DELETE CASCADE"
+        ") ENGINE=InnoDB")
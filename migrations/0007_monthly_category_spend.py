@@ -0,0 +1,29 @@
+"""Monthly per-category spend rollup maintained by ledger.py, backfilled here"""
+
+def upgrade(cursor):
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS `monthly_category_spend` ("
+        "  `user_id` int(11) NOT NULL,"
+        "  `month` CHAR(7) NOT NULL," # Format YYYY-MM
+        "  `category_norm` varchar(50) NOT NULL," # LOWER(TRIM(category))
+        "  `type` ENUM('income', 'expense') NOT NULL,"
+        "  `total` DECIMAL(14, 2) NOT NULL DEFAULT 0.00," # Includes soft-deleted transactions
+        "  `count` int(11) NOT NULL DEFAULT 0,"
+        "  `deleted_total` DECIMAL(14, 2) NOT NULL DEFAULT 0.00,"
+        "  `deleted_count` int(11) NOT NULL DEFAULT 0,"
+        "  PRIMARY KEY (`user_id`, `month`, `category_norm`, `type`),"
+        "  FOREIGN KEY (`user_id`) REFERENCES `users` (`id`) ON DELETE CASCADE"
+        ") ENGINE=InnoDB")
+
+    # Rows written before this migration ran (or a partial earlier run) are rebuilt
+    cursor.execute("DELETE FROM monthly_category_spend")
+    cursor.execute("""
+        INSERT INTO monthly_category_spend
+            (user_id, month, category_norm, type, total, count, deleted_total, deleted_count)
+        SELECT user_id, DATE_FORMAT(date, '%Y-%m'), category_norm, type,
+               SUM(amount), COUNT(*),
+               COALESCE(SUM(CASE WHEN is_deleted THEN amount END), 0),
+               COALESCE(SUM(CASE WHEN is_deleted THEN 1 ELSE 0 END), 0)
+        FROM transactions
+        GROUP BY user_id, DATE_FORMAT(date, '%Y-%m'), category_norm, type
+    """)
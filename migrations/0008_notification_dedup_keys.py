@@ -0,0 +1,50 @@
+"""Structured notification dedup keys
+
+Alerts carry a dedup_key of the form rule:subject_id:period with a unique index
+on (user_id, dedup_key), so "already notified today" is enforced by the insert
+instead of a LIKE scan. Existing alerts get keys derived from their messages so
+today's alerts are not sent twice after deploying.
+"""
+from migrations import add_column, add_index
+
+DAY = "DATE_FORMAT(n.date, '%Y-%m-%d')"
+
+# UPDATE IGNORE leaves the later of two same-day duplicates without a key
+BACKFILLS = [
+    # Balance and daily-spending alerts are per user
+    f"""UPDATE IGNORE notifications n
+        SET n.dedup_key = CONCAT('balance_negative::', {DAY})
+        WHERE n.dedup_key IS NULL AND n.message LIKE '%balance is negative%'""",
+    f"""UPDATE IGNORE notifications n
+        SET n.dedup_key = CONCAT('balance_low::', {DAY})
+        WHERE n.dedup_key IS NULL AND n.message LIKE '%Low balance alert%'""",
+    f"""UPDATE IGNORE notifications n
+        SET n.dedup_key = CONCAT('daily_spending::', {DAY})
+        WHERE n.dedup_key IS NULL AND n.message LIKE '%High daily spending%'""",
+    # Budget alerts are per budget and level (the notification type)
+    f"""UPDATE IGNORE notifications n
+        JOIN budgets b ON b.user_id = n.user_id AND b.month = DATE_FORMAT(n.date, '%Y-%m')
+                      AND n.message LIKE CONCAT('%', b.category, '%')
+        SET n.dedup_key = CONCAT('budget_', n.type, ':', b.id, ':', {DAY})
+        WHERE n.dedup_key IS NULL
+          AND (n.message LIKE '%Budget exceeded%' OR n.message LIKE '%Budget warning%' OR n.message LIKE '%Heads up%')""",
+    f"""UPDATE IGNORE notifications n
+        JOIN goals g ON g.user_id = n.user_id AND n.message LIKE CONCAT('%Goal ''', g.name, ''' deadline%')
+        SET n.dedup_key = CONCAT('goal_deadline:', g.id, ':', {DAY})
+        WHERE n.dedup_key IS NULL""",
+    f"""UPDATE IGNORE notifications n
+        JOIN bills b ON b.user_id = n.user_id
+                    AND (n.message LIKE CONCAT('%OVERDUE: ', b.name, ' (%')
+                         OR n.message LIKE CONCAT('%DUE TODAY: ', b.name, ' (%')
+                         OR n.message LIKE CONCAT('%REMINDER: ', b.name, ' (%'))
+        SET n.dedup_key = CONCAT('bill_reminder:', b.id, ':', {DAY})
+        WHERE n.dedup_key IS NULL""",
+]
+
+def upgrade(cursor):
+    add_column(cursor, 'notifications', 'dedup_key', "VARCHAR(191) NULL AFTER type")
+    # Create the index first so the backfill's IGNORE can skip duplicates
+    add_index(cursor, 'notifications', 'uq_notif_user_dedup', "(user_id, dedup_key)", kind='UNIQUE INDEX')
+
+    for statement in BACKFILLS:
+        cursor.execute(statement)
@@ -0,0 +1,9 @@
+"""Per-user data version for cached reports
+
+Bumped (ledger.bump_data_version) whenever a user's transactions, budgets,
+bills or goals change; cached report artifacts are keyed by it.
+"""
+from migrations import add_column
+
+def upgrade(cursor):
+    add_column(cursor, 'users', 'data_version', "INT UNSIGNED NOT NULL DEFAULT 0")
@@ -0,0 +1,14 @@
+"""FULLTEXT search over transaction categories and descriptions
+
+search_text prefixes each row with a per-user token ("usr<id>") so a search
+can require it in BOOLEAN MODE: the full-text index then only yields the
+user's own rows instead of matching across every user and filtering after.
+FULLTEXT needs a STORED generated column. The first FULLTEXT index on a
+table adds FTS_DOC_ID and rebuilds it, so run this off-peak on big tables.
+"""
+from migrations import add_column, add_index
+
+def upgrade(cursor):
+    add_column(cursor, 'transactions', 'search_text',
+               "TEXT AS (CONCAT('usr', user_id, ' ', category, ' ', COALESCE(description, ''))) STORED")
+    add_index(cursor, 'transactions', 'ft_tx_search', "(search_text)", kind='FULLTEXT INDEX')
@@ -0,0 +1,9 @@
+"""When a user's data last changed (UTC), for Last-Modified on cached payloads
+
+Set together with data_version by ledger.bump_data_version(); NULL until the
+first change after this migration.
+"""
+from migrations import add_column
+
+def upgrade(cursor):
+    add_column(cursor, 'users', 'data_updated_at', "DATETIME NULL AFTER data_version")
@@ -0,0 +1,151 @@
+"""Versioned schema migrations
+
+Each migration is a module named NNNN_description.py with an upgrade(cursor)
+function. Applied versions are recorded in the schema_version table. Apply
+pending migrations out-of-band with `python migrate.py`; the app only checks
+the recorded version at startup (verify_schema).
+
+MySQL commits DDL implicitly, so migrations are written to be re-runnable:
+use the helpers below instead of bare ALTER TABLE statements.
+"""
+import importlib
+import os
+import re
+
+import mysql.connector
+
+from db import DB_CONFIG, DB_NAME
+
+MIGRATIONS_DIR = os.path.dirname(os.path.abspath(__file__))
+MIGRATION_FILE = re.compile(r'^(\d{4})_(\w+)\.py$')
+LOCK_NAME = 'finance_guru_migrations'
+
+SCHEMA_VERSION_TABLE = (
+    "CREATE TABLE IF NOT EXISTS `schema_version` ("
+    "  `version` int(11) NOT NULL,"
+    "  `name` varchar(255) NOT NULL,"
+    "  `applied_at` timestamp DEFAULT CURRENT_TIMESTAMP,"
+    "  PRIMARY KEY (`version`)"
+    ") ENGINE=InnoDB")
+
+
+class SchemaOutOfDate(Exception):
+    """Raised by verify_schema when migrations are pending"""
+
+
+# --- Helpers for migration modules ---
+
+def column_exists(cursor, table, column):
+    cursor.execute("""
+        SELECT 1 FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+    """, (table, column))
+    return bool(cursor.fetchall())
+
+def index_exists(cursor, table, index_name):
+    cursor.execute("""
+        SELECT 1 FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+    """, (table, index_name))
+    return bool(cursor.fetchall())
+
+def add_column(cursor, table, column, definition):
+    if not column_exists(cursor, table, column):
+        cursor.execute(f"ALTER TABLE `{table}` ADD COLUMN `{column}` {definition}")
+
+def add_index(cursor, table, index_name, columns, kind='INDEX'):
+    if not index_exists(cursor, table, index_name):
+        cursor.execute(f"ALTER TABLE `{table}` ADD {kind} `{index_name}` {columns}")
+
+
+# --- Runner ---
+
+def discover_migrations():
+    """[(version, name)] for every migration file, in order"""
+    found = []
+    for filename in os.listdir(MIGRATIONS_DIR):
+        match = MIGRATION_FILE.match(filename)
+        if match:
+            found.append((int(match.group(1)), filename[:-3]))
+    return sorted(found)
+
+def latest_version():
+    migrations = discover_migrations()
+    return migrations[-1][0] if migrations else 0
+
+def connect(use_database=True):
+    """Dedicated connection for migrations
+
+    Warnings are not raised here: IF NOT EXISTS statements emit a note when
+    the object already exists.
+    """
+    args = dict(DB_CONFIG, raise_on_warnings=False, buffered=True)
+    if use_database:
+        args['database'] = DB_NAME
+    return mysql.connector.connect(**args)
+
+def create_database():
+    cnx = connect(use_database=False)
+    cursor = cnx.cursor()
+    try:
+        cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{DB_NAME}` DEFAULT CHARACTER SET 'utf8'")
+    finally:
+        cursor.close()
+        cnx.close()
+
+def applied_versions(cursor):
+    cursor.execute(SCHEMA_VERSION_TABLE)
+    cursor.execute("SELECT version FROM schema_version")
+    return {row[0] for row in cursor.fetchall()}
+
+def pending_migrations(cursor):
+    applied = applied_versions(cursor)
+    return [(version, name) for version, name in discover_migrations() if version not in applied]
+
+def apply_migrations(verbose=True):
+    """Create the database if needed and apply every pending migration in order"""
+    create_database()
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute("SELECT GET_LOCK(%s, 60)", (LOCK_NAME,))
+    if cursor.fetchone()[0] != 1:
+        raise RuntimeError("Another migration run holds the lock")
+
+    applied = []
+    try:
+        for version, name in pending_migrations(cursor):
+            if verbose:
+                print(f"Applying {name}...", end=' ', flush=True)
+            module = importlib.import_module(f"{__name__}.{name}")
+            module.upgrade(cursor)
+            cursor.execute("INSERT INTO schema_version (version, name) VALUES (%s, %s)", (version, name))
+            conn.commit()
+            applied.append(name)
+            if verbose:
+                print("OK")
+    finally:
+        cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+        cursor.fetchall()
+        cursor.close()
+        conn.close()
+    return applied
+
+def verify_schema():
+    """Check the recorded schema version in a single query, without touching the pool
+
+    Raises SchemaOutOfDate if migrations are pending.
+    """
+    expected = latest_version()
+    cnx = connect()
+    cursor = cnx.cursor()
+    try:
+        cursor.execute("SELECT MAX(version) FROM schema_version")
+        current = cursor.fetchone()[0] or 0
+    except mysql.connector.Error as err:
+        raise SchemaOutOfDate(f"No schema_version table ({err.msg}); run `python migrate.py`") from err
+    finally:
+        cursor.close()
+        cnx.close()
+    if current < expected:
+        raise SchemaOutOfDate(f"Schema is at version {current}, code expects {expected}; run `python migrate.py`")
+    return current
@@ -0,0 +1,227 @@
+"""Notification writes and the cached notification bell
+
+Every notification INSERT goes through notify() and every read/delete path calls
+invalidate_notifications(), so the per-user summary (latest NOTIFICATION_LIMIT rows
+plus the unread count) can be served from cache by inject_notifications and
+/api/notifications.
+
+Changes are also published to an in-process broker; open /api/notifications/stream
+connections (Server-Sent Events) wake up and push the new summary to the browser.
+"""
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from datetime import date
+
+import mysql.connector
+from flask import g, has_app_context
+from mysql.connector import errorcode
+
+from cache import make_cache
+from db import get_db_connection
+
+NOTIFICATION_LIMIT = 20
+
+# Seconds between keepalive comments, and before a stream is closed for the client to reconnect
+STREAM_KEEPALIVE = int(os.environ.get('NOTIFICATION_STREAM_KEEPALIVE', 25))
+STREAM_LIFETIME = int(os.environ.get('NOTIFICATION_STREAM_LIFETIME', 300))
+
+_cache = make_cache(
+    'notifications',
+    maxsize=int(os.environ.get('NOTIFICATION_CACHE_SIZE', 1024)),
+    ttl=int(os.environ.get('NOTIFICATION_CACHE_TTL', 30))
+)
+
+
+class NotificationBroker:
+    """Per-user pub/sub for the streams open in this worker"""
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        q = queue.Queue(maxsize=1)
+        with self._lock:
+            self._subscribers[user_id].add(q)
+        return q
+
+    def unsubscribe(self, user_id, q):
+        with self._lock:
+            subscribers = self._subscribers.get(user_id)
+            if subscribers is not None:
+                subscribers.discard(q)
+                if not subscribers:
+                    del self._subscribers[user_id]
+
+    def publish(self, user_id):
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for q in subscribers:
+            try:
+                q.put_nowait(True)
+            except queue.Full:
+                pass  # Already woken up; it reloads the latest summary anyway
+
+    def stats(self):
+        with self._lock:
+            return {
+                'users': len(self._subscribers),
+                'streams': sum(len(s) for s in self._subscribers.values())
+            }
+
+
+broker = NotificationBroker()
+
+
+def make_dedup_key(rule, subject_id='', period=None):
+    """Key for an alert that should be sent at most once per (rule, subject, period); period defaults to today"""
+    if period is None:
+        period = date.today().isoformat()
+    return f"{rule}:{subject_id}:{period}"
+
+
+def notify(cursor, user_id, message, notif_type='info', dedup_key=None):
+    """Insert a notification on `cursor` and return 1, or 0 if `dedup_key` was already used; the caller commits"""
+    try:
+        cursor.execute(
+            "INSERT INTO notifications (user_id, message, type, dedup_key) VALUES (%s, %s, %s, %s)",
+            (user_id, message, notif_type, dedup_key)
+        )
+    except mysql.connector.IntegrityError as err:
+        # Unique (user_id, dedup_key): only the statement is rolled back
+        if dedup_key is None or err.errno != errorcode.ER_DUP_ENTRY:
+            raise
+        return 0
+    invalidate_notifications(user_id)
+    return 1
+
+
+def invalidate_notifications(user_id):
+    """Drop the cached summary now, and publish once the request's transaction is done
+
+    Outside a request the caller commits and then calls publish_notifications().
+    """
+    _cache.delete(user_id)
+    if has_app_context():
+        # A concurrent request may re-cache the pre-commit rows before we commit
+        g.setdefault('_notified_users', set()).add(user_id)
+
+
+def publish_notifications(user_id):
+    """Drop the cached summary and wake the user's open streams"""
+    _cache.delete(user_id)
+    broker.publish(user_id)
+
+
+def _invalidate_after_request(exception=None):
+    for user_id in g.pop('_notified_users', ()):
+        publish_notifications(user_id)
+
+
+LATEST_QUERY = "SELECT * FROM notifications WHERE user_id = %s ORDER BY date DESC LIMIT %s"
+UNREAD_COUNT_QUERY = "SELECT COUNT(*) as count FROM notifications WHERE user_id = %s AND is_read = FALSE"
+
+
+def get_notification_summary(user_id, limit=NOTIFICATION_LIMIT):
+    """(latest notifications, unread count) for the bell, read through the cache"""
+    summary = cached_summary(user_id)
+    if summary is None:
+        summary = _load_summary(user_id)
+        if summary is None:
+            return [], 0  # No database connection; not cached, so the next call retries
+        cache_summary(user_id, summary)
+    return copy_summary(summary, limit)
+
+
+def cached_summary(user_id):
+    return _cache.get(user_id)
+
+
+def cache_summary(user_id, summary):
+    _cache.set(user_id, summary)
+
+
+def copy_summary(summary, limit=NOTIFICATION_LIMIT):
+    notifs, unread_count = summary
+    # Callers reformat fields in place, so hand out copies
+    return [dict(n) for n in notifs[:limit]], unread_count
+
+
+def _load_summary(user_id):
+    """The summary from the primary, or None without a connection
+
+    A miss usually follows an invalidation, and the result is cached for the
+    TTL: a lagging replica would pin the pre-change summary for that long.
+    """
+    conn = get_db_connection()
+    if conn is None:
+        return None
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(LATEST_QUERY, (user_id, NOTIFICATION_LIMIT))
+        notifs = cursor.fetchall()
+        cursor.execute(UNREAD_COUNT_QUERY, (user_id,))
+        res = cursor.fetchone()
+        return notifs, res['count'] if res else 0
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def notifications_payload(notifs, unread_count):
+    """JSON body for /api/notifications and the stream"""
+    for n in notifs:
+        if n.get('date'):
+            n['date'] = n['date'].strftime('%Y-%m-%d %H:%M')
+    return {'notifications': notifs, 'unread_count': unread_count}
+
+
+def payload_etag(payload):
+    body = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha1(body.encode()).hexdigest()
+
+
+def stream_notifications(user_id, last_event_id=None):
+    """Server-Sent Events for one browser tab; yields only when the summary changes
+
+    Runs outside the request context, so each reload checks out (and returns) its
+    own pooled connection instead of holding one for the life of the stream.
+    """
+    q = broker.subscribe(user_id)
+    deadline = time.monotonic() + STREAM_LIFETIME
+    last_tag = last_event_id
+    try:
+        yield "retry: 5000\n\n"  # Milliseconds before the browser reconnects
+        while True:
+            payload = notifications_payload(*get_notification_summary(user_id))
+            tag = payload_etag(payload)
+            if tag != last_tag:
+                yield f"id: {tag}\nevent: notifications\ndata: {json.dumps(payload, default=str)}\n\n"
+                last_tag = tag
+
+            if time.monotonic() >= deadline:
+                return
+            try:
+                q.get(timeout=STREAM_KEEPALIVE)
+            except queue.Empty:
+                # Also picks up changes made by other workers once the cache entry expires
+                yield ": keepalive\n\n"
+    finally:
+        broker.unsubscribe(user_id, q)
+
+
+def cache_stats():
+    return _cache.stats()
+
+
+def stream_stats():
+    return broker.stats()
+
+
+def init_notifications(app):
+    app.teardown_appcontext(_invalidate_after_request)
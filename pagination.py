@@ -0,0 +1,114 @@
+"""Keyset (seek) pagination over a user's transactions
+
+Pages are ordered newest first by (date, id). Instead of OFFSET, each page
+starts after the last row of the previous one, so page N costs the same as
+page 1 however deep the user scrolls. The position is handed to the client as
+an opaque cursor (base64 of "date:id"). InnoDB secondary indexes end with the
+primary key, so idx_tx_user_deleted_date is effectively (user_id, is_deleted,
+date, id) and serves both the seek and the ORDER BY without a filesort.
+"""
+import base64
+import binascii
+from datetime import date
+from decimal import Decimal
+
+from ledger import month_range
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Columns the API may project; id and date are always returned since the cursor needs them
+LISTING_COLUMNS = ('id', 'date', 'type', 'category', 'amount', 'description', 'payment_method')
+
+
+class PaginationError(ValueError):
+    """Raised for a malformed cursor or filter (shown to the API client)"""
+
+
+def encode_cursor(row):
+    return base64.urlsafe_b64encode(f"{row['date'].isoformat()}:{row['id']}".encode()).decode()
+
+
+def decode_cursor(token):
+    """(date, id) from a cursor token"""
+    try:
+        day, row_id = base64.urlsafe_b64decode(token.encode()).decode().split(':')
+        return date.fromisoformat(day), int(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise PaginationError("Invalid cursor")
+
+
+def parse_columns(fields):
+    """Projected columns from a comma-separated `fields` arg (all columns if empty)"""
+    if not fields:
+        return list(LISTING_COLUMNS)
+    requested = [f.strip() for f in fields.split(',') if f.strip()]
+    unknown = [f for f in requested if f not in LISTING_COLUMNS]
+    if unknown:
+        raise PaginationError(f"Unknown fields: {', '.join(unknown)}")
+    return [c for c in LISTING_COLUMNS if c in ('id', 'date') or c in requested]
+
+
+def parse_page_size(value):
+    if value in (None, ''):
+        return PAGE_SIZE
+    try:
+        size = int(value)
+    except ValueError:
+        raise PaginationError("limit must be a number")
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def fetch_transactions_page(cursor, user_id, month=None, tx_type=None, category=None, payment_method=None,
+                            columns=LISTING_COLUMNS, after=None, limit=PAGE_SIZE):
+    """One page of non-deleted transactions, newest first; returns (rows, next cursor or None)
+
+    `cursor` must return dict rows; `after` is a token from a previous page.
+    """
+    clauses = ["user_id = %s", "is_deleted = FALSE"]
+    params = [user_id]
+    if month:
+        try:
+            month_start, month_end = month_range(month)
+        except ValueError:
+            raise PaginationError("month must look like 2024-01")
+        clauses.append("date >= %s AND date < %s")
+        params += [month_start, month_end]
+    if tx_type:
+        if tx_type not in ('income', 'expense'):
+            raise PaginationError("type must be income or expense")
+        clauses.append("type = %s")
+        params.append(tx_type)
+    if category:
+        clauses.append("category_norm = LOWER(TRIM(%s))")
+        params.append(category)
+    if payment_method:
+        clauses.append("payment_method = %s")
+        params.append(payment_method)
+    if after:
+        # (date, id) < (last date, last id), written so the date bound is an index range
+        last_date, last_id = decode_cursor(after)
+        clauses.append("date <= %s AND (date < %s OR id < %s)")
+        params += [last_date, last_date, last_id]
+
+    cursor.execute(
+        f"SELECT {', '.join(columns)} FROM transactions WHERE {' AND '.join(clauses)} "
+        "ORDER BY date DESC, id DESC LIMIT %s",
+        (*params, limit + 1)
+    )
+    rows = cursor.fetchall()
+    # One extra row tells whether another page exists without a COUNT(*)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1])
+    return rows, None
+
+
+def serialize_row(row):
+    """JSON-ready copy of a transaction row (ISO dates, float amounts)"""
+    out = dict(row)
+    if isinstance(out.get('date'), date):
+        out['date'] = out['date'].isoformat()
+    if isinstance(out.get('amount'), Decimal):
+        out['amount'] = float(out['amount'])
+    return out
@@ -0,0 +1,170 @@
+"""Password hashing with a tunable KDF, run on a bounded thread pool
+
+Hashes are werkzeug strings ("scrypt:32768:8:1$salt$hash" or
+"pbkdf2:sha256:600000$salt$hash"). Each one names the method and cost it was
+made with, so PASSWORD_METHOD can be raised later without breaking stored
+hashes. verify_password() reads the method from the stored hash, and
+needs_rehash() is true for any hash made with a different method or cost.
+Login then stores a fresh hash. Hashes from before this module are unsalted
+SHA-256 hex digests. They still verify and are upgraded the same way.
+
+A KDF hash takes tens of milliseconds of CPU. hashlib releases the GIL while
+hashing, so the work runs on PASSWORD_WORKERS threads and can use a spare
+core. At most PASSWORD_MAX_PENDING hashes may be running or waiting.
+Past that, or after PASSWORD_TIMEOUT seconds, callers get PasswordBusy
+instead of tying up a request thread. Set PASSWORD_WORKERS=0 to hash inline.
+"""
+import hashlib
+import hmac
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+log = logging.getLogger(__name__)
+
+PASSWORD_METHOD = os.environ.get('PASSWORD_METHOD', 'scrypt:32768:8:1')
+PASSWORD_WORKERS = int(os.environ.get('PASSWORD_WORKERS', 2))
+PASSWORD_MAX_PENDING = int(os.environ.get('PASSWORD_MAX_PENDING', 32))
+PASSWORD_TIMEOUT = float(os.environ.get('PASSWORD_TIMEOUT', 10))
+
+_LEGACY_RE = re.compile(r'[0-9a-f]{64}')
+
+
+class PasswordBusy(Exception):
+    """Raised when too many hashes are queued or one timed out"""
+
+
+def is_legacy_hash(stored):
+    """True for an unsalted SHA-256 hex digest from before KDF hashing"""
+    return bool(stored) and _LEGACY_RE.fullmatch(stored) is not None
+
+
+def needs_rehash(stored, method=PASSWORD_METHOD):
+    """True if `stored` was not made with `method` at its current cost"""
+    return not stored.startswith(method + '$')
+
+
+def _check(stored, password):
+    if is_legacy_hash(stored):
+        return hmac.compare_digest(stored, hashlib.sha256(password.encode()).hexdigest())
+    return check_password_hash(stored, password)
+
+
+class PasswordHasher:
+    def __init__(self, method=PASSWORD_METHOD, workers=PASSWORD_WORKERS, max_pending=PASSWORD_MAX_PENDING,
+                 timeout=PASSWORD_TIMEOUT):
+        self.method = method
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._dummy_hash = None
+        self.stats = {'hashed': 0, 'verified': 0, 'rejected': 0, 'rehashed': 0, 'busy': 0,
+                      'total_ms': 0.0, 'max_ms': 0.0}
+
+    def _get_executor(self):
+        with self._lock:
+            # Threads don't survive a fork, so each gunicorn worker starts its own pool
+            if self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='password')
+                self._pid = os.getpid()
+            return self._executor
+
+    def _timed(self, fn, *args):
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self.stats['total_ms'] += elapsed_ms
+                self.stats['max_ms'] = max(self.stats['max_ms'], elapsed_ms)
+
+    def _run(self, fn, *args):
+        if self.workers <= 0:
+            return self._timed(fn, *args)
+        if not self._slots.acquire(blocking=False):
+            self._count('busy')
+            raise PasswordBusy("Too many password hashes pending")
+        try:
+            future = self._get_executor().submit(self._timed, fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        # The slot is freed when the hash finishes, even if the caller gave up on it
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            self._count('busy')
+            log.warning("Password hash took longer than %ss", self.timeout)
+            raise PasswordBusy("Password hash timed out")
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def hash(self, password):
+        hashed = self._run(generate_password_hash, password, self.method)
+        self._count('hashed')
+        return hashed
+
+    def verify(self, stored, password):
+        """True if `password` matches `stored`; a missing hash still costs one hash so timing is the same"""
+        if not stored:
+            if self._dummy_hash is None:
+                self._dummy_hash = self._run(generate_password_hash, '', self.method)
+            self._run(_check, self._dummy_hash, password)
+            self._count('rejected')
+            return False
+        ok = self._run(_check, stored, password)
+        self._count('verified' if ok else 'rejected')
+        return ok
+
+    def verify_and_update(self, stored, password):
+        """(matches, new hash or None); the new hash replaces a legacy or outdated one"""
+        if not self.verify(stored, password):
+            return False, None
+        if not needs_rehash(stored, self.method):
+            return True, None
+        new_hash = self.hash(password)
+        self._count('rehashed')
+        return True, new_hash
+
+    def status(self):
+        with self._lock:
+            stats = dict(self.stats)
+        calls = stats['hashed'] + stats['verified'] + stats['rejected']
+        stats['avg_ms'] = round(stats.pop('total_ms') / calls, 2) if calls else 0.0
+        stats['max_ms'] = round(stats['max_ms'], 2)
+        stats['workers'] = self.workers
+        stats['method'] = self.method.split(':', 1)[0]
+        return stats
+
+
+hasher = PasswordHasher()
+
+
+def hash_password(password):
+    return hasher.hash(password)
+
+
+def check_password(stored, password):
+    """True if `password` matches `stored`, without upgrading the hash"""
+    return hasher.verify(stored, password)
+
+
+def verify_password(stored, password):
+    """(matches, new hash or None) for a login; store the new hash when there is one"""
+    return hasher.verify_and_update(stored, password)
+
+
+def password_stats():
+    return hasher.status()
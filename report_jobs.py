@@ -0,0 +1,249 @@
+"""Background report generation with an on-disk result cache
+
+/download_report hands the work to a small thread pool and returns a job id;
+the report page polls /api/reports/<job_id> and downloads the finished file
+from /reports/<job_id>/download. Artifacts are stored under REPORT_CACHE_DIR
+keyed by (user, type, users.data_version), so asking again before anything
+changed is served straight from disk. Superseded versions and files past
+REPORT_CACHE_MAX_AGE / REPORT_CACHE_MAX_BYTES are evicted after each job.
+
+Job ids are "<type>-v<version>" and are only looked up for the session's user.
+The cache directory is shared, so any gunicorn worker can serve a finished
+artifact; progress is only known to the worker running the job. Other workers
+see a job as running while its .part file exists. The running job touches
+that file as it makes progress, so a .part left untouched for
+REPORT_JOB_TIMEOUT (its worker was killed or recycled) counts as failed and
+is deleted by evict().
+"""
+import glob
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from reports import REPORT_FORMATS, remove_file
+
+log = logging.getLogger(__name__)
+
+REPORT_CACHE_DIR = os.environ.get('REPORT_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'finance_guru_reports'))
+REPORT_JOB_WORKERS = int(os.environ.get('REPORT_JOB_WORKERS', 2))
+REPORT_CACHE_MAX_AGE = int(os.environ.get('REPORT_CACHE_MAX_AGE', 24 * 3600))
+REPORT_CACHE_MAX_BYTES = int(os.environ.get('REPORT_CACHE_MAX_BYTES', 1024 ** 3))
+REPORT_JOB_TIMEOUT = int(os.environ.get('REPORT_JOB_TIMEOUT', 1800))
+
+# Seconds between touches of a running job's .part file
+PART_HEARTBEAT = 30
+
+# Finished jobs are forgotten after this long; their artifacts stay on disk
+JOB_RETENTION = 3600
+
+
+class ReportJob:
+    def __init__(self, user_id, report_type, version, status='queued'):
+        self.user_id = user_id
+        self.report_type = report_type
+        self.version = version
+        self.status = status
+        self.done = 0
+        self.total = None
+        self.error = None
+        self.finished_at = time.time() if status == 'done' else None
+
+    @property
+    def job_id(self):
+        return f"{self.report_type}-v{self.version}"
+
+    @property
+    def progress(self):
+        if self.status == 'done':
+            return 100
+        if not self.total:
+            return 0
+        return min(99, int(self.done * 100 / self.total))
+
+    def to_dict(self):
+        return {
+            'job_id': self.job_id,
+            'type': self.report_type,
+            'status': self.status,
+            'progress': self.progress,
+            'error': self.error
+        }
+
+
+def parse_job_id(job_id):
+    """(type, version) from a job id, or None if it is malformed"""
+    report_type, sep, version = job_id.rpartition('-v')
+    if not sep or report_type not in REPORT_FORMATS or not version.isdigit():
+        return None
+    return report_type, int(version)
+
+
+class ReportJobQueue:
+    def __init__(self, cache_dir=REPORT_CACHE_DIR, workers=REPORT_JOB_WORKERS):
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self._jobs = {}  # (user_id, job_id) -> ReportJob
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self.stats = {'submitted': 0, 'cache_hits': 0, 'completed': 0, 'failed': 0, 'evicted': 0}
+
+    def artifact_path(self, user_id, report_type, version):
+        return os.path.join(self.cache_dir, f"{user_id}-{report_type}-{version}{REPORT_FORMATS[report_type].suffix}")
+
+    def _get_executor(self):
+        # Executor threads don't survive a fork, so each gunicorn worker makes its own
+        if self._pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='report-job')
+            self._pid = os.getpid()
+            self._jobs = {}
+        return self._executor
+
+    def submit(self, user_id, report_type, version):
+        """Return the job for this (user, type, version), starting one unless it is cached or running"""
+        path = self.artifact_path(user_id, report_type, version)
+        with self._lock:
+            executor = self._get_executor()
+            key = (user_id, f"{report_type}-v{version}")
+            job = self._jobs.get(key)
+            if job is not None and job.status in ('queued', 'running'):
+                return job
+
+            if os.path.exists(path):
+                os.utime(path)  # Eviction is least-recently-used
+                self.stats['cache_hits'] += 1
+                return ReportJob(user_id, report_type, version, status='done')
+
+            job = ReportJob(user_id, report_type, version)
+            self._jobs[key] = job
+            self.stats['submitted'] += 1
+        executor.submit(self._run, job, path)
+        return job
+
+    def get(self, user_id, job_id):
+        """The user's job, or a stand-in for one finished or running in another worker; None if unknown"""
+        with self._lock:
+            job = self._jobs.get((user_id, job_id))
+        if job is not None:
+            return job
+
+        parsed = parse_job_id(job_id)
+        if parsed is None:
+            return None
+        path = self.artifact_path(user_id, *parsed)
+        if os.path.exists(path):
+            return ReportJob(user_id, *parsed, status='done')
+        ages = [time.time() - mtime for mtime in self._part_mtimes(path)]
+        if any(age <= REPORT_JOB_TIMEOUT for age in ages):
+            return ReportJob(user_id, *parsed, status='running')
+        if ages:
+            # Only abandoned .part files: the worker running the job is gone
+            job = ReportJob(user_id, *parsed, status='failed')
+            job.error = 'Report generation was interrupted'
+            return job
+        return None
+
+    def _part_mtimes(self, path):
+        mtimes = []
+        for part in glob.glob(glob.escape(path) + '.*.part'):
+            try:
+                mtimes.append(os.path.getmtime(part))
+            except OSError:
+                pass  # Finished or removed meanwhile
+        return mtimes
+
+    def _run(self, job, path):
+        report_format = REPORT_FORMATS[job.report_type]
+        part = f"{path}.{uuid.uuid4().hex}.part"
+        touched = time.monotonic()
+
+        def progress(done, total):
+            nonlocal touched
+            job.done, job.total = done, total
+            # Tells other workers (and evict) that the job is still alive
+            if time.monotonic() - touched >= PART_HEARTBEAT:
+                touched = time.monotonic()
+                try:
+                    os.utime(part)
+                except OSError:
+                    pass  # Some writers only create the file when they save it
+
+        job.status = 'running'
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            report_format.write(job.user_id, part, progress=progress, min_version=job.version)
+            os.replace(part, path)
+            job.status = 'done'
+            self.stats['completed'] += 1
+        except Exception:
+            log.exception("Error generating %s report for user %s", job.report_type, job.user_id)
+            remove_file(part)
+            job.status = 'failed'
+            job.error = 'Could not generate the report'
+            self.stats['failed'] += 1
+        job.finished_at = time.time()
+
+        try:
+            self.evict()
+        except Exception:
+            log.exception("Error evicting report artifacts")
+
+    def evict(self, max_age=REPORT_CACHE_MAX_AGE, max_bytes=REPORT_CACHE_MAX_BYTES):
+        """Drop superseded, expired and least recently used artifacts (over max_bytes), and abandoned .part files"""
+        now = time.time()
+        latest = {}
+        artifacts = []
+        removed = 0
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if name.endswith('.part'):
+                if now - stat.st_mtime > REPORT_JOB_TIMEOUT:
+                    remove_file(path)
+                    removed += 1
+                continue
+            stem = os.path.splitext(name)[0]
+            user_id, report_type, version = stem.rsplit('-', 2) if stem.count('-') >= 2 else (None, None, '')
+            if not version.isdigit():
+                continue
+            series = (user_id, report_type)
+            latest[series] = max(latest.get(series, -1), int(version))
+            artifacts.append((stat.st_mtime, stat.st_size, path, series, int(version)))
+
+        keep = []
+        for mtime, size, path, series, version in artifacts:
+            if version < latest[series] or now - mtime > max_age:
+                remove_file(path)
+                removed += 1
+            else:
+                keep.append((mtime, size, path))
+
+        total = sum(size for _, size, _ in keep)
+        for mtime, size, path in sorted(keep):
+            if total <= max_bytes:
+                break
+            remove_file(path)
+            total -= size
+            removed += 1
+
+        with self._lock:
+            self.stats['evicted'] += removed
+            # Forget finished jobs; their artifacts (if any) are found on disk
+            for key, job in list(self._jobs.items()):
+                if job.finished_at and now - job.finished_at > JOB_RETENTION:
+                    del self._jobs[key]
+        return removed
+
+    def status(self):
+        with self._lock:
+            return dict(self.stats, active=sum(1 for j in self._jobs.values() if j.status in ('queued', 'running')))
+
+
+report_jobs = ReportJobQueue()
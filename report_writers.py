@@ -0,0 +1,247 @@
+"""Excel and PDF report writers (pandas, fpdf and openpyxl)
+
+Imported lazily through reports.REPORT_FORMATS, so keep app-level modules
+from importing this one directly. Workbooks are written in openpyxl's
+write-only mode; PDFs are rendered a batch at a time with the columns
+formatted by pandas.
+"""
+import logging
+import os
+import threading
+from datetime import date
+
+import pandas as pd
+from fpdf import FPDF
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+from reports import (BILL_COLUMNS, BUDGET_COLUMNS, REPORT_BATCH_SIZE, TOTALS_QUERY, TRANSACTION_COLUMNS,
+                     fetch_bill_rows, fetch_budget_rows, iter_transaction_batches, open_report_connection,
+                     track_progress)
+
+log = logging.getLogger(__name__)
+
+LOGO_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'logo.png')
+DESCRIPTION_WIDTH = 35
+
+
+def _append_header(ws, columns):
+    bold = Font(bold=True)
+    cells = []
+    for name in columns:
+        cell = WriteOnlyCell(ws, value=name)
+        cell.font = bold
+        cells.append(cell)
+    ws.append(cells)
+
+
+def write_excel_report(user_id, path, batch_size=REPORT_BATCH_SIZE, progress=None, min_version=None):
+    """Write the Transactions/Budgets/Bills workbook for `user_id` to `path`
+
+    progress(done, total), if given, is called after each batch of transactions.
+    min_version is the users.data_version the report is cached under (see open_report_connection).
+    """
+    conn = open_report_connection(user_id, min_version)
+
+    wb = Workbook(write_only=True)
+    try:
+        advance = track_progress(conn, user_id, progress)
+        ws = wb.create_sheet('Transactions')
+        _append_header(ws, TRANSACTION_COLUMNS)
+        for rows in iter_transaction_batches(conn, user_id, batch_size):
+            for row in rows:
+                ws.append(row)
+            advance(len(rows))
+
+        # Small tables, read once the transaction stream is finished
+        budgets = fetch_budget_rows(conn, user_id)
+        bills = fetch_bill_rows(conn, user_id)
+    finally:
+        conn.close()
+
+    for title, columns, rows in (('Budgets', BUDGET_COLUMNS, budgets), ('Bills', BILL_COLUMNS, bills)):
+        if rows:
+            ws = wb.create_sheet(title)
+            _append_header(ws, columns)
+            for row in rows:
+                ws.append(row)
+
+    wb.save(path)
+
+
+# --- PDF ---
+
+_logo = None
+_logo_lock = threading.Lock()
+
+
+def _decoded_logo(pdf):
+    """The logo as parsed by FPDF, decoded once per process (None if missing)"""
+    global _logo
+    if _logo is None:
+        with _logo_lock:
+            if _logo is None:
+                try:
+                    _logo = pdf._parsepng(LOGO_PATH)
+                except Exception as e:
+                    log.warning("Report logo unavailable: %s", e)
+                    _logo = False
+    return _logo or None
+
+
+class ReportPDF(FPDF):
+    def header(self):
+        # Accent Color Line
+        self.set_fill_color(114, 105, 227) # Primary
+        self.rect(0, 0, 210, 5, 'F')
+
+        self.set_y(15)
+        logo = _decoded_logo(self)
+        if logo:
+            if LOGO_PATH not in self.images:
+                # FPDF drops the image data once written, so each document gets its own copy
+                self.images[LOGO_PATH] = dict(logo, i=len(self.images) + 1)
+            self.image(LOGO_PATH, 10, 10, 30)
+
+        self.set_font('Arial', 'B', 20)
+        self.set_text_color(30, 41, 59)
+        self.cell(0, 10, 'Finance Report', 0, 1, 'C')
+
+        self.set_font('Arial', 'I', 10)
+        self.set_text_color(100, 116, 139)
+        self.cell(0, 5, f'Generated on {date.today().strftime("%B %d, %Y")}', 0, 1, 'C')
+        self.ln(15)
+
+    def footer(self):
+        self.set_y(-15)
+        self.set_font('Arial', 'I', 8)
+        self.set_text_color(148, 163, 184)
+        self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
+
+    def section_title(self, title):
+        self.set_font('Arial', 'B', 14)
+        self.set_text_color(114, 105, 227)
+        self.cell(0, 10, title, 0, 1, 'L')
+        self.line(10, self.get_y(), 200, self.get_y())
+        self.ln(5)
+
+    def table_header(self, headers, widths):
+        self.set_font('Arial', 'B', 10)
+        self.set_fill_color(241, 245, 249)
+        self.set_text_color(51, 65, 85)
+        for i, h in enumerate(headers):
+            self.cell(widths[i], 10, h, 0, 0, 'L', True)
+        self.ln()
+
+    def table_rows(self, rows, widths, fill=False):
+        """Draw pre-formatted rows with alternating fill; returns the fill for the next row"""
+        # Set once per batch: add_page() restores font and colours after header/footer
+        self.set_font('Arial', '', 9)
+        self.set_fill_color(248, 250, 252)
+        self.set_text_color(51, 65, 85)
+        for row in rows:
+            for width, text in zip(widths, row):
+                self.cell(width, 9, text, 0, 0, 'L', fill)
+            self.ln()
+            fill = not fill
+        return fill
+
+
+def pdf_text(series):
+    """Strings FPDF's core fonts can encode (latin-1), e.g. ₹ becomes ?"""
+    return series.fillna('').astype(str).str.encode('latin-1', 'replace').str.decode('latin-1')
+
+
+def money(series, decimals=2):
+    return 'Rs ' + series.astype(float).map(f'{{:,.{decimals}f}}'.format)
+
+
+def format_transaction_rows(rows):
+    """Date, category, description, type and amount columns for one batch"""
+    df = pd.DataFrame.from_records(rows, columns=TRANSACTION_COLUMNS)
+    description = pdf_text(df['description'])
+    too_long = description.str.len() > DESCRIPTION_WIDTH
+    description = description.where(~too_long, description.str[:DESCRIPTION_WIDTH] + '..')
+    return zip(
+        df['date'].astype(str),
+        pdf_text(df['category']),
+        description,
+        df['type'].str.title(),
+        money(df['amount'])
+    )
+
+
+def write_pdf_report(user_id, path, batch_size=REPORT_BATCH_SIZE, progress=None, min_version=None):
+    """Write the PDF report for `user_id` to `path`; progress and min_version as for write_excel_report"""
+    conn = open_report_connection(user_id, min_version)
+
+    pdf = ReportPDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+
+    try:
+        advance = track_progress(conn, user_id, progress)
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(TOTALS_QUERY, (user_id,))
+        totals = cursor.fetchone()
+        cursor.close()
+
+        income = float(totals['income'])
+        expense = float(totals['expense'])
+
+        # Summary Section
+        pdf.set_font('Arial', 'B', 12)
+        pdf.set_fill_color(241, 245, 249)
+        pdf.cell(63, 20, f"Income: +Rs {income:,.2f}", 0, 0, 'C', True)
+        pdf.cell(1, 20, "", 0, 0) # Spacer
+        pdf.cell(63, 20, f"Expense: -Rs {expense:,.2f}", 0, 0, 'C', True)
+        pdf.cell(1, 20, "", 0, 0) # Spacer
+        pdf.cell(63, 20, f"Net: Rs {income - expense:,.2f}", 0, 1, 'C', True)
+        pdf.ln(10)
+
+        # Transactions
+        pdf.section_title("Recent Transactions")
+        widths = [25, 30, 75, 20, 40]
+        pdf.table_header(['Date', 'Cat', 'Description', 'Type', 'Amount'], widths)
+        fill = False
+        for rows in iter_transaction_batches(conn, user_id, batch_size):
+            fill = pdf.table_rows(format_transaction_rows(rows), widths, fill)
+            advance(len(rows))
+
+        budgets = fetch_budget_rows(conn, user_id)
+        bills = fetch_bill_rows(conn, user_id)
+    finally:
+        conn.close()
+
+    # Budgets
+    if budgets:
+        df = pd.DataFrame.from_records(budgets, columns=BUDGET_COLUMNS)
+        pdf.add_page()
+        pdf.section_title("Budget Status")
+        pdf.table_header(['Category', 'Limit', 'Spent', 'Remaining', '%'], [50, 35, 35, 35, 35])
+        pdf.table_rows(zip(
+            pdf_text(df['Category']),
+            money(df['Limit'], 0),
+            money(df['Spent'], 0),
+            money(df['Remaining'], 0),
+            df['Percent'].map('{:.1f}%'.format)
+        ), [50, 35, 35, 35, 35])
+
+    # Bills
+    if bills:
+        df = pd.DataFrame.from_records(bills, columns=BILL_COLUMNS)
+        if pdf.get_y() > 200:
+            pdf.add_page()
+        else:
+            pdf.ln(10)
+        pdf.section_title("Upcoming Bills")
+        pdf.table_header(['Bill', 'Due Date', 'Amount', 'Status'], [60, 40, 40, 50])
+        pdf.table_rows(zip(
+            pdf_text(df['Bill Name']),
+            df['Due Date'].astype(str),
+            money(df['Amount']),
+            df['Paid'].map({1: 'Paid', 0: 'Pending', True: 'Paid', False: 'Pending'}).fillna('Pending')
+        ), [60, 40, 40, 50])
+
+    pdf.output(path, 'F')
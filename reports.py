@@ -0,0 +1,186 @@
+"""Report exports for /download_report
+
+Transactions are read in batches from an unbuffered (server-side) cursor on a
+dedicated connection, so memory stays flat however long the user's history is.
+The result goes to a temporary file, which is streamed to the client in chunks
+and deleted afterwards.
+
+This module holds the queries, formats and file helpers and is cheap to
+import. The writers that need pandas, fpdf and openpyxl live in
+report_writers.py, which is imported the first time a report is generated
+(ReportFormat.write), so web workers that never build a report don't pay for
+those libraries. check_import_time.py keeps it that way.
+"""
+import importlib
+import logging
+import os
+import tempfile
+from collections import namedtuple
+
+from flask import Response
+
+from db import get_dedicated_read_connection
+from ledger import fetch_budgets_with_spend, get_data_version
+
+log = logging.getLogger(__name__)
+
+REPORT_BATCH_SIZE = int(os.environ.get('REPORT_BATCH_SIZE', 5000))
+STREAM_CHUNK_SIZE = 64 * 1024
+
+TRANSACTIONS_QUERY = """
+    SELECT date, type, category, amount, description
+    FROM transactions WHERE user_id = %s ORDER BY date DESC
+"""
+
+TOTALS_QUERY = """
+    SELECT COALESCE(SUM(CASE WHEN type = 'income' THEN amount END), 0) AS income,
+           COALESCE(SUM(CASE WHEN type = 'expense' THEN amount END), 0) AS expense
+    FROM transactions WHERE user_id = %s
+"""
+
+BILLS_QUERY = """
+    SELECT name, amount, due_date, category, is_recurring, recurrence, is_paid, paid_date
+    FROM bills WHERE user_id = %s ORDER BY due_date
+"""
+
+TRANSACTION_COLUMNS = ['date', 'type', 'category', 'amount', 'description']
+BUDGET_COLUMNS = ['Category', 'Limit', 'Spent', 'Remaining', 'Percent', 'Month']
+BILL_COLUMNS = ['Bill Name', 'Amount', 'Due Date', 'Category', 'Recurring', 'Frequency', 'Paid', 'Paid Date']
+
+EXCEL_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+PDF_MIMETYPE = 'application/pdf'
+
+
+
+class ReportError(Exception):
+    """Raised when a report cannot be generated (e.g. no database connection)"""
+
+
+def open_report_connection(user_id, min_version=None):
+    """Dedicated read connection for a report; the caller must close() it
+
+    With min_version, a replica is only used once it has replicated that
+    users.data_version, so a report cached under a version never shows older data.
+    """
+    def caught_up(conn):
+        cursor = conn.cursor()
+        try:
+            version = get_data_version(cursor, user_id)
+        finally:
+            cursor.close()
+        return version is not None and version >= min_version
+
+    conn = get_dedicated_read_connection(caught_up if min_version is not None else None)
+    if conn is None:
+        raise ReportError("Could not connect to database")
+    return conn
+
+
+def iter_transaction_batches(conn, user_id, batch_size=REPORT_BATCH_SIZE):
+    """Yield lists of transaction tuples without loading the whole history"""
+    cursor = conn.cursor(buffered=False)
+    try:
+        cursor.execute(TRANSACTIONS_QUERY, (user_id,))
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        try:
+            cursor.close()
+        except Exception:
+            pass  # Unread rows (client went away); the pool discards the connection
+
+
+def count_transactions(conn, user_id):
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT COUNT(*) FROM transactions WHERE user_id = %s", (user_id,))
+        return cursor.fetchone()[0]
+    finally:
+        cursor.close()
+
+
+def track_progress(conn, user_id, progress):
+    """Wrap a progress(done, total) callback so it can be fed batch sizes"""
+    if progress is None:
+        return lambda n: None
+    total = count_transactions(conn, user_id)
+    done = 0
+
+    def advance(n):
+        nonlocal done
+        done += n
+        progress(done, total)
+    return advance
+
+
+def fetch_budget_rows(conn, user_id):
+    cursor = conn.cursor(dictionary=True)
+    try:
+        budgets = fetch_budgets_with_spend(cursor, user_id)
+    finally:
+        cursor.close()
+
+    rows = []
+    for b in budgets:
+        limit = float(b['limit_amount'])
+        spent = float(b['spent'])
+        percent = (spent / limit * 100) if limit > 0 else 0
+        rows.append((b['category'], limit, spent, limit - spent, percent, b['month']))
+    return rows
+
+
+def fetch_bill_rows(conn, user_id):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(BILLS_QUERY, (user_id,))
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+class ReportFormat(namedtuple('ReportFormat', 'writer suffix download_name mimetype')):
+    def write(self, user_id, path, **kwargs):
+        """Run report_writers.<writer>(user_id, path, **kwargs), importing the writers on first use"""
+        return getattr(importlib.import_module('report_writers'), self.writer)(user_id, path, **kwargs)
+
+
+REPORT_FORMATS = {
+    'excel': ReportFormat('write_excel_report', '.xlsx', 'finance_report.xlsx', EXCEL_MIMETYPE),
+    'pdf': ReportFormat('write_pdf_report', '.pdf', 'finance_report.pdf', PDF_MIMETYPE)
+}
+
+
+def make_temp_path(suffix):
+    fd, path = tempfile.mkstemp(prefix='finance_report_', suffix=suffix)
+    os.close(fd)
+    return path
+
+
+def remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def stream_file(path):
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(STREAM_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+def file_response(path, download_name, mimetype, delete=True):
+    """Attachment response that streams `path` in chunks and deletes it once the response is closed"""
+    response = Response(stream_file(path), mimetype=mimetype)
+    response.headers['Content-Length'] = str(os.path.getsize(path))
+    response.headers['Content-Disposition'] = f'attachment; filename="{download_name}"'
+    if delete:
+        # Runs even if the client disconnects before the body is read
+        response.call_on_close(lambda: remove_file(path))
+    return response
@@ -0,0 +1,110 @@
+"""Full-text transaction search for /api/transactions/search
+
+Backed by the ft_tx_search FULLTEXT index on transactions.search_text
+(migration 0010). Every word of the query becomes a required prefix term
+(`+word*`), and the user's own token (`+usr<id>`) is required too, so the
+index only returns that user's rows. Amount, date and type filters are
+applied to those matches. Results are ranked by MATCH() relevance, then
+newest first, or by date alone with sort=date.
+
+InnoDB does not index words shorter than innodb_ft_min_token_size (3 by
+default) or its built-in stopwords, so those are dropped from the query
+rather than turning a required term into "no results".
+"""
+import re
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+MIN_TOKEN_SIZE = 3
+MAX_TERMS = 8
+
+# INNODB_FT_DEFAULT_STOPWORD
+STOPWORDS = frozenset("""
+    a about an are as at be by com de en for from how i in is it la of on or that the this to was what when where
+    who will with und www
+""".split())
+
+SEARCH_COLUMNS = ('id', 'date', 'type', 'category', 'amount', 'description', 'payment_method')
+SORTS = {
+    'relevance': "score DESC, date DESC, id DESC",
+    'date': "date DESC, id DESC"
+}
+
+
+class SearchError(ValueError):
+    """Raised for an unusable query or filter (shown to the API client)"""
+
+
+def search_terms(query):
+    """Lower-cased words of `query` that the full-text index can match"""
+    words = re.findall(r'\w+', query.lower())
+    terms = []
+    for word in words:
+        if len(word) >= MIN_TOKEN_SIZE and word not in STOPWORDS and word not in terms:
+            terms.append(word)
+    return terms[:MAX_TERMS]
+
+
+def boolean_query(user_id, terms):
+    """BOOLEAN MODE query requiring the user's token and a prefix match for every term"""
+    return ' '.join([f"+usr{user_id}"] + [f"+{term}*" for term in terms])
+
+
+def _parse_amount(value, name):
+    try:
+        amount = Decimal(value)
+    except InvalidOperation:
+        raise SearchError(f"{name} must be a number")
+    if not amount.is_finite() or amount < 0:
+        raise SearchError(f"{name} must be a positive number")
+    return amount
+
+
+def _parse_date(value, name):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise SearchError(f"{name} must be a date like 2024-01-31")
+
+
+def search_transactions(cursor, user_id, query, min_amount=None, max_amount=None, start=None, end=None,
+                        tx_type=None, sort='relevance', limit=SEARCH_LIMIT):
+    """Matching non-deleted transactions with a `score` column; `cursor` must return dict rows
+
+    Filter arguments are the raw query-string values (strings or None).
+    """
+    terms = search_terms(query or '')
+    if not terms:
+        raise SearchError(f"Search for at least one word of {MIN_TOKEN_SIZE} or more letters")
+    if sort not in SORTS:
+        raise SearchError("sort must be relevance or date")
+
+    against = boolean_query(user_id, terms)
+    clauses = ["MATCH(search_text) AGAINST (%s IN BOOLEAN MODE)", "user_id = %s", "is_deleted = FALSE"]
+    params = [against, user_id]
+    if min_amount:
+        clauses.append("amount >= %s")
+        params.append(_parse_amount(min_amount, 'min_amount'))
+    if max_amount:
+        clauses.append("amount <= %s")
+        params.append(_parse_amount(max_amount, 'max_amount'))
+    if start:
+        clauses.append("date >= %s")
+        params.append(_parse_date(start, 'start'))
+    if end:
+        clauses.append("date <= %s")
+        params.append(_parse_date(end, 'end'))
+    if tx_type:
+        if tx_type not in ('income', 'expense'):
+            raise SearchError("type must be income or expense")
+        clauses.append("type = %s")
+        params.append(tx_type)
+
+    cursor.execute(
+        f"SELECT {', '.join(SEARCH_COLUMNS)}, MATCH(search_text) AGAINST (%s IN BOOLEAN MODE) AS score "
+        f"FROM transactions WHERE {' AND '.join(clauses)} ORDER BY {SORTS[sort]} LIMIT %s",
+        (against, *params, max(1, min(limit, MAX_SEARCH_LIMIT)))
+    )
+    return cursor.fetchall()
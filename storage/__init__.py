@@ -0,0 +1,47 @@
+"""Repository layer over MySQL or an embedded SQLite database
+
+Routes get repositories for their request with get_storage() and commit
+through it, instead of writing SQL against mysql.connector cursors:
+
+    storage = get_storage()
+    storage.goals.add(user_id, name, target)
+    storage.commit()
+
+get_storage() is always MySQL. The rest of the web app (dashboard, reports,
+search, imports and alerts) still runs its own MySQL queries, so the app
+cannot run on SQLite, and STORAGE_BACKEND only picks open_storage()'s
+default. Scripts, tests and benchmarks can open either backend with
+open_storage(); 'sqlite' needs no server and no network round trips. The interfaces are in storage/base.py, and
+`python -m storage.conformance` runs the same checks against both backends.
+"""
+import importlib
+import os
+
+from storage.mysql_backend import request_storage
+
+BACKENDS = {
+    'mysql': 'storage.mysql_backend',
+    'sqlite': 'storage.sqlite_backend'
+}
+
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'mysql')
+SQLITE_PATH = os.environ.get('SQLITE_PATH', 'finance.sqlite3')
+
+
+def open_storage(backend=None, path=None):
+    """A Storage on a new connection; the caller must close() it
+
+    backend defaults to STORAGE_BACKEND; path is the SQLite file (default SQLITE_PATH).
+    """
+    backend = backend or STORAGE_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown storage backend {backend!r}; expected one of {', '.join(BACKENDS)}")
+    module = importlib.import_module(BACKENDS[backend])
+    if backend == 'sqlite':
+        return module.open_storage(path or SQLITE_PATH)
+    return module.open_storage()
+
+
+def get_storage(read_only=False):
+    """Repositories on the request's MySQL connection; read_only ones may read from a replica"""
+    return request_storage(read_only)
@@ -0,0 +1,254 @@
+"""Repository interfaces shared by the storage backends
+
+Rows come back as dicts with the column names of the MySQL schema. Money
+columns may be Decimal (MySQL) or float (SQLite), so callers float() them as
+the routes already do. Dates are datetime.date and notification timestamps
+datetime.datetime on both backends.
+
+Writes happen on the Storage's connection and are only kept once the caller
+commits. Update and delete methods return True when they changed one of the
+user's rows; rows of other users are never touched. Every write to a user's
+transactions, budgets, bills or goals bumps users.data_version, which keys
+the cached reports and dashboard payloads.
+
+Database errors reach callers as StorageError (DuplicateError for a unique
+key such as users.email), whichever backend raised them, so routes never
+catch mysql.connector.Error or sqlite3.Error themselves.
+
+storage/conformance.py checks each backend against these contracts. The
+repositories are abstract base classes, so a backend missing a method fails
+when its Storage is built rather than partway through a request.
+"""
+import functools
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+
+
+class StorageError(Exception):
+    """A database error from a repository, commit or rollback"""
+
+
+class DuplicateError(StorageError):
+    """A write hit a unique key, e.g. an email that is already registered"""
+
+
+class GuardedRepo:
+    """Repository proxy that re-raises the backend's errors as StorageError"""
+
+    def __init__(self, repo, storage):
+        self._repo = repo
+        self._storage = storage
+
+    def __getattr__(self, name):
+        attr = getattr(self._repo, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def call(*args, **kwargs):
+            with self._storage.translate_errors():
+                return attr(*args, **kwargs)
+        return call
+
+
+class Storage:
+    """The six repositories on one connection: one unit of work, committed by the caller
+
+    Backends set `errors` to their driver's base exception class and override
+    is_duplicate() to recognize unique key violations.
+    """
+
+    errors = ()
+
+    def __init__(self, conn, users, transactions, budgets, bills, goals, notifications):
+        self.conn = conn
+        self.users = GuardedRepo(users, self)
+        self.transactions = GuardedRepo(transactions, self)
+        self.budgets = GuardedRepo(budgets, self)
+        self.bills = GuardedRepo(bills, self)
+        self.goals = GuardedRepo(goals, self)
+        self.notifications = GuardedRepo(notifications, self)
+
+    def is_duplicate(self, err):
+        return False
+
+    @contextmanager
+    def translate_errors(self):
+        try:
+            yield
+        except self.errors as err:
+            raise (DuplicateError if self.is_duplicate(err) else StorageError)(str(err)) from err
+
+    @property
+    def has_changes(self):
+        """Whether the unit of work has uncommitted writes"""
+        return self.conn.in_transaction
+
+    def commit(self):
+        with self.translate_errors():
+            self.conn.commit()
+
+    def rollback(self):
+        with self.translate_errors():
+            self.conn.rollback()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class UserRepo(ABC):
+    @abstractmethod
+    def create(self, username, email, password_hash, initial_balance=0):
+        """Insert a user and return its id"""
+
+    @abstractmethod
+    def get(self, user_id):
+        ...
+
+    @abstractmethod
+    def get_by_email(self, email):
+        ...
+
+    @abstractmethod
+    def set_password_hash(self, user_id, password_hash):
+        ...
+
+    @abstractmethod
+    def update_profile(self, user_id, username, email, phone='', job_title='', bio=''):
+        """Update the profile fields; DuplicateError if `email` belongs to another user"""
+
+    @abstractmethod
+    def set_profile_pic(self, user_id, filename):
+        """Point the profile picture at `filename` and return the previous one (None for an unknown user)"""
+
+    @abstractmethod
+    def delete(self, user_id):
+        """Delete the user and everything they own; True if the user existed"""
+
+    @abstractmethod
+    def data_version(self, user_id):
+        """users.data_version, or None for an unknown user"""
+
+
+class TransactionRepo(ABC):
+    @abstractmethod
+    def add(self, user_id, tx_type, category, amount, tx_date, description='', payment_method='Cash'):
+        """Insert a transaction, update the balance and monthly spend, and return its id"""
+
+    @abstractmethod
+    def delete(self, user_id, transaction_id):
+        """Soft-delete a transaction; True if it existed and was not deleted already"""
+
+    @abstractmethod
+    def list(self, user_id, month=None, limit=None):
+        """Non-deleted transactions, newest first (date, then id), optionally for one 'YYYY-MM'"""
+
+    @abstractmethod
+    def month_spend(self, user_id, month, tx_type='expense'):
+        """Total of one month as a float, soft-deleted transactions included (as budgets count them)"""
+
+    @abstractmethod
+    def balance(self, user_id):
+        """initial_balance + income - expenses over non-deleted transactions, as a float"""
+
+
+class BudgetRepo(ABC):
+    @abstractmethod
+    def add(self, user_id, category, limit_amount, month):
+        """Insert a budget and return its id, or None if the category already has one that month"""
+
+    @abstractmethod
+    def list_with_spend(self, user_id, month=None):
+        """Budget rows with a `spent` column: the month's expenses in the (normalized) category"""
+
+    @abstractmethod
+    def update_limit(self, user_id, budget_id, limit_amount):
+        ...
+
+    @abstractmethod
+    def delete(self, user_id, budget_id):
+        ...
+
+    @abstractmethod
+    def delete_before(self, user_id, month):
+        """Delete budgets of months before 'YYYY-MM' and return how many there were"""
+
+
+class BillRepo(ABC):
+    @abstractmethod
+    def add(self, user_id, name, amount, due_date, category='Other', is_recurring=False, recurrence='monthly'):
+        """Insert a bill and return its id"""
+
+    @abstractmethod
+    def get(self, user_id, bill_id):
+        ...
+
+    @abstractmethod
+    def list(self, user_id):
+        """Unpaid bills first, then by due date"""
+
+    @abstractmethod
+    def mark_paid(self, user_id, bill_id, paid_date):
+        ...
+
+    @abstractmethod
+    def mark_unpaid(self, user_id, bill_id):
+        ...
+
+    @abstractmethod
+    def delete(self, user_id, bill_id):
+        ...
+
+
+class GoalRepo(ABC):
+    @abstractmethod
+    def add(self, user_id, name, target_amount, current_amount=0, deadline=None):
+        """Insert a goal and return its id"""
+
+    @abstractmethod
+    def get(self, user_id, goal_id):
+        ...
+
+    @abstractmethod
+    def list(self, user_id):
+        ...
+
+    @abstractmethod
+    def set_amount(self, user_id, goal_id, current_amount):
+        ...
+
+    @abstractmethod
+    def delete(self, user_id, goal_id):
+        ...
+
+
+class NotificationRepo(ABC):
+    @abstractmethod
+    def add(self, user_id, message, notif_type='info', dedup_key=None):
+        """Insert a notification and return 1, or 0 if `dedup_key` was already used for the user"""
+
+    @abstractmethod
+    def latest(self, user_id, limit):
+        """The newest `limit` notifications"""
+
+    @abstractmethod
+    def unread_count(self, user_id):
+        ...
+
+    @abstractmethod
+    def mark_all_read(self, user_id):
+        ...
+
+    @abstractmethod
+    def delete(self, user_id, notification_id):
+        ...
+
+    @abstractmethod
+    def clear(self, user_id):
+        ...
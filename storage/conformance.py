@@ -0,0 +1,296 @@
+"""Conformance checks every storage backend must pass
+
+    python -m storage.conformance [--backend sqlite|mysql|all] [--sqlite-path PATH]
+
+Each check creates its own users on an open Storage and everything it writes
+is rolled back afterwards, so running against a real MySQL database (the DB_*
+settings) leaves no rows behind. SQLite runs on a temporary file unless
+--sqlite-path is given. Exits with status 1 if any check fails.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import uuid
+from datetime import date, datetime
+
+from storage import BACKENDS, open_storage
+from storage.base import DuplicateError
+
+CHECKS = []
+
+
+class CheckFailed(Exception):
+    pass
+
+
+def check(fn):
+    CHECKS.append(fn)
+    return fn
+
+
+def expect(condition, message):
+    if not condition:
+        raise CheckFailed(message)
+
+
+def money(value):
+    return round(float(value), 2)
+
+
+def new_user(storage, initial_balance=0):
+    token = uuid.uuid4().hex[:12]
+    return storage.users.create(f"conformance-{token}", f"conformance-{token}@example.com", 'hash', initial_balance)
+
+
+@check
+def users(storage):
+    user_id = new_user(storage)
+    user = storage.users.get(user_id)
+    expect(user is not None and user['id'] == user_id, "created user not found by id")
+    expect(storage.users.get_by_email(user['email'])['id'] == user_id, "created user not found by email")
+    expect(storage.users.data_version(user_id) == 0, "data_version does not start at 0")
+    expect(storage.users.set_password_hash(user_id, 'scrypt:new'), "set_password_hash reported no change")
+    expect(storage.users.get(user_id)['password_hash'] == 'scrypt:new', "password hash not updated")
+    expect(storage.users.get(-1) is None and storage.users.data_version(-1) is None, "unknown user not None")
+
+    try:
+        storage.users.create('dup', user['email'], 'hash')
+    except DuplicateError:
+        pass
+    else:
+        raise CheckFailed("a second user with the same email was created")
+
+    other = new_user(storage, initial_balance=50)
+    storage.goals.add(other, 'Owned', 100)
+    storage.budgets.add(other, 'Food', 100, '2024-01')
+    storage.bills.add(other, 'Rent', 500, date(2024, 1, 5))
+    storage.transactions.add(other, 'expense', 'Food', 10, date(2024, 1, 15))
+    storage.notifications.add(other, 'Owned')
+    expect(storage.users.delete(other), "delete reported no user")
+    expect(storage.users.get(other) is None, "deleted user still found")
+    expect(storage.goals.list(other) == [] and storage.budgets.list_with_spend(other) == []
+           and storage.bills.list(other) == [] and storage.transactions.list(other) == []
+           and storage.notifications.latest(other, 10) == [], "deleting a user left rows behind")
+    expect(storage.transactions.balance(other) == 0, "deleting a user left their balance")
+
+
+@check
+def profile(storage):
+    user_id = new_user(storage)
+    taken = storage.users.get(new_user(storage))['email']
+    email = f"profile-{user_id}@example.com"
+    expect(storage.users.update_profile(user_id, 'Renamed', email, '555', 'Analyst', 'Hi'), "update_profile")
+    user = storage.users.get(user_id)
+    expect((user['username'], user['email'], user['phone'], user['job_title'], user['bio'])
+           == ('Renamed', email, '555', 'Analyst', 'Hi'), f"profile not updated: {user}")
+    try:
+        storage.users.update_profile(user_id, 'Renamed', taken)
+    except DuplicateError:
+        pass
+    else:
+        raise CheckFailed("update_profile took another user's email")
+
+    expect(storage.users.set_profile_pic(user_id, 'new.png') == 'default.png', "previous picture not returned")
+    expect(storage.users.get(user_id)['profile_pic'] == 'new.png', "profile picture not updated")
+    expect(storage.users.set_profile_pic(-1, 'x.png') is None, "unknown user's picture not None")
+
+
+@check
+def transaction_listing(storage):
+    user_id = new_user(storage)
+    ids = [
+        storage.transactions.add(user_id, 'expense', 'Food', 10, date(2024, 1, 15), 'Lunch', 'Card'),
+        storage.transactions.add(user_id, 'income', 'Salary', 1000, date(2024, 2, 1)),
+        storage.transactions.add(user_id, 'expense', 'Rent', 500, '2024-02-01')
+    ]
+    rows = storage.transactions.list(user_id)
+    expect([r['id'] for r in rows] == [ids[2], ids[1], ids[0]], "not ordered by date, then id, newest first")
+    first = rows[-1]
+    expect(isinstance(first['date'], date) and first['date'] == date(2024, 1, 15), "date not returned as a date")
+    expect((first['type'], first['category'], money(first['amount']), first['description'], first['payment_method'])
+           == ('expense', 'Food', 10.0, 'Lunch', 'Card'), f"fields not round-tripped: {first}")
+    expect(rows[0]['payment_method'] == 'Cash', "payment method does not default to Cash")
+    expect([r['id'] for r in storage.transactions.list(user_id, month='2024-01')] == [ids[0]], "month filter")
+    expect(len(storage.transactions.list(user_id, limit=2)) == 2, "limit ignored")
+
+
+@check
+def balance_and_spend(storage):
+    user_id = new_user(storage, initial_balance=100)
+    storage.transactions.add(user_id, 'income', 'Salary', 50, date(2024, 3, 1))
+    groceries = storage.transactions.add(user_id, 'expense', 'Food', 30, date(2024, 3, 2))
+    storage.transactions.add(user_id, 'expense', 'Food', 5, date(2024, 4, 2))
+    expect(storage.transactions.balance(user_id) == 115.0, "balance is not initial + income - expenses")
+    expect(storage.transactions.month_spend(user_id, '2024-03') == 30.0, "month spend")
+    expect(storage.transactions.month_spend(user_id, '2024-03', 'income') == 50.0, "month income")
+
+    expect(storage.transactions.delete(user_id, groceries), "delete reported no transaction")
+    expect(not storage.transactions.delete(user_id, groceries), "second delete reported a change")
+    expect(storage.transactions.balance(user_id) == 145.0, "balance still counts a deleted transaction")
+    expect(storage.transactions.month_spend(user_id, '2024-03') == 30.0, "spend must keep deleted transactions")
+    expect(groceries not in [r['id'] for r in storage.transactions.list(user_id)], "deleted transaction listed")
+
+    other = new_user(storage)
+    expect(storage.transactions.balance(other) == 0.0, "new user balance is not 0")
+    salary = storage.transactions.add(other, 'income', 'Salary', 10, date(2024, 3, 1))
+    expect(not storage.transactions.delete(user_id, salary), "deleted another user's transaction")
+
+
+@check
+def budgets(storage):
+    user_id = new_user(storage)
+    budget_id = storage.budgets.add(user_id, 'Food', 200, '2024-05')
+    expect(budget_id is not None, "add returned no id")
+    expect(storage.budgets.add(user_id, 'Food', 300, '2024-05') is None, "duplicate budget accepted")
+    storage.budgets.add(user_id, 'Rent', 900, '2024-04')
+
+    storage.transactions.add(user_id, 'expense', ' food ', 20, date(2024, 5, 3))
+    storage.transactions.add(user_id, 'expense', 'FOOD', 15, date(2024, 5, 31))
+    storage.transactions.add(user_id, 'income', 'Food', 1000, date(2024, 5, 4))
+    storage.transactions.add(user_id, 'expense', 'Food', 99, date(2024, 6, 1))
+    rows = storage.budgets.list_with_spend(user_id, '2024-05')
+    expect(len(rows) == 1 and rows[0]['id'] == budget_id, "month filter")
+    expect(money(rows[0]['spent']) == 35.0, f"spent should be 35.0 (normalized category, month only): {rows[0]}")
+    expect(len(storage.budgets.list_with_spend(user_id)) == 2, "all months")
+
+    expect(storage.budgets.update_limit(user_id, budget_id, 250), "update_limit reported no change")
+    expect(money(storage.budgets.list_with_spend(user_id, '2024-05')[0]['limit_amount']) == 250.0, "limit")
+    expect(storage.budgets.delete_before(user_id, '2024-05') == 1, "delete_before count")
+    expect(storage.budgets.delete(user_id, budget_id), "delete reported no budget")
+    expect(storage.budgets.list_with_spend(user_id) == [], "budgets left over")
+
+
+@check
+def bills(storage):
+    user_id = new_user(storage)
+    later = storage.bills.add(user_id, 'Rent', 900, date(2024, 7, 10), 'Housing', True, 'monthly')
+    sooner = storage.bills.add(user_id, 'Phone', 20, '2024-07-05')
+    expect([b['id'] for b in storage.bills.list(user_id)] == [sooner, later], "not ordered by due date")
+
+    expect(storage.bills.mark_paid(user_id, sooner, date(2024, 7, 4)), "mark_paid reported no change")
+    paid = storage.bills.get(user_id, sooner)
+    expect(paid['is_paid'] and paid['paid_date'] == date(2024, 7, 4), f"bill not paid: {paid}")
+    expect([b['id'] for b in storage.bills.list(user_id)] == [later, sooner], "paid bills not listed last")
+    rent = storage.bills.get(user_id, later)
+    expect(rent['is_recurring'] and rent['recurrence'] == 'monthly' and rent['category'] == 'Housing', "fields")
+
+    expect(storage.bills.mark_unpaid(user_id, sooner), "mark_unpaid reported no change")
+    unpaid = storage.bills.get(user_id, sooner)
+    expect(not unpaid['is_paid'] and unpaid['paid_date'] is None, "bill still paid")
+    expect(storage.bills.get(user_id, sooner)['category'] == 'Other', "category does not default to Other")
+
+    other = new_user(storage)
+    expect(storage.bills.get(other, later) is None, "another user's bill visible")
+    expect(not storage.bills.delete(other, later), "deleted another user's bill")
+    expect(storage.bills.delete(user_id, later), "delete reported no bill")
+    expect([b['id'] for b in storage.bills.list(user_id)] == [sooner], "bill not deleted")
+
+
+@check
+def goals(storage):
+    user_id = new_user(storage)
+    goal_id = storage.goals.add(user_id, 'Laptop', 1500, 100, date(2024, 12, 31))
+    goal = storage.goals.get(user_id, goal_id)
+    expect((goal['name'], money(goal['target_amount']), money(goal['current_amount']), goal['deadline'])
+           == ('Laptop', 1500.0, 100.0, date(2024, 12, 31)), f"fields not round-tripped: {goal}")
+    no_deadline = storage.goals.add(user_id, 'Trip', 800)
+    expect(money(storage.goals.get(user_id, no_deadline)['current_amount']) == 0.0, "current_amount default")
+    expect(storage.goals.set_amount(user_id, goal_id, 400), "set_amount reported no change")
+    expect(money(storage.goals.get(user_id, goal_id)['current_amount']) == 400.0, "amount not updated")
+    expect(len(storage.goals.list(user_id)) == 2, "list")
+    expect(storage.goals.delete(user_id, goal_id), "delete reported no goal")
+    expect(storage.goals.get(user_id, goal_id) is None, "goal not deleted")
+
+
+@check
+def notifications(storage):
+    user_id = new_user(storage)
+    storage.notifications.add(user_id, 'one')
+    storage.notifications.add(user_id, 'two', 'warning')
+    expect(storage.notifications.add(user_id, 'alert', 'danger', dedup_key='rule:1:2024-01-01') == 1, "keyed add")
+    expect(storage.notifications.add(user_id, 'alert again', 'danger', dedup_key='rule:1:2024-01-01') == 0,
+           "duplicate dedup_key accepted")
+    latest = storage.notifications.latest(user_id, 10)
+    expect(sorted(n['message'] for n in latest) == ['alert', 'one', 'two'], f"latest: {latest}")
+    expect(isinstance(latest[0]['date'], datetime), "date not returned as a datetime")
+    expect(len(storage.notifications.latest(user_id, 2)) == 2, "limit ignored")
+    expect(storage.notifications.unread_count(user_id) == 3, "unread count")
+
+    expect(storage.notifications.mark_all_read(user_id), "mark_all_read reported no change")
+    expect(storage.notifications.unread_count(user_id) == 0, "still unread")
+    expect(storage.notifications.delete(user_id, latest[0]['id']), "delete reported no notification")
+    expect(storage.notifications.clear(user_id), "clear reported nothing")
+    expect(storage.notifications.latest(user_id, 10) == [], "notifications left over")
+
+
+@check
+def data_version(storage):
+    user_id = new_user(storage)
+    writes = [
+        lambda: storage.transactions.add(user_id, 'expense', 'Food', 1, date(2024, 1, 1)),
+        lambda: storage.budgets.add(user_id, 'Food', 10, '2024-01'),
+        lambda: storage.bills.add(user_id, 'Gym', 30, date(2024, 1, 5)),
+        lambda: storage.goals.add(user_id, 'Car', 5000)
+    ]
+    for write in writes:
+        before = storage.users.data_version(user_id)
+        write()
+        expect(storage.users.data_version(user_id) > before, "a write did not bump data_version")
+    before = storage.users.data_version(user_id)
+    storage.goals.delete(user_id, -1)
+    expect(storage.users.data_version(user_id) == before, "a write that changed nothing bumped data_version")
+
+
+@check
+def rollback(storage):
+    user_id = new_user(storage)
+    storage.goals.add(user_id, 'Uncommitted', 10)
+    expect(storage.has_changes, "has_changes is False after a write")
+    storage.rollback()
+    expect(not storage.has_changes, "has_changes is True after a rollback")
+    expect(storage.users.get(user_id) is None, "rollback kept the uncommitted user")
+    storage.goals.list(user_id)
+    expect(not storage.has_changes, "a read counted as a change")
+
+
+def run(backend, path=None):
+    """Run every check against `backend` and return the number that failed"""
+    storage = open_storage(backend, path=path)
+    failures = 0
+    try:
+        for fn in CHECKS:
+            try:
+                fn(storage)
+            except Exception as e:
+                print(f"FAIL       {backend:<7} {fn.__name__}: {e}")
+                failures += 1
+            else:
+                print(f"ok         {backend:<7} {fn.__name__}")
+            finally:
+                storage.rollback()
+    finally:
+        storage.close()
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backend', choices=sorted(BACKENDS) + ['all'], default='sqlite')
+    parser.add_argument('--sqlite-path', help="SQLite file to use (default: a temporary file)")
+    args = parser.parse_args()
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.sqlite_path or os.path.join(tmp, 'conformance.sqlite3')
+        for backend in (sorted(BACKENDS) if args.backend == 'all' else [args.backend]):
+            failures += run(backend, path)
+
+    if failures:
+        print(f"{failures} conformance check(s) failed.")
+        sys.exit(1)
+    print("All conformance checks passed.")
+
+
+if __name__ == '__main__':
+    main()
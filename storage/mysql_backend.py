@@ -0,0 +1,306 @@
+"""MySQL repositories: the production backend
+
+Built on the same helpers as the routes, so the balance ledger, the monthly
+spend rollup, users.data_version and the notification cache stay in step
+(see ledger.py and notifications.py). Connections come from db.py's pool.
+"""
+import mysql.connector
+from mysql.connector import errorcode
+
+from db import get_db_connection, get_dedicated_connection, get_read_connection
+from ledger import (bump_data_version, fetch_budgets_with_spend, get_balance, get_data_version, get_month_spend,
+                    month_range, rebuild_balance, record_deletion, record_transaction)
+from notifications import LATEST_QUERY, UNREAD_COUNT_QUERY, invalidate_notifications, notify
+from storage.base import BillRepo, BudgetRepo, GoalRepo, NotificationRepo, Storage, TransactionRepo, UserRepo
+
+TRANSACTION_FIELDS = "id, date, type, category, amount, description, payment_method"
+
+
+class MySQLRepo:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def _fetchall(self, sql, params):
+        cursor = self.conn.cursor(dictionary=True)
+        try:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+    def _fetchone(self, sql, params):
+        rows = self._fetchall(sql, params)
+        return rows[0] if rows else None
+
+    def _execute(self, sql, params, bump_user=None):
+        """Run a write and return (rowcount, lastrowid); bumps `bump_user`'s data version if a row changed"""
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(sql, params)
+            rowcount, lastrowid = cursor.rowcount, cursor.lastrowid
+            if bump_user is not None and rowcount:
+                bump_data_version(cursor, bump_user)
+            return rowcount, lastrowid
+        finally:
+            cursor.close()
+
+
+class MySQLUserRepo(MySQLRepo, UserRepo):
+    def create(self, username, email, password_hash, initial_balance=0):
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(
+                "INSERT INTO users (username, email, password_hash, initial_balance) VALUES (%s, %s, %s, %s)",
+                (username, email, password_hash, initial_balance)
+            )
+            user_id = cursor.lastrowid
+            rebuild_balance(cursor, user_id)  # Start the ledger row at initial_balance
+            return user_id
+        finally:
+            cursor.close()
+
+    def get(self, user_id):
+        return self._fetchone("SELECT * FROM users WHERE id = %s", (user_id,))
+
+    def get_by_email(self, email):
+        return self._fetchone("SELECT * FROM users WHERE email = %s", (email,))
+
+    def set_password_hash(self, user_id, password_hash):
+        return bool(self._execute("UPDATE users SET password_hash = %s WHERE id = %s", (password_hash, user_id))[0])
+
+    def update_profile(self, user_id, username, email, phone='', job_title='', bio=''):
+        return bool(self._execute(
+            "UPDATE users SET username = %s, email = %s, phone = %s, job_title = %s, bio = %s WHERE id = %s",
+            (username, email, phone, job_title, bio, user_id)
+        )[0])
+
+    def set_profile_pic(self, user_id, filename):
+        user = self._fetchone("SELECT profile_pic FROM users WHERE id = %s FOR UPDATE", (user_id,))
+        if user is None:
+            return None
+        self._execute("UPDATE users SET profile_pic = %s WHERE id = %s", (filename, user_id))
+        return user['profile_pic']
+
+    def delete(self, user_id):
+        # Everything else goes with the user (ON DELETE CASCADE)
+        deleted = bool(self._execute("DELETE FROM users WHERE id = %s", (user_id,))[0])
+        if deleted:
+            invalidate_notifications(user_id)
+        return deleted
+
+    def data_version(self, user_id):
+        cursor = self.conn.cursor()
+        try:
+            return get_data_version(cursor, user_id)
+        finally:
+            cursor.close()
+
+
+class MySQLTransactionRepo(MySQLRepo, TransactionRepo):
+    def add(self, user_id, tx_type, category, amount, tx_date, description='', payment_method='Cash'):
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(
+                "INSERT INTO transactions (user_id, type, category, amount, description, date, payment_method, "
+                "is_deleted) VALUES (%s, %s, %s, %s, %s, %s, %s, FALSE)",
+                (user_id, tx_type, category, amount, description, tx_date, payment_method)
+            )
+            transaction_id = cursor.lastrowid
+            record_transaction(cursor, user_id, tx_type, category, amount, tx_date)
+            return transaction_id
+        finally:
+            cursor.close()
+
+    def delete(self, user_id, transaction_id):
+        cursor = self.conn.cursor(dictionary=True)
+        try:
+            cursor.execute(
+                "SELECT type, category, amount, date FROM transactions "
+                "WHERE id = %s AND user_id = %s AND is_deleted = FALSE FOR UPDATE",
+                (transaction_id, user_id)
+            )
+            tx = cursor.fetchone()
+            if tx is None:
+                return False
+            cursor.execute("UPDATE transactions SET is_deleted = TRUE WHERE id = %s", (transaction_id,))
+            record_deletion(cursor, user_id, tx['type'], tx['category'], tx['amount'], tx['date'])
+            return True
+        finally:
+            cursor.close()
+
+    def list(self, user_id, month=None, limit=None):
+        sql = f"SELECT {TRANSACTION_FIELDS} FROM transactions WHERE user_id = %s AND is_deleted = FALSE"
+        params = [user_id]
+        if month is not None:
+            sql += " AND date >= %s AND date < %s"
+            params += month_range(month)
+        sql += " ORDER BY date DESC, id DESC"
+        if limit is not None:
+            sql += " LIMIT %s"
+            params.append(limit)
+        return self._fetchall(sql, params)
+
+    def month_spend(self, user_id, month, tx_type='expense'):
+        cursor = self.conn.cursor()
+        try:
+            return get_month_spend(cursor, user_id, month, tx_type)
+        finally:
+            cursor.close()
+
+    def balance(self, user_id):
+        # The first lookup may build the ledger row; it is kept once the caller commits
+        cursor = self.conn.cursor()
+        try:
+            return get_balance(cursor, user_id)
+        finally:
+            cursor.close()
+
+
+class MySQLBudgetRepo(MySQLRepo, BudgetRepo):
+    def add(self, user_id, category, limit_amount, month):
+        if self._fetchone("SELECT id FROM budgets WHERE user_id = %s AND category = %s AND month = %s",
+                          (user_id, category, month)):
+            return None
+        return self._execute(
+            "INSERT INTO budgets (user_id, category, limit_amount, month) VALUES (%s, %s, %s, %s)",
+            (user_id, category, limit_amount, month), bump_user=user_id
+        )[1]
+
+    def list_with_spend(self, user_id, month=None):
+        cursor = self.conn.cursor(dictionary=True)
+        try:
+            return fetch_budgets_with_spend(cursor, user_id, month)
+        finally:
+            cursor.close()
+
+    def update_limit(self, user_id, budget_id, limit_amount):
+        return bool(self._execute("UPDATE budgets SET limit_amount = %s WHERE id = %s AND user_id = %s",
+                                  (limit_amount, budget_id, user_id), bump_user=user_id)[0])
+
+    def delete(self, user_id, budget_id):
+        return bool(self._execute("DELETE FROM budgets WHERE id = %s AND user_id = %s",
+                                  (budget_id, user_id), bump_user=user_id)[0])
+
+    def delete_before(self, user_id, month):
+        return self._execute("DELETE FROM budgets WHERE user_id = %s AND month < %s",
+                             (user_id, month), bump_user=user_id)[0]
+
+
+class MySQLBillRepo(MySQLRepo, BillRepo):
+    def add(self, user_id, name, amount, due_date, category='Other', is_recurring=False, recurrence='monthly'):
+        return self._execute("""
+            INSERT INTO bills (user_id, name, amount, due_date, category, is_recurring, recurrence)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """, (user_id, name, amount, due_date, category, is_recurring, recurrence), bump_user=user_id)[1]
+
+    def get(self, user_id, bill_id):
+        return self._fetchone("SELECT * FROM bills WHERE id = %s AND user_id = %s", (bill_id, user_id))
+
+    def list(self, user_id):
+        return self._fetchall("SELECT * FROM bills WHERE user_id = %s ORDER BY is_paid ASC, due_date ASC", (user_id,))
+
+    def mark_paid(self, user_id, bill_id, paid_date):
+        return bool(self._execute("UPDATE bills SET is_paid = TRUE, paid_date = %s WHERE id = %s AND user_id = %s",
+                                  (paid_date, bill_id, user_id), bump_user=user_id)[0])
+
+    def mark_unpaid(self, user_id, bill_id):
+        return bool(self._execute("UPDATE bills SET is_paid = FALSE, paid_date = NULL WHERE id = %s AND user_id = %s",
+                                  (bill_id, user_id), bump_user=user_id)[0])
+
+    def delete(self, user_id, bill_id):
+        return bool(self._execute("DELETE FROM bills WHERE id = %s AND user_id = %s",
+                                  (bill_id, user_id), bump_user=user_id)[0])
+
+
+class MySQLGoalRepo(MySQLRepo, GoalRepo):
+    def add(self, user_id, name, target_amount, current_amount=0, deadline=None):
+        return self._execute(
+            "INSERT INTO goals (user_id, name, target_amount, current_amount, deadline) VALUES (%s, %s, %s, %s, %s)",
+            (user_id, name, target_amount, current_amount, deadline), bump_user=user_id
+        )[1]
+
+    def get(self, user_id, goal_id):
+        return self._fetchone("SELECT * FROM goals WHERE id = %s AND user_id = %s", (goal_id, user_id))
+
+    def list(self, user_id):
+        return self._fetchall("SELECT * FROM goals WHERE user_id = %s", (user_id,))
+
+    def set_amount(self, user_id, goal_id, current_amount):
+        return bool(self._execute("UPDATE goals SET current_amount = %s WHERE id = %s AND user_id = %s",
+                                  (current_amount, goal_id, user_id), bump_user=user_id)[0])
+
+    def delete(self, user_id, goal_id):
+        return bool(self._execute("DELETE FROM goals WHERE id = %s AND user_id = %s",
+                                  (goal_id, user_id), bump_user=user_id)[0])
+
+
+class MySQLNotificationRepo(MySQLRepo, NotificationRepo):
+    def add(self, user_id, message, notif_type='info', dedup_key=None):
+        cursor = self.conn.cursor()
+        try:
+            return notify(cursor, user_id, message, notif_type, dedup_key)
+        finally:
+            cursor.close()
+
+    def latest(self, user_id, limit):
+        return self._fetchall(LATEST_QUERY, (user_id, limit))
+
+    def unread_count(self, user_id):
+        return self._fetchone(UNREAD_COUNT_QUERY, (user_id,))['count']
+
+    def _changed(self, user_id, rowcount):
+        if rowcount:
+            invalidate_notifications(user_id)
+        return bool(rowcount)
+
+    def mark_all_read(self, user_id):
+        rowcount = self._execute("UPDATE notifications SET is_read = TRUE WHERE user_id = %s AND is_read = FALSE",
+                                 (user_id,))[0]
+        return self._changed(user_id, rowcount)
+
+    def delete(self, user_id, notification_id):
+        rowcount = self._execute("DELETE FROM notifications WHERE id = %s AND user_id = %s",
+                                 (notification_id, user_id))[0]
+        return self._changed(user_id, rowcount)
+
+    def clear(self, user_id):
+        return self._changed(user_id, self._execute("DELETE FROM notifications WHERE user_id = %s", (user_id,))[0])
+
+
+class MySQLStorage(Storage):
+    errors = mysql.connector.Error
+
+    def __init__(self, conn):
+        super().__init__(
+            conn,
+            users=MySQLUserRepo(conn),
+            transactions=MySQLTransactionRepo(conn),
+            budgets=MySQLBudgetRepo(conn),
+            bills=MySQLBillRepo(conn),
+            goals=MySQLGoalRepo(conn),
+            notifications=MySQLNotificationRepo(conn)
+        )
+
+    def is_duplicate(self, err):
+        return isinstance(err, mysql.connector.IntegrityError) and err.errno == errorcode.ER_DUP_ENTRY
+
+    @property
+    def has_changes(self):
+        # mysql.connector's in_transaction is also set by plain SELECTs
+        return self.conn.has_changes
+
+
+def open_storage():
+    """Storage on a dedicated pooled connection; the caller must close() it"""
+    conn = get_dedicated_connection()
+    if conn is None:
+        raise ConnectionError("Could not connect to database")
+    return MySQLStorage(conn)
+
+
+def request_storage(read_only=False):
+    """Storage on the request's connection (see db.get_db_connection / get_read_connection)"""
+    conn = get_read_connection() if read_only else get_db_connection()
+    if conn is None:
+        raise ConnectionError("Could not connect to database")
+    return MySQLStorage(conn)
@@ -0,0 +1,396 @@
+"""Embedded SQLite repositories, for scripts, tests and benchmarks without a database server
+
+    from storage import open_storage
+    storage = open_storage('sqlite', path='finance.sqlite3')
+
+The schema mirrors the MySQL tables (see migrations/) and is created on open.
+user_balances and monthly_category_spend are kept up to date by triggers on
+transactions instead of by ledger.py, with the same rules: a soft delete
+takes a transaction out of the balance but not out of budget spend. Balance
+and spend lookups are therefore point reads, as on MySQL. The database runs
+in WAL mode, so readers don't block the writer.
+"""
+import sqlite3
+from datetime import date, datetime
+from decimal import Decimal
+
+from ledger import month_range
+from storage.base import BillRepo, BudgetRepo, GoalRepo, NotificationRepo, Storage, TransactionRepo, UserRepo
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL,
+    email TEXT NOT NULL UNIQUE,
+    password_hash TEXT NOT NULL,
+    profile_pic TEXT DEFAULT 'default.png',
+    phone TEXT,
+    job_title TEXT,
+    bio TEXT,
+    initial_balance DECIMAL(12, 2) DEFAULT 0,
+    data_version INTEGER NOT NULL DEFAULT 0,
+    data_updated_at TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    type TEXT NOT NULL CHECK (type IN ('income', 'expense')),
+    category TEXT NOT NULL,
+    category_norm TEXT GENERATED ALWAYS AS (LOWER(TRIM(category))) STORED,
+    amount DECIMAL(10, 2) NOT NULL,
+    description TEXT,
+    date DATE NOT NULL,
+    payment_method TEXT DEFAULT 'Cash',
+    is_deleted BOOLEAN NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_tx_user_deleted_date ON transactions (user_id, is_deleted, date);
+CREATE INDEX IF NOT EXISTS idx_tx_user_type_category_date ON transactions (user_id, type, category_norm, date);
+
+CREATE TABLE IF NOT EXISTS user_balances (
+    user_id INTEGER PRIMARY KEY REFERENCES users (id) ON DELETE CASCADE,
+    total_income DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    total_expense DECIMAL(14, 2) NOT NULL DEFAULT 0
+);
+
+-- Includes soft-deleted transactions, as budget spend does
+CREATE TABLE IF NOT EXISTS monthly_category_spend (
+    user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    month TEXT NOT NULL,
+    category_norm TEXT NOT NULL,
+    type TEXT NOT NULL,
+    total DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, month, category_norm, type)
+);
+
+CREATE TRIGGER IF NOT EXISTS tx_ledger_insert AFTER INSERT ON transactions
+BEGIN
+    INSERT INTO user_balances (user_id) VALUES (NEW.user_id) ON CONFLICT (user_id) DO NOTHING;
+    UPDATE user_balances
+    SET total_income = total_income + (CASE WHEN NEW.type = 'income' AND NOT NEW.is_deleted THEN NEW.amount ELSE 0 END),
+        total_expense = total_expense + (CASE WHEN NEW.type = 'expense' AND NOT NEW.is_deleted THEN NEW.amount ELSE 0 END)
+    WHERE user_id = NEW.user_id;
+    INSERT INTO monthly_category_spend (user_id, month, category_norm, type, total, count)
+    VALUES (NEW.user_id, SUBSTR(NEW.date, 1, 7), NEW.category_norm, NEW.type, NEW.amount, 1)
+    ON CONFLICT (user_id, month, category_norm, type) DO UPDATE SET total = total + excluded.total, count = count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tx_ledger_soft_delete AFTER UPDATE OF is_deleted ON transactions
+WHEN NEW.is_deleted AND NOT OLD.is_deleted
+BEGIN
+    UPDATE user_balances
+    SET total_income = total_income - (CASE WHEN OLD.type = 'income' THEN OLD.amount ELSE 0 END),
+        total_expense = total_expense - (CASE WHEN OLD.type = 'expense' THEN OLD.amount ELSE 0 END)
+    WHERE user_id = OLD.user_id;
+END;
+
+CREATE TABLE IF NOT EXISTS goals (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    target_amount DECIMAL(10, 2) NOT NULL,
+    current_amount DECIMAL(10, 2) DEFAULT 0,
+    deadline DATE
+);
+
+CREATE TABLE IF NOT EXISTS budgets (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    category TEXT NOT NULL,
+    limit_amount DECIMAL(10, 2) NOT NULL,
+    month TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_budget_user_month ON budgets (user_id, month);
+
+CREATE TABLE IF NOT EXISTS notifications (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    message TEXT NOT NULL,
+    type TEXT DEFAULT 'info' CHECK (type IN ('info', 'warning', 'danger', 'success')),
+    dedup_key TEXT,
+    is_read BOOLEAN DEFAULT 0,
+    date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_notif_user_date ON notifications (user_id, date);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_notif_user_dedup ON notifications (user_id, dedup_key);
+
+CREATE TABLE IF NOT EXISTS bills (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    amount DECIMAL(10, 2) NOT NULL,
+    due_date DATE NOT NULL,
+    category TEXT DEFAULT 'Other',
+    is_recurring BOOLEAN DEFAULT 0,
+    recurrence TEXT DEFAULT 'monthly' CHECK (recurrence IN ('weekly', 'monthly', 'yearly')),
+    is_paid BOOLEAN DEFAULT 0,
+    paid_date DATE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+# Dates, timestamps and money come back as the same types mysql.connector returns
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(' '))
+sqlite3.register_adapter(Decimal, str)
+sqlite3.register_converter('DATE', lambda value: date.fromisoformat(value.decode()))
+sqlite3.register_converter('TIMESTAMP', lambda value: datetime.fromisoformat(value.decode()))
+sqlite3.register_converter('DECIMAL', lambda value: Decimal(value.decode()))
+
+TRANSACTION_FIELDS = "id, date, type, category, amount, description, payment_method"
+
+BUMP_QUERY = "UPDATE users SET data_version = data_version + 1, data_updated_at = CURRENT_TIMESTAMP WHERE id = ?"
+
+
+def dict_factory(cursor, row):
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+def connect(path):
+    conn = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES, timeout=10)
+    conn.row_factory = dict_factory
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+class SQLiteRepo:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def _fetchall(self, sql, params):
+        return self.conn.execute(sql, params).fetchall()
+
+    def _fetchone(self, sql, params):
+        return self.conn.execute(sql, params).fetchone()
+
+    def _execute(self, sql, params, bump_user=None):
+        """Run a write and return (rowcount, lastrowid); bumps `bump_user`'s data version if a row changed"""
+        cursor = self.conn.execute(sql, params)
+        if bump_user is not None and cursor.rowcount:
+            self.conn.execute(BUMP_QUERY, (bump_user,))
+        return cursor.rowcount, cursor.lastrowid
+
+
+class SQLiteUserRepo(SQLiteRepo, UserRepo):
+    def create(self, username, email, password_hash, initial_balance=0):
+        return self._execute(
+            "INSERT INTO users (username, email, password_hash, initial_balance) VALUES (?, ?, ?, ?)",
+            (username, email, password_hash, initial_balance)
+        )[1]
+
+    def get(self, user_id):
+        return self._fetchone("SELECT * FROM users WHERE id = ?", (user_id,))
+
+    def get_by_email(self, email):
+        return self._fetchone("SELECT * FROM users WHERE email = ?", (email,))
+
+    def set_password_hash(self, user_id, password_hash):
+        return bool(self._execute("UPDATE users SET password_hash = ? WHERE id = ?", (password_hash, user_id))[0])
+
+    def update_profile(self, user_id, username, email, phone='', job_title='', bio=''):
+        return bool(self._execute(
+            "UPDATE users SET username = ?, email = ?, phone = ?, job_title = ?, bio = ? WHERE id = ?",
+            (username, email, phone, job_title, bio, user_id)
+        )[0])
+
+    def set_profile_pic(self, user_id, filename):
+        user = self._fetchone("SELECT profile_pic FROM users WHERE id = ?", (user_id,))
+        if user is None:
+            return None
+        self._execute("UPDATE users SET profile_pic = ? WHERE id = ?", (filename, user_id))
+        return user['profile_pic']
+
+    def delete(self, user_id):
+        return bool(self._execute("DELETE FROM users WHERE id = ?", (user_id,))[0])
+
+    def data_version(self, user_id):
+        row = self._fetchone("SELECT data_version FROM users WHERE id = ?", (user_id,))
+        return None if row is None else row['data_version']
+
+
+class SQLiteTransactionRepo(SQLiteRepo, TransactionRepo):
+    def add(self, user_id, tx_type, category, amount, tx_date, description='', payment_method='Cash'):
+        return self._execute(
+            "INSERT INTO transactions (user_id, type, category, amount, description, date, payment_method) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (user_id, tx_type, category, amount, description, tx_date, payment_method), bump_user=user_id
+        )[1]
+
+    def delete(self, user_id, transaction_id):
+        return bool(self._execute("UPDATE transactions SET is_deleted = 1 WHERE id = ? AND user_id = ? AND is_deleted = 0",
+                                  (transaction_id, user_id), bump_user=user_id)[0])
+
+    def list(self, user_id, month=None, limit=None):
+        sql = f"SELECT {TRANSACTION_FIELDS} FROM transactions WHERE user_id = ? AND is_deleted = 0"
+        params = [user_id]
+        if month is not None:
+            sql += " AND date >= ? AND date < ?"
+            params += month_range(month)
+        sql += " ORDER BY date DESC, id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return self._fetchall(sql, params)
+
+    # Money is summed as REAL in SQLite, so totals are rounded back to cents
+    def month_spend(self, user_id, month, tx_type='expense'):
+        row = self._fetchone(
+            "SELECT COALESCE(SUM(total), 0) AS total FROM monthly_category_spend "
+            "WHERE user_id = ? AND month = ? AND type = ?",
+            (user_id, month, tx_type)
+        )
+        return round(float(row['total']), 2)
+
+    def balance(self, user_id):
+        row = self._fetchone("""
+            SELECT COALESCE(u.initial_balance, 0) + COALESCE(b.total_income, 0) - COALESCE(b.total_expense, 0) AS balance
+            FROM users u
+            LEFT JOIN user_balances b ON b.user_id = u.id
+            WHERE u.id = ?
+        """, (user_id,))
+        return 0 if row is None else round(float(row['balance']), 2)
+
+
+class SQLiteBudgetRepo(SQLiteRepo, BudgetRepo):
+    # As ledger.BUDGET_SPEND_QUERY
+    LIST_QUERY = """
+        SELECT b.*, COALESCE(m.total, 0) AS spent
+        FROM budgets b
+        LEFT JOIN monthly_category_spend m
+               ON m.user_id = b.user_id AND m.month = b.month
+              AND m.category_norm = LOWER(TRIM(b.category)) AND m.type = 'expense'
+        WHERE b.user_id = ?
+    """
+
+    def add(self, user_id, category, limit_amount, month):
+        if self._fetchone("SELECT id FROM budgets WHERE user_id = ? AND category = ? AND month = ?",
+                          (user_id, category, month)):
+            return None
+        return self._execute("INSERT INTO budgets (user_id, category, limit_amount, month) VALUES (?, ?, ?, ?)",
+                             (user_id, category, limit_amount, month), bump_user=user_id)[1]
+
+    def list_with_spend(self, user_id, month=None):
+        if month is None:
+            return self._fetchall(self.LIST_QUERY, (user_id,))
+        return self._fetchall(self.LIST_QUERY + " AND b.month = ?", (user_id, month))
+
+    def update_limit(self, user_id, budget_id, limit_amount):
+        return bool(self._execute("UPDATE budgets SET limit_amount = ? WHERE id = ? AND user_id = ?",
+                                  (limit_amount, budget_id, user_id), bump_user=user_id)[0])
+
+    def delete(self, user_id, budget_id):
+        return bool(self._execute("DELETE FROM budgets WHERE id = ? AND user_id = ?",
+                                  (budget_id, user_id), bump_user=user_id)[0])
+
+    def delete_before(self, user_id, month):
+        return self._execute("DELETE FROM budgets WHERE user_id = ? AND month < ?",
+                             (user_id, month), bump_user=user_id)[0]
+
+
+class SQLiteBillRepo(SQLiteRepo, BillRepo):
+    def add(self, user_id, name, amount, due_date, category='Other', is_recurring=False, recurrence='monthly'):
+        return self._execute("""
+            INSERT INTO bills (user_id, name, amount, due_date, category, is_recurring, recurrence)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (user_id, name, amount, due_date, category, is_recurring, recurrence), bump_user=user_id)[1]
+
+    def get(self, user_id, bill_id):
+        return self._fetchone("SELECT * FROM bills WHERE id = ? AND user_id = ?", (bill_id, user_id))
+
+    def list(self, user_id):
+        return self._fetchall("SELECT * FROM bills WHERE user_id = ? ORDER BY is_paid ASC, due_date ASC", (user_id,))
+
+    def mark_paid(self, user_id, bill_id, paid_date):
+        return bool(self._execute("UPDATE bills SET is_paid = 1, paid_date = ? WHERE id = ? AND user_id = ?",
+                                  (paid_date, bill_id, user_id), bump_user=user_id)[0])
+
+    def mark_unpaid(self, user_id, bill_id):
+        return bool(self._execute("UPDATE bills SET is_paid = 0, paid_date = NULL WHERE id = ? AND user_id = ?",
+                                  (bill_id, user_id), bump_user=user_id)[0])
+
+    def delete(self, user_id, bill_id):
+        return bool(self._execute("DELETE FROM bills WHERE id = ? AND user_id = ?",
+                                  (bill_id, user_id), bump_user=user_id)[0])
+
+
+class SQLiteGoalRepo(SQLiteRepo, GoalRepo):
+    def add(self, user_id, name, target_amount, current_amount=0, deadline=None):
+        return self._execute(
+            "INSERT INTO goals (user_id, name, target_amount, current_amount, deadline) VALUES (?, ?, ?, ?, ?)",
+            (user_id, name, target_amount, current_amount, deadline), bump_user=user_id
+        )[1]
+
+    def get(self, user_id, goal_id):
+        return self._fetchone("SELECT * FROM goals WHERE id = ? AND user_id = ?", (goal_id, user_id))
+
+    def list(self, user_id):
+        return self._fetchall("SELECT * FROM goals WHERE user_id = ?", (user_id,))
+
+    def set_amount(self, user_id, goal_id, current_amount):
+        return bool(self._execute("UPDATE goals SET current_amount = ? WHERE id = ? AND user_id = ?",
+                                  (current_amount, goal_id, user_id), bump_user=user_id)[0])
+
+    def delete(self, user_id, goal_id):
+        return bool(self._execute("DELETE FROM goals WHERE id = ? AND user_id = ?",
+                                  (goal_id, user_id), bump_user=user_id)[0])
+
+
+class SQLiteNotificationRepo(SQLiteRepo, NotificationRepo):
+    def add(self, user_id, message, notif_type='info', dedup_key=None):
+        try:
+            self._execute("INSERT INTO notifications (user_id, message, type, dedup_key) VALUES (?, ?, ?, ?)",
+                          (user_id, message, notif_type, dedup_key))
+        except sqlite3.IntegrityError:
+            # Unique (user_id, dedup_key): only the statement is rolled back
+            if dedup_key is None:
+                raise
+            return 0
+        return 1
+
+    def latest(self, user_id, limit):
+        return self._fetchall("SELECT * FROM notifications WHERE user_id = ? ORDER BY date DESC, id DESC LIMIT ?",
+                              (user_id, limit))
+
+    def unread_count(self, user_id):
+        return self._fetchone("SELECT COUNT(*) AS count FROM notifications WHERE user_id = ? AND is_read = 0",
+                              (user_id,))['count']
+
+    def mark_all_read(self, user_id):
+        return bool(self._execute("UPDATE notifications SET is_read = 1 WHERE user_id = ? AND is_read = 0",
+                                  (user_id,))[0])
+
+    def delete(self, user_id, notification_id):
+        return bool(self._execute("DELETE FROM notifications WHERE id = ? AND user_id = ?",
+                                  (notification_id, user_id))[0])
+
+    def clear(self, user_id):
+        return bool(self._execute("DELETE FROM notifications WHERE user_id = ?", (user_id,))[0])
+
+
+class SQLiteStorage(Storage):
+    errors = sqlite3.Error
+
+    def __init__(self, conn):
+        super().__init__(
+            conn,
+            users=SQLiteUserRepo(conn),
+            transactions=SQLiteTransactionRepo(conn),
+            budgets=SQLiteBudgetRepo(conn),
+            bills=SQLiteBillRepo(conn),
+            goals=SQLiteGoalRepo(conn),
+            notifications=SQLiteNotificationRepo(conn)
+        )
+
+    def is_duplicate(self, err):
+        return isinstance(err, sqlite3.IntegrityError) and err.sqlite_errorcode == sqlite3.SQLITE_CONSTRAINT_UNIQUE
+
+
+def open_storage(path):
+    """Storage on a new connection to the database file at `path` (created if missing)"""
+    return SQLiteStorage(connect(path))
@@ -0,0 +1,50 @@
+"""The storage conformance checks (storage/conformance.py) as pytest tests
+
+    python -m pytest tests
+
+SQLite always runs, on a temporary file per test. Set STORAGE_TEST_MYSQL=1 to
+also run them against the MySQL database in the DB_* settings (migrated with
+`python migrate.py`); every check's writes are rolled back.
+"""
+import os
+
+import pytest
+
+from storage import open_storage
+from storage.base import DuplicateError, StorageError, UserRepo
+from storage.conformance import CHECKS, new_user
+
+BACKENDS = ['sqlite'] + (['mysql'] if os.environ.get('STORAGE_TEST_MYSQL') == '1' else [])
+
+
+@pytest.fixture(params=BACKENDS)
+def storage(request, tmp_path):
+    storage = open_storage(request.param, path=str(tmp_path / 'storage.sqlite3'))
+    try:
+        yield storage
+    finally:
+        storage.rollback()
+        storage.close()
+
+
+@pytest.mark.parametrize('check', CHECKS, ids=lambda fn: fn.__name__)
+def test_conformance(storage, check):
+    check(storage)
+
+
+def test_incomplete_repository_fails_when_built():
+    class PartialUserRepo(UserRepo):
+        def get(self, user_id):
+            return None
+
+    with pytest.raises(TypeError):
+        PartialUserRepo()
+
+
+def test_backend_errors_are_storage_errors(tmp_path):
+    with open_storage('sqlite', path=str(tmp_path / 'storage.sqlite3')) as storage:
+        user_id = new_user(storage)
+        with pytest.raises(StorageError) as info:
+            storage.transactions.add(user_id, 'refund', 'Food', 10, '2024-01-01')  # CHECK (type IN ...)
+        assert not isinstance(info.value, DuplicateError)
+        assert info.value.__cause__ is not None